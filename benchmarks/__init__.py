@@ -0,0 +1 @@
+"""오프라인 성능 측정 스크립트 (python -m benchmarks.<이름>)."""
@@ -0,0 +1,89 @@
+"""Excel / Parquet / HTML ZIP 내보내기 벤치마크 (합성 결과 레코드).
+
+    python -m benchmarks.bench_export [--rows 5000] [--workers 4]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from ctg_pipeline.classify import CompletionResult
+from ctg_pipeline.export import StreamingExcel, write_excel
+from ctg_pipeline.pipeline import apply_records, build_record
+from ctg_pipeline.records import ResultWriter
+from ctg_pipeline.report import write_report_zip
+
+from .results import add_results_args, save_result
+from .synthetic import make_answer, make_input_frame, make_nct_ids, make_studies
+
+
+def make_records(nct_ids, studies, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for row, nct_id in enumerate(nct_ids):
+        study = studies[nct_id]
+        completion = CompletionResult(text=make_answer(study, rng, structured=False))
+        records.append(build_record(row, nct_id, study, completion))
+    return records
+
+
+def timed(func):
+    t0 = time.perf_counter()
+    func()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--eligibility-chars", type=int, nargs=2, default=[500, 6000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    nct_ids = make_nct_ids(args.rows)
+    studies = make_studies(nct_ids, seed=args.seed, eligibility_chars=tuple(args.eligibility_chars))
+    df = make_input_frame(nct_ids, seed=args.seed)
+    t0 = time.perf_counter()
+    records = make_records(nct_ids, studies, args.seed)
+    results = {"build_records": time.perf_counter() - t0}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def streaming_excel():
+            export = StreamingExcel(df, os.path.join(tmp, "streaming.xlsx"))
+            for record in records:
+                export.add(record)
+            export.finish()
+
+        def parquet():
+            writer = ResultWriter(os.path.join(tmp, "results.parquet"))
+            for record in records:
+                writer.add(record)
+            writer.finish()
+
+        parquet_path = os.path.join(tmp, "results.parquet")
+        runs = [
+            ("excel_streaming", streaming_excel),
+            ("excel_in_memory", lambda: write_excel(apply_records(df, records), os.path.join(tmp, "memory.xlsx"))),
+            ("parquet", parquet),
+            ("zip_serial", lambda: write_report_zip(parquet_path, os.path.join(tmp, "serial.zip"), workers=1)),
+        ]
+        if args.workers > 1:
+            runs.append((
+                f"zip_{args.workers}_workers",
+                lambda: write_report_zip(parquet_path, os.path.join(tmp, "parallel.zip"), workers=args.workers)
+            ))
+        print(f"{args.rows} records")
+        for name, func in runs:
+            results[name] = timed(func)
+            print(f"{name:>20}: {results[name]:8.2f}s ({args.rows / results[name]:,.0f} rows/s)")
+
+    path = save_result("bench_export", vars(args), results, args)
+    if path:
+        print(f"saved -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""전체 처리(조회 -> 분류 -> 내보내기) 처리량: 로컬 ClinicalTrials.gov / OpenAI 대역 서버 사용.
+
+    python -m benchmarks.bench_pipeline [--rows 500] [--ctg-latency 0.05] [--gpt-latency 0.3]
+                                        [--gpt-error-rate 0.02] [--gpt-workers 8] [--duplicate-rate 0.2] [--warm]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from .mock_servers import MockConfig, mock_servers
+from .results import add_results_args, save_result
+from .synthetic import make_input_frame, make_nct_ids, make_studies
+
+
+def run_once(df, output_dir, cache_dir, openai_base_url, options, formats):
+    # ctg_pipeline.fetch 는 import 시점에 CTG_API_BASE 를 읽으므로 서버를 띄운 뒤 import 한다
+    from openai import OpenAI
+
+    from ctg_pipeline.batch import process_frame
+    from ctg_pipeline.cache import ResultCache
+
+    cache = ResultCache(cache_dir=cache_dir)
+    try:
+        t0 = time.perf_counter()
+        stats = process_frame(
+            df,
+            output_dir,
+            OpenAI(api_key="bench", base_url=openai_base_url),
+            cache,
+            options,
+            formats=formats
+        )
+        elapsed = time.perf_counter() - t0
+    finally:
+        cache.close()
+    counters = stats["metrics"]["counters"]
+    stages = stats["metrics"]["stages"]
+    return {
+        "seconds": elapsed,
+        "rows_per_sec": len(df) / elapsed,
+        "stage_seconds": {name: s["total"] for name, s in stages.items()},
+        "openai_requests": counters.get("openai.http.200", 0),
+        "openai_retries": counters.get("openai.retries", 0),
+        "rows_error": counters.get("rows.error", 0),
+        "rule_hits": stats.get("rules", {}).get("hits", 0),
+        "duplicate_rows": stats.get("duplicate_rows", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--missing-rate", type=float, default=0.02, help="레지스트리에 없는 NCT ID 비율")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="다른 행의 NCT ID 를 반복하는 행 비율")
+    parser.add_argument("--arms", type=int, nargs=2, default=[1, 4])
+    parser.add_argument("--eligibility-chars", type=int, nargs=2, default=[500, 6000])
+    parser.add_argument("--ctg-latency", type=float, default=0.05)
+    parser.add_argument("--ctg-error-rate", type=float, default=0.0)
+    parser.add_argument("--gpt-latency", type=float, default=0.3)
+    parser.add_argument("--gpt-error-rate", type=float, default=0.0)
+    parser.add_argument("--gpt-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--gpt-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--gpt-workers", type=int, default=8)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--format", nargs="+", default=["excel", "zip"])
+    parser.add_argument("--rules", action="store_true", help="규칙 기반 사전 분류 켜기")
+    parser.add_argument("--warm", action="store_true", help="같은 캐시로 한 번 더 실행 (캐시 hit 경로)")
+    parser.add_argument("--seed", type=int, default=0)
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    nct_ids = make_nct_ids(args.rows)
+    n_missing = int(args.rows * args.missing_rate)
+    studies = make_studies(
+        nct_ids[n_missing:],
+        seed=args.seed,
+        arms=tuple(args.arms),
+        eligibility_chars=tuple(args.eligibility_chars)
+    )
+    # 여러 검색 결과를 합친 목록처럼 일부 행은 앞의 NCT ID 를 반복
+    rng = random.Random(args.seed)
+    rows = [
+        nct_ids[rng.randrange(i)] if i and rng.random() < args.duplicate_rate else nct_id
+        for i, nct_id in enumerate(nct_ids)
+    ]
+    df = make_input_frame(rows, seed=args.seed)
+    ctg_config = MockConfig(latency=args.ctg_latency, error_rate=args.ctg_error_rate)
+    openai_config = MockConfig(
+        latency=args.gpt_latency,
+        error_rate=args.gpt_error_rate,
+        rate_limit_rate=args.gpt_rate_limit_rate,
+        malformed_rate=args.gpt_malformed_rate
+    )
+
+    with mock_servers(studies, ctg_config, openai_config, seed=args.seed) as (ctg_url, openai_url, counters):
+        os.environ["CTG_API_BASE"] = ctg_url
+        from ctg_pipeline.pipeline import PipelineOptions
+
+        options = PipelineOptions(
+            concurrency=args.concurrency,
+            gpt_workers=args.gpt_workers,
+            chunk_size=args.chunk_size,
+            requests_per_minute=1_000_000,
+            tokens_per_minute=1_000_000_000,
+            rule_classifier=args.rules
+        )
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            runs = ["cold", "warm"] if args.warm else ["cold"]
+            for name in runs:
+                results[name] = run_once(df, os.path.join(tmp, name), cache_dir, openai_url, options, args.format)
+                r = results[name]
+                print(
+                    f"{name:>5}: {args.rows} rows in {r['seconds']:.2f}s ({r['rows_per_sec']:.1f} rows/s), "
+                    f"GPT requests {r['openai_requests']}, retries {r['openai_retries']}, "
+                    f"rule hits {r['rule_hits']}, duplicate rows {r['duplicate_rows']}, error rows {r['rows_error']}"
+                )
+        results["server"] = counters
+
+    path = save_result("bench_pipeline", vars(args), results, args)
+    if path:
+        print(f"saved -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""create_ppt_from_dfs 벤치마크: 기존 구현 vs 사전 변환 + (선택) 병렬 생성.
+카테고리 분할(카테고리마다 전체 비교 vs partition_groups) 시간도 따로 잰다.
+
+    python -m benchmarks.bench_ppt [--rows 10000] [--cols 8] [--categories 50] [--workers 4]
+"""
+import argparse
+import io
+import os
+import random
+import time
+
+import pandas as pd
+from pptx import Presentation
+from pptx.util import Pt
+
+from ctg_pipeline.ppt import create_ppt_from_dfs, partition_groups
+
+from .results import add_results_args, save_result
+
+
+def legacy_create_ppt_from_dfs(df_list_dict, common_title, selected_columns, rows_per_slide=6, col_widths=None):
+    # 교체 전 구현 (비교용으로 그대로 보존)
+    prs = Presentation()
+    slide_width_in_EMU = prs.slide_width
+    title_slide_layout = prs.slide_layouts[5]
+    margin_in_EMU = int(0.5 * 914400)
+    table_width_in_EMU = slide_width_in_EMU - (2 * margin_in_EMU)
+
+    for category_name, df_data in df_list_dict.items():
+        if df_data.empty:
+            continue
+        df_data = df_data[selected_columns]
+        total_rows = len(df_data)
+        num_splits = (total_rows + rows_per_slide - 1) // rows_per_slide
+        for idx in range(num_splits):
+            slide = prs.slides.add_slide(title_slide_layout)
+            shapes = slide.shapes
+            title_shape = shapes.title
+            slide_title = f"{common_title} - {category_name}"
+            if num_splits > 1:
+                slide_title += f" (page {idx+1})"
+            title_shape.text = slide_title
+            df_chunk = df_data.iloc[idx*rows_per_slide:(idx+1)*rows_per_slide]
+            rows = len(df_chunk) + 1
+            cols = len(selected_columns)
+            table = shapes.add_table(rows, cols, margin_in_EMU, int(1.5 * 914400), table_width_in_EMU, int(5 * 914400)).table
+            for c, col_name in enumerate(selected_columns):
+                cell = table.cell(0, c)
+                cell.text = col_name
+                run = cell.text_frame.paragraphs[0].runs[0]
+                run.font.bold = True
+                run.font.size = Pt(12)
+            for r in range(len(df_chunk)):
+                for c, col_name in enumerate(selected_columns):
+                    val = df_chunk.iloc[r][col_name]
+                    val_str = "" if pd.isnull(val) else str(val)
+                    table.cell(r+1, c).text = val_str
+            for c, col_name in enumerate(selected_columns):
+                if col_widths and (col_name in col_widths):
+                    col_percent = col_widths[col_name] / 100.0
+                else:
+                    col_percent = 1.0 / cols
+                table.columns[c].width = int(table_width_in_EMU * col_percent)
+
+    ppt_io = io.BytesIO()
+    prs.save(ppt_io)
+    ppt_io.seek(0)
+    return ppt_io
+
+
+def legacy_split_categories(df, grouping_col):
+    # 교체 전 PPT 탭의 카테고리 분할 (카테고리마다 전체 행 비교)
+    return {str(cat): df[df[grouping_col] == cat] for cat in df[grouping_col].unique()}
+
+
+def make_frame(n_rows, n_cols, n_categories, seed=0):
+    rng = random.Random(seed)
+    data = {"category": [f"cat{rng.randrange(n_categories)}" for _ in range(n_rows)]}
+    for c in range(n_cols):
+        data[f"col{c}"] = [
+            None if rng.random() < 0.05 else " ".join("lorem" for _ in range(rng.randint(1, 12)))
+            for _ in range(n_rows)
+        ]
+    return pd.DataFrame(data)
+
+
+def slide_texts(ppt_io):
+    prs = Presentation(ppt_io)
+    out = []
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if shape.has_table:
+                out.append([[cell.text for cell in row.cells] for row in shape.table.rows])
+            elif shape.has_text_frame:
+                out.append(shape.text_frame.text)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--cols", type=int, default=8)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--rows-per-slide", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-legacy", action="store_true")
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cols, args.categories)
+    selected_columns = [f"col{c}" for c in range(args.cols)]
+    timings = {}
+    for name, split in (
+        ("split_legacy", lambda: legacy_split_categories(df, "category")),
+        ("split_partition", lambda: dict(partition_groups(df, "category"))),
+    ):
+        t0 = time.perf_counter()
+        groups = split()
+        timings[name] = time.perf_counter() - t0
+        print(f"{name:>20}: {timings[name]:8.3f}s")
+    df_list_dict = groups
+    kwargs = dict(common_title="Bench", selected_columns=selected_columns, rows_per_slide=args.rows_per_slide)
+
+    print(f"{args.rows} rows x {args.cols} cols, {len(df_list_dict)} categories")
+    results = {}
+    runs = [("new (serial)", lambda: create_ppt_from_dfs(df_list_dict, **kwargs))]
+    if args.workers > 1:
+        runs.append((f"new ({args.workers} workers)", lambda: create_ppt_from_dfs(df_list_dict, workers=args.workers, **kwargs)))
+    if not args.skip_legacy:
+        runs.insert(0, ("legacy", lambda: legacy_create_ppt_from_dfs(df_list_dict, **kwargs)))
+
+    for name, func in runs:
+        t0 = time.perf_counter()
+        ppt_io = func()
+        elapsed = time.perf_counter() - t0
+        results[name] = slide_texts(ppt_io)
+        timings[name] = elapsed
+        print(f"{name:>20}: {elapsed:8.2f}s")
+
+    reference = next(iter(results.values()))
+    assert all(r == reference for r in results.values()), "슬라이드 내용이 구현마다 다릅니다"
+
+    path = save_result("bench_ppt", vars(args), timings, args)
+    if path:
+        print(f"saved -> {path}")
+
+
+if __name__ == "__main__":
+    main()
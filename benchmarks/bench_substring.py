@@ -0,0 +1,82 @@
+"""find_common_substring 마이크로 벤치마크: 기존 brute-force 구현 vs suffix automaton.
+
+    python -m benchmarks.bench_substring [--criteria-chars 5000 10000] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+from ctg_pipeline.text_utils import find_common_substring, find_highlight_spans
+
+from .results import add_results_args, save_result
+from .synthetic import make_criteria
+
+
+def legacy_find_common_substring(s1, s2):
+    # 교체 전 구현 (비교용으로 그대로 보존)
+    if not s1 or not s2:
+        return ""
+    max_len = min(len(s1), len(s2))
+    for length in range(max_len, 0, -1):
+        for start1 in range(len(s1) - length + 1):
+            substr1 = s1[start1:start1 + length]
+            for start2 in range(len(s2) - length + 1):
+                substr2 = s2[start2:start2 + length]
+                if substr1 == substr2:
+                    return substr1
+    return ""
+
+
+def make_quote(criteria, quote_chars, rng):
+    # GPT 인용처럼 원문 일부를 가져오되 끝부분을 조금 바꾼다
+    start = rng.randrange(0, max(1, len(criteria) - quote_chars))
+    quote = criteria[start:start + quote_chars]
+    return quote[: int(len(quote) * 0.8)].replace("\n* ", " ") + " (as stated)"
+
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--criteria-chars", type=int, nargs="+", default=[1000, 5000, 15000])
+    parser.add_argument("--quote-chars", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy-over", type=int, default=5000,
+                        help="이 길이를 넘는 criteria 에서는 기존 구현을 건너뜀 (너무 느림)")
+    parser.add_argument("--seed", type=int, default=0)
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'criteria':>9} {'legacy (s)':>11} {'automaton (s)':>14} {'speedup':>8} {'fuzzy (s)':>10}")
+    for n_chars in args.criteria_chars:
+        criteria = make_criteria(n_chars, rng)
+        quote = make_quote(criteria, args.quote_chars, rng)
+
+        new_t, new_result = time_call(find_common_substring, quote, criteria, repeat=args.repeat)
+        fuzzy_t, _ = time_call(find_highlight_spans, quote, criteria, repeat=args.repeat)
+        results[str(n_chars)] = {"automaton": new_t, "fuzzy": fuzzy_t}
+        if n_chars <= args.skip_legacy_over:
+            old_t, old_result = time_call(legacy_find_common_substring, quote, criteria, repeat=1)
+            assert old_result == new_result, "결과가 기존 구현과 다릅니다"
+            results[str(n_chars)]["legacy"] = old_t
+            print(f"{n_chars:>9} {old_t:>11.4f} {new_t:>14.4f} {old_t / new_t:>7.0f}x {fuzzy_t:>10.4f}")
+        else:
+            print(f"{n_chars:>9} {'skipped':>11} {new_t:>14.4f} {'-':>8} {fuzzy_t:>10.4f}")
+
+    path = save_result("bench_substring", vars(args), results, args)
+    if path:
+        print(f"saved -> {path}")
+
+
+if __name__ == "__main__":
+    main()
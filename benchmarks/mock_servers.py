@@ -0,0 +1,192 @@
+"""로컬 ClinicalTrials.gov (/api/v2/studies) 와 OpenAI chat completions 대역 서버.
+
+지연 시간과 오류 비율을 조절할 수 있고, 한 프로세스 안에서 스레드로 띄운다.
+"""
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .synthetic import make_answer
+
+_NCT_IN_PROMPT = re.compile(r"NCT\d{8}")
+
+
+@dataclass
+class MockConfig:
+    latency: float = 0.05          # 응답 지연 평균 (초)
+    jitter: float = 0.5            # 지연 ± 비율
+    error_rate: float = 0.0        # HTTP 500 비율
+    rate_limit_rate: float = 0.0   # HTTP 429 비율 (Retry-After 포함)
+    malformed_rate: float = 0.0    # (OpenAI) 형식이 틀린 응답 비율
+    retry_after_ms: int = 100
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    config = MockConfig()
+    counters = None
+
+    def log_message(self, *args):
+        pass
+
+    def _count(self, name):
+        with self.server.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self):
+        """지연 후 오류를 흉내 냈으면 True. 지연 중인 요청 수의 최댓값은 counters["max_in_flight"]."""
+        rng = self.server.rng
+        config = self.config
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.counters["max_in_flight"] = max(self.counters.get("max_in_flight", 0), self.server.in_flight)
+        try:
+            time.sleep(max(0.0, config.latency * (1 + config.jitter * (2 * rng.random() - 1))))
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            self._count("429")
+            self._send_json(429, {"error": {"message": "rate limited"}}, {"retry-after-ms": str(config.retry_after_ms)})
+            return True
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._count("500")
+            self._send_json(500, {"error": {"message": "mock server error"}})
+            return True
+        return False
+
+
+class CTGHandler(_Handler):
+    """GET /api/v2/studies?filter.ids=...&fields=... 와 /api/v2/studies/{id}."""
+
+    studies = {}
+
+    def _project(self, study, fields):
+        # lastUpdatePostDate 만 요청하면 그 필드만 돌려준다 (fields projection)
+        if not fields:
+            return study
+        protocol = study["protocolSection"]
+        if "LastUpdatePostDate" in fields and "EligibilityModule" not in fields:
+            return {"protocolSection": {
+                "identificationModule": {"nctId": protocol["identificationModule"]["nctId"]},
+                "statusModule": {"lastUpdatePostDateStruct": protocol["statusModule"]["lastUpdatePostDateStruct"]},
+            }}
+        if "LastUpdatePostDate" not in fields:
+            # 실제 API 처럼 요청하지 않은 lastUpdatePostDate 는 빠진다
+            status = {k: v for k, v in protocol["statusModule"].items() if k != "lastUpdatePostDateStruct"}
+            return {**study, "protocolSection": {**protocol, "statusModule": status}}
+        return study
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self._simulate():
+            return
+        self._count("200")
+        fields = query.get("fields")
+        if url.path.rstrip("/") == "/api/v2/studies":
+            ids = [i for i in query.get("filter.ids", "").split(",") if i]
+            found = [self._project(self.studies[i], fields) for i in ids if i in self.studies]
+            page_size = int(query.get("pageSize", 10))
+            offset = int(query.get("pageToken", 0))
+            payload = {"studies": found[offset:offset + page_size]}
+            if offset + page_size < len(found):
+                payload["nextPageToken"] = str(offset + page_size)
+            self._send_json(200, payload)
+            return
+        nct_id = url.path.rsplit("/", 1)[-1]
+        if nct_id in self.studies:
+            self._send_json(200, self._project(self.studies[nct_id], fields))
+        else:
+            self._send_json(404, {"message": "not found"})
+
+
+class OpenAIHandler(_Handler):
+    """POST /v1/chat/completions. 프롬프트의 NCT ID 로 study 를 찾아 eligibility 를 인용해 답한다."""
+
+    studies = {}
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self._simulate():
+            return
+        self._count("200")
+        prompt = request["messages"][-1]["content"]
+        structured = (request.get("response_format") or {}).get("type") == "json_object"
+        match = _NCT_IN_PROMPT.search(prompt)
+        study = self.studies.get(match.group()) if match else None
+        rng = self.server.rng
+        if rng.random() < self.config.malformed_rate:
+            self._count("malformed")
+            content = "I think this is a first line trial."
+        elif study is not None:
+            content = make_answer(study, rng, structured=structured)
+        else:
+            content = json.dumps({"test": "unclear", "reason": "NA", "confidence": "uncertain"})
+        prompt_tokens = len(prompt) // 4
+        self._send_json(200, {
+            "id": f"chatcmpl-{rng.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        })
+
+
+def _start(handler_base, studies, config, seed):
+    handler = type(handler_base.__name__, (handler_base,), {"studies": studies, "config": config, "counters": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, handler.counters
+
+
+@contextmanager
+def mock_servers(studies, ctg_config=None, openai_config=None, seed=0):
+    """(ctg_base_url, openai_base_url, counters) 를 주고, 끝나면 서버를 내린다.
+
+    ctg_base_url 은 CTG_API_BASE 로, openai_base_url 은 OpenAI(base_url=...) 로 쓴다.
+    """
+    ctg, ctg_counters = _start(CTGHandler, studies, ctg_config or MockConfig(), seed)
+    gpt, gpt_counters = _start(OpenAIHandler, studies, openai_config or MockConfig(latency=0.3), seed + 1)
+    try:
+        yield (
+            f"http://127.0.0.1:{ctg.server_address[1]}/api/v2",
+            f"http://127.0.0.1:{gpt.server_address[1]}/v1",
+            {"ctg": ctg_counters, "openai": gpt_counters},
+        )
+    finally:
+        for server in (ctg, gpt):
+            server.shutdown()
+            server.server_close()
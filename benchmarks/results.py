@@ -0,0 +1,95 @@
+"""벤치마크 결과 기록 / 비교.
+
+각 벤치마크는 실행마다 <results-dir>/<이름>.jsonl 에 한 줄(시각, git commit, 파라미터, 결과)을 추가한다.
+
+    python -m benchmarks.results bench_pipeline [--last 10] [--results-dir .cache/benchmarks]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+DEFAULT_RESULTS_DIR = os.getenv("BENCH_RESULTS_DIR", os.path.join(".cache", "benchmarks"))
+
+
+def add_results_args(parser):
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="결과를 쌓을 폴더")
+    parser.add_argument("--no-save", action="store_true", help="결과를 기록하지 않음")
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_result(name, params, results, args):
+    """args 는 add_results_args 를 쓴 argparse 결과. 기록한 파일 경로 (안 했으면 None)."""
+    if args.no_save:
+        return None
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"{name}.jsonl")
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return path
+
+
+def load_results(name, results_dir=DEFAULT_RESULTS_DIR):
+    path = os.path.join(results_dir, f"{name}.jsonl")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _flatten(results, prefix=""):
+    out = {}
+    for k, v in results.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)):
+            out[key] = v
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("name", help="벤치마크 이름 (예: bench_pipeline)")
+    parser.add_argument("--last", type=int, default=10)
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    args = parser.parse_args()
+
+    entries = load_results(args.name, args.results_dir)[-args.last:]
+    if not entries:
+        print(f"{args.name}: 기록 없음 ({args.results_dir})", file=sys.stderr)
+        return 1
+    rows = [_flatten(e["results"]) for e in entries]
+    keys = list(dict.fromkeys(k for row in rows for k in row))
+    width = max(len(k) for k in keys)
+    header = " ".join(f"{(e['commit'] or '-')[:8]:>10}" for e in entries)
+    print(f"{'':>{width}} {header}")
+    for k in keys:
+        values = " ".join(f"{row[k]:>10.4g}" if k in row else f"{'-':>10}" for row in rows)
+        print(f"{k:>{width}} {values}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
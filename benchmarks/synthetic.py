@@ -0,0 +1,99 @@
+"""벤치마크용 합성 데이터: NCT ID, study JSON (arm 수 / eligibility 길이 조절), GPT 응답."""
+import json
+import random
+
+import pandas as pd
+
+WORDS = (
+    "patients must have histologically confirmed locally advanced or metastatic "
+    "non-small cell lung cancer with no prior systemic therapy for advanced disease "
+    "measurable disease per RECIST adequate organ function ECOG performance status "
+    "EGFR ALK ROS1 KRAS mutation prior platinum based chemotherapy allowed excluded "
+    "brain metastases untreated symptomatic pregnant or breastfeeding"
+).split()
+DRUGS = ("pembrolizumab", "osimertinib", "docetaxel", "carboplatin", "pemetrexed", "placebo", "sotorasib")
+TEST_VALUES = ("first line", "second line", "third line", "neoadjuvant", "adjuvant", "unclear")
+
+
+def make_nct_ids(n, start=1):
+    return [f"NCT{start + i:08d}" for i in range(n)]
+
+
+def make_criteria(n_chars, rng):
+    lines = ["Inclusion Criteria:", ""]
+    size = 0
+    while size < n_chars:
+        line = "* " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18)))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)[:n_chars]
+
+
+def make_arm(rng, arm_type):
+    drugs = rng.sample(DRUGS, rng.randint(1, 3))
+    return {
+        "label": f"{arm_type.title()}: {' + '.join(drugs)}",
+        "type": arm_type,
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60))),
+        "interventionNames": [f"Drug: {d}" for d in drugs],
+    }
+
+
+def make_study(nct_id, rng, arms=(1, 4), eligibility_chars=(500, 6000), last_update="2024-01-15"):
+    """v2 API 형식의 study JSON 하나. arms / eligibility_chars 는 (최소, 최대)."""
+    n_arms = rng.randint(*arms)
+    arm_groups = [make_arm(rng, "EXPERIMENTAL" if i == 0 or rng.random() < 0.5 else "ACTIVE_COMPARATOR")
+                  for i in range(n_arms)]
+    title_words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14)))
+    return {
+        "protocolSection": {
+            "identificationModule": {
+                "nctId": nct_id,
+                "briefTitle": f"Study of {arm_groups[0]['label']} in {title_words}",
+                "officialTitle": f"A Phase {rng.randint(1, 3)} Study of {title_words} ({nct_id[-4:]}-TRIAL)",
+            },
+            "statusModule": {
+                "lastUpdatePostDateStruct": {"date": last_update},
+                "startDateStruct": {"date": "2023-01"},
+                "primaryCompletionDateStruct": {"date": "2026-06", "type": "ESTIMATED"},
+                "completionDateStruct": {"date": "2027-12", "type": "ESTIMATED"},
+            },
+            "conditionsModule": {"conditions": ["Non-small Cell Lung Cancer"]},
+            "armsInterventionsModule": {"armGroups": arm_groups},
+            "eligibilityModule": {"eligibilityCriteria": make_criteria(rng.randint(*eligibility_chars), rng)},
+        }
+    }
+
+
+def make_studies(nct_ids, seed=0, **kwargs):
+    rng = random.Random(seed)
+    return {nct_id: make_study(nct_id, rng, **kwargs) for nct_id in nct_ids}
+
+
+def make_answer(study, rng, structured=True):
+    """study 의 eligibility 일부를 인용하는 GPT 응답 (JSON 또는 번호 형식)."""
+    criteria = study["protocolSection"]["eligibilityModule"]["eligibilityCriteria"]
+    start = rng.randrange(0, max(1, len(criteria) - 200))
+    reason = criteria[start:start + rng.randint(40, 200)]
+    answer = {
+        "test": rng.choice(TEST_VALUES),
+        "reason": reason,
+        "explanation": " ".join(rng.choice(WORDS) for _ in range(30)),
+        "genes": rng.sample(["EGFR", "KRAS", "ALK", "MET", "ROS1"], 2),
+        "confidence": rng.choice(("certain", "uncertain")),
+    }
+    if structured:
+        return json.dumps(answer)
+    return (
+        f"1. test: {answer['test']}\n2. reason: {answer['reason']}\n3. explanations: {answer['explanation']}\n"
+        f"4. genes: {', '.join(answer['genes'])}\n5. Confidence Score: {answer['confidence']}"
+    )
+
+
+def make_input_frame(nct_ids, extra_cols=5, seed=0):
+    # 업로드 CSV 와 비슷한 입력 (NCT Number + 기타 컬럼)
+    rng = random.Random(seed)
+    data = {"NCT Number": nct_ids}
+    for c in range(extra_cols):
+        data[f"col{c}"] = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8))) for _ in nct_ids]
+    return pd.DataFrame(data)
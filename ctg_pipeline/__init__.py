@@ -0,0 +1,46 @@
+"""Streamlit 앱에서 분리한 임상시험 데이터 처리 파이프라인."""
+
+from .batch import process_frame
+from .cache import ResultCache
+from .checkpoint import Checkpoint, make_run_id
+from .classify import CompletionResult, RateLimiter, classify_all, classify_all_async
+from .fetch import (
+    fetch_studies,
+    fetch_studies_async,
+    fetch_studies_batched,
+    fetch_studies_batched_async,
+    fetch_studies_cached,
+    fetch_studies_cached_async,
+)
+from .jobs import JobManager, JobStore
+from .metrics import RunMetrics
+from .pipeline import PipelineOptions, apply_records, iter_trial_results
+from .records import RESULT_COLUMNS, TrialResult
+from .report import render_record_html, write_report_zip
+
+__all__ = [
+    "RESULT_COLUMNS",
+    "Checkpoint",
+    "CompletionResult",
+    "JobManager",
+    "JobStore",
+    "PipelineOptions",
+    "RateLimiter",
+    "ResultCache",
+    "RunMetrics",
+    "TrialResult",
+    "apply_records",
+    "classify_all",
+    "classify_all_async",
+    "fetch_studies",
+    "fetch_studies_async",
+    "fetch_studies_batched",
+    "fetch_studies_batched_async",
+    "fetch_studies_cached",
+    "fetch_studies_cached_async",
+    "iter_trial_results",
+    "make_run_id",
+    "process_frame",
+    "render_record_html",
+    "write_report_zip",
+]
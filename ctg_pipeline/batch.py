@@ -0,0 +1,168 @@
+import json
+import os
+
+from .checkpoint import Checkpoint, make_run_id
+from .export import PART_SUFFIX, StreamingExcel
+from .metrics import RunMetrics
+from .pipeline import PipelineOptions, apply_records, iter_trial_results
+from .records import RESULT_COLUMNS, ResultWriter, TrialResult, read_results
+from .report import write_report_zip
+from .rules import estimate_time_saved
+
+# 출력 폴더 안의 파일 이름 (작업 폴더와 CLI 출력 폴더가 같은 구성을 쓴다)
+RESULTS_NAME = "results"            # results-<run id>.jsonl (행 단위 레코드, 처리 중 계속 추가)
+RESULTS_PARQUET = "results.parquet"  # 완료 후 결과 (컬럼 단위 저장, 완료되면 jsonl 대신 사용)
+EXCEL_FILE = "updated_ctg_studies.xlsx"
+CSV_FILE = "updated_ctg_studies.csv"
+ZIP_FILE = "html_files.zip"
+REPORT_FILE = "run_report.json"     # 단계별 소요 시간 / 카운터 (RunMetrics.summary)
+
+OUTPUT_FORMATS = ("excel", "zip", "csv")
+DEFAULT_FORMATS = ("excel", "zip")
+
+
+def write_report(output_dir, metrics):
+    report = metrics.summary()
+    with open(os.path.join(output_dir, REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def checkpoint_name(run_id):
+    """체크포인트 파일 이름. 입력/옵션이 다른 실행이 같은 폴더를 써도 섞이지 않도록 run id 를 붙인다."""
+    return f"{RESULTS_NAME}-{run_id}"
+
+
+def write_csv(chunks, results_path, target):
+    """입력 chunk 마다 결과 컬럼을 붙여 CSV 에 이어 쓴다."""
+    results = read_results(results_path, ["row", *RESULT_COLUMNS]).to_pandas()
+    start = 0
+    with open(target + PART_SUFFIX, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            apply_records(chunk, results, start).to_csv(f, index=False, header=start == 0)
+            start += len(chunk)
+    os.replace(target + PART_SUFFIX, target)
+
+
+def process_frame(
+    df,
+    output_dir,
+    client,
+    cache,
+    options=None,
+    formats=DEFAULT_FORMATS,
+    baseline=None,         # 증분 처리: {NCT ID: 이전 TrialResult}
+    metrics=None,
+    stats=None,            # 실행 통계를 채울 dict (prompt 토큰, 증분/규칙, 캐시, metrics)
+    on_progress=None,      # (완료 행 수) -> False 를 돌려주면 중단
+    cancelled=None,        # () -> True 면 중단 (처리 중인 chunk 의 GPT 요청도 멈춘다)
+    input_chunks=None,     # () -> 입력 전체 컬럼의 DataFrame chunk iterator (Excel / CSV 용)
+    run_id=None            # 체크포인트 키 (없으면 make_run_id(NCT 목록, 옵션))
+):
+    """df 의 "NCT Number" 를 조회 -> 분류 -> 내보내기까지 처리해 output_dir 에 쓴다.
+
+    results.parquet 와 run_report.json 은 항상, Excel / HTML ZIP / CSV 는 formats 에
+    따라 쓴다. 같은 입력 + 옵션으로 같은 폴더에서 다시 실행하면 체크포인트의 완료된
+    행은 건너뛴다 (행 번호의 NCT ID 가 다른 레코드는 버린다).
+    input_chunks 를 주면 df 에는 "NCT Number" 만 있으면 되고, 나머지 입력 컬럼은
+    내보낼 때 chunk 단위로 다시 읽는다.
+    on_progress / cancelled 로 중단되면 None, 끝나면 stats 를 돌려준다.
+    """
+    unknown = set(formats) - set(OUTPUT_FORMATS)
+    if unknown:
+        raise ValueError(f"unknown output formats: {', '.join(sorted(unknown))}")
+    os.makedirs(output_dir, exist_ok=True)
+    options = options or PipelineOptions()
+    metrics = metrics if metrics is not None else RunMetrics()
+    stats = stats if stats is not None else {}
+    nct_list = df["NCT Number"].tolist()
+    if input_chunks is None:
+        input_chunks = lambda: iter([df])
+
+    if run_id is None:
+        run_id = make_run_id(nct_list, options.to_dict())
+    checkpoint = Checkpoint(checkpoint_name(run_id), output_dir)
+    zip_path = os.path.join(output_dir, ZIP_FILE)
+    export = None
+    writer = None
+    try:
+        # Excel / Parquet 은 매번 처음부터 스트리밍으로 쓴다 (이전 실행분은 체크포인트에서)
+        if "excel" in formats:
+            export = StreamingExcel(input_chunks(), os.path.join(output_dir, EXCEL_FILE))
+        writer = ResultWriter(os.path.join(output_dir, RESULTS_PARQUET))
+        done_rows = set()
+        for data in checkpoint.load():
+            record = TrialResult.from_dict(data)
+            if not 0 <= record.row < len(nct_list) or record.nct_id != str(nct_list[record.row]):
+                continue
+            done_rows.add(record.row)
+            if export is not None:
+                export.add(record)
+            writer.add(record)
+        done = len(done_rows)
+        metrics.incr("rows.resumed", done)
+
+        stopped = False
+        for record in iter_trial_results(
+            nct_list,
+            client,
+            cache,
+            options,
+            done_rows=done_rows,
+            stats=stats,
+            metrics=metrics,
+            baseline=baseline,
+            cancelled=cancelled
+        ):
+            checkpoint.append(record.to_dict())
+            with metrics.timer("export_row"):
+                if export is not None:
+                    export.add(record)
+                writer.add(record)
+            done += 1
+            if on_progress is not None and on_progress(done) is False:
+                stopped = True
+                break
+        # cancelled 로 iter_trial_results 가 먼저 끝났을 수도 있다
+        if stopped or (cancelled is not None and cancelled()):
+            for partial in (export, writer):
+                if partial is not None:
+                    partial.abort()
+            return None
+        checkpoint.close()
+
+        with metrics.timer("export_finish"):
+            if export is not None:
+                export.finish()
+            writer.finish()
+        export = writer = None
+
+        parquet_path = os.path.join(output_dir, RESULTS_PARQUET)
+        if "zip" in formats:
+            # HTML 은 처리 루프에서 만들지 않고, 끝난 뒤 Parquet 에서 병렬로 렌더링
+            with metrics.timer("export_zip"):
+                write_report_zip(parquet_path, zip_path + PART_SUFFIX)
+            os.replace(zip_path + PART_SUFFIX, zip_path)
+        if "csv" in formats:
+            with metrics.timer("export_csv"):
+                write_csv(input_chunks(), parquet_path, os.path.join(output_dir, CSV_FILE))
+        # 결과는 Parquet 에 모두 있으므로 체크포인트는 지운다
+        checkpoint.clear()
+    except Exception:
+        for partial in (export, writer):
+            if partial is not None:
+                partial.abort()
+        if os.path.exists(zip_path + PART_SUFFIX):
+            os.remove(zip_path + PART_SUFFIX)
+        raise
+    finally:
+        checkpoint.close()
+
+    if cache is not None:
+        stats["cache"] = cache.stats()
+    stats["metrics"] = write_report(output_dir, metrics)
+    if "rules" in stats:
+        stats["rules"]["seconds_saved"] = estimate_time_saved(
+            stats["rules"]["hits"], stats["metrics"], options.gpt_workers
+        )
+    return stats
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# ========== 로컬 캐시 설정 ========== #
+DEFAULT_CACHE_DIR = os.getenv("CTG_CACHE_DIR", ".cache")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600          # 7일
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024        # 512MB
+DEFAULT_LEASE_SECONDS = 10 * 60              # 요청 선점 유효 시간 (프로세스가 죽어도 풀리도록)
+SIZE_RESCAN_SECONDS = 60                     # 다른 프로세스의 쓰기를 반영하도록 전체 크기를 다시 합산하는 주기
+
+STUDY_NAMESPACE = "study"
+COMPLETION_NAMESPACE = "completion"
+
+
+def study_key(nct_id, last_update):
+    return f"{nct_id}@{last_update}"
+
+
+def completion_key(model, messages):
+    # 모델 + 프롬프트 전체(= str(study_data) 포함) 해시
+    raw = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """study JSON 과 GPT 응답을 담는 SQLite 캐시 (TTL + 용량 기준 LRU 삭제)."""
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_bytes=DEFAULT_MAX_BYTES
+    ):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "ctg_cache.sqlite3")
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.owner = f"{os.getpid()}:{id(self)}"   # 선점(claim) 주인 표시
+        self.hits = Counter()
+        self.misses = Counter()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        # 같은 캐시를 쓰는 작업들이 지금 요청 중인 키 (같은 요청을 동시에 두 번 보내지 않도록)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inflight ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " owner TEXT NOT NULL,"
+            " expires REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+        self._total_bytes = 0     # entries 의 size 합계 (set / 삭제 때 갱신)
+        self._scanned_at = 0.0
+        self._scan_total()
+        self.purge_expired()
+
+    # ---------------- 기본 get / set ---------------- #
+    def get(self, namespace, key, count=True):
+        """저장된 값 (없거나 만료되면 None). count=False 면 hit/miss 통계에 넣지 않는다."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, created FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                if count:
+                    self.misses[namespace] += 1
+                return None
+            value, size, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                )
+                self._conn.commit()
+                self._total_bytes -= size
+                if count:
+                    self.misses[namespace] += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+            self._conn.commit()
+        if count:
+            self.hits[namespace] += 1
+        return json.loads(value)
+
+    def set(self, namespace, key, value):
+        raw = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute(
+                "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, raw, len(raw), now, now)
+            )
+            self._total_bytes += len(raw) - (replaced[0] if replaced else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _scan_total(self):
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._scanned_at = time.time()
+
+    def _evict(self):
+        # 최대 용량을 넘으면 가장 오래 안 쓴 항목부터 삭제.
+        # 평소에는 누계만 보고, 넘었을 때 (또는 주기적으로) 실제 합계를 다시 확인한다
+        # (같은 DB 를 쓰는 다른 프로세스의 쓰기 / 삭제는 누계에 없음)
+        if not self.max_bytes:
+            return
+        if self._total_bytes > self.max_bytes or time.time() - self._scanned_at > SIZE_RESCAN_SECONDS:
+            self._scan_total()
+        if self._total_bytes <= self.max_bytes:
+            return
+        excess = self._total_bytes - self.max_bytes
+        rows = self._conn.execute(
+            "SELECT namespace, key, size FROM entries ORDER BY accessed ASC"
+        )
+        doomed = []
+        for namespace, key, size in rows:
+            doomed.append((namespace, key))
+            excess -= size
+            self._total_bytes -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+
+    def purge_expired(self):
+        if not self.ttl_seconds:
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM entries WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            self._scan_total()
+
+    # ---------------- 요청 선점 (작업 간 중복 요청 방지) ---------------- #
+    def claim(self, namespace, keys, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """keys 중 다른 주인이 선점하지 않은 키를 선점하고, 선점한 키 집합을 반환.
+
+        만료된 선점은 가져온다. 결과를 set 한 뒤 release 로 풀어 준다.
+        오래 걸리는 작업은 renew 로 만료 시각을 늦춘다 (coalesce.hold_claims).
+        """
+        now = time.time()
+        claimed = set()
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                cursor = self._conn.execute(
+                    "INSERT INTO inflight (namespace, key, owner, expires) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (namespace, key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires"
+                    " WHERE inflight.expires < ? OR inflight.owner = excluded.owner",
+                    (namespace, key, self.owner, now + lease_seconds, now)
+                )
+                if cursor.rowcount:
+                    claimed.add(key)
+            self._conn.commit()
+        return claimed
+
+    def renew(self, namespace, keys, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """내가 선점한 keys 의 만료 시각을 지금부터 lease_seconds 뒤로."""
+        expires = time.time() + lease_seconds
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE inflight SET expires = ? WHERE namespace = ? AND key = ? AND owner = ?",
+                [(expires, namespace, key, self.owner) for key in keys]
+            )
+            self._conn.commit()
+
+    def release(self, namespace, keys):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM inflight WHERE namespace = ? AND key = ? AND owner = ?",
+                [(namespace, key, self.owner) for key in keys]
+            )
+            self._conn.commit()
+
+    def claimed_by_others(self, namespace, keys):
+        """keys 중 다른 주인이 아직 (만료 전) 선점하고 있는 키 집합."""
+        now = time.time()
+        with self._lock:
+            return {
+                key for key in keys
+                if self._conn.execute(
+                    "SELECT 1 FROM inflight WHERE namespace = ? AND key = ? AND owner != ? AND expires >= ?",
+                    (namespace, key, self.owner, now)
+                ).fetchone()
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------- study / completion ---------------- #
+    def get_study(self, nct_id, last_update):
+        return self.get(STUDY_NAMESPACE, study_key(nct_id, last_update))
+
+    def set_study(self, nct_id, last_update, study):
+        self.set(STUDY_NAMESPACE, study_key(nct_id, last_update), study)
+
+    def get_completion(self, model, messages):
+        return self.get(COMPLETION_NAMESPACE, completion_key(model, messages))
+
+    def set_completion(self, model, messages, response_text):
+        self.set(COMPLETION_NAMESPACE, completion_key(model, messages), response_text)
+
+    def stats(self):
+        return {
+            namespace: {"hits": self.hits[namespace], "misses": self.misses[namespace]}
+            for namespace in (STUDY_NAMESPACE, COMPLETION_NAMESPACE)
+        }
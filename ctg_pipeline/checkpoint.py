@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+from .cache import DEFAULT_CACHE_DIR
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(DEFAULT_CACHE_DIR, "checkpoints")
+
+
+def make_run_id(nct_list, options=None):
+    # 같은 NCT 목록 + 같은 옵션이면 같은 run id -> 중단된 작업을 이어서 처리
+    raw = json.dumps(
+        {"nct_list": [str(x) for x in nct_list], "options": options or {}},
+        sort_keys=True
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class Checkpoint:
+    """행 단위 결과 레코드를 JSONL 로 append 하는 체크포인트 파일."""
+
+    def __init__(self, run_id, directory=DEFAULT_CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.run_id = run_id
+        self.path = os.path.join(directory, f"{run_id}.jsonl")
+        self._fh = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, repair=True):
+        """저장된 레코드 목록. 중간에 끊긴 마지막 줄은 버린다.
+
+        repair=False 면 파일을 건드리지 않는다 (다른 프로세스가 쓰는 중일 때).
+        """
+        if not self.exists():
+            return []
+        records = []
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+        # 깨진 꼬리를 잘라내야 이어 쓴 레코드가 다음 load 에서 살아남는다
+        if repair and valid_bytes != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        return records
+
+    def append(self, record):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def clear(self):
+        self.close()
+        if self.exists():
+            os.remove(self.path)
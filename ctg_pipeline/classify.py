@@ -0,0 +1,319 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+
+import openai
+
+from .cache import COMPLETION_NAMESPACE, completion_key
+from .coalesce import group_positions, hold_claims, wait_for_results
+from .concurrency import backoff_seconds, retry_after_seconds, run_bounded
+from .metrics import maybe_timer
+from .prompt import estimate_tokens as estimate_text_tokens
+
+# ========== GPT 분류 설정 ========== #
+DEFAULT_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are a helpful assistant that analyzes clinical trial descriptions."
+DEFAULT_WORKERS = 4
+DEFAULT_RPM = 500             # requests per minute
+DEFAULT_TPM = 200_000         # tokens per minute
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_FORMAT_RETRIES = 2    # 형식이 맞지 않는 응답을 다시 요청하는 최대 횟수
+COMPLETION_TOKEN_ALLOWANCE = 500   # 응답 토큰 예상치 (TPM 예산 계산용)
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+CANCELLED_ERROR = "cancelled"   # 취소로 보내지 않은 요청의 CompletionResult.error
+
+
+def build_messages(question):
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": question
+        }
+    ]
+
+
+def estimate_tokens(messages):
+    return sum(estimate_text_tokens(m.get("content") or "") for m in messages) + 4 * len(messages)
+
+
+@dataclass
+class CompletionResult:
+    text: str = None
+    error: str = None          # 실패 사유 (성공 시 None)
+    attempts: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False
+
+
+class RateLimiter:
+    """RPM / TPM 두 개의 토큰 버킷. 429 를 받으면 pause() 로 전체 워커를 멈춘다."""
+
+    def __init__(self, requests_per_minute=DEFAULT_RPM, tokens_per_minute=DEFAULT_TPM):
+        self.rpm = max(1, int(requests_per_minute))
+        self.tpm = max(1, int(tokens_per_minute))
+        self._lock = threading.Lock()
+        self._request_allowance = float(self.rpm)
+        self._token_allowance = float(self.tpm)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self._last
+        self._last = now
+        self._request_allowance = min(self.rpm, self._request_allowance + elapsed * self.rpm / 60.0)
+        self._token_allowance = min(self.tpm, self._token_allowance + elapsed * self.tpm / 60.0)
+
+    def acquire(self, tokens):
+        # 한 요청이 TPM 보다 크면 영원히 못 들어가므로 상한을 둔다
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._request_allowance >= 1 and self._token_allowance >= tokens:
+                    self._request_allowance -= 1
+                    self._token_allowance -= tokens
+                    return
+                wait = max(
+                    self._blocked_until - now,
+                    (1 - self._request_allowance) * 60.0 / self.rpm,
+                    (tokens - self._token_allowance) * 60.0 / self.tpm,
+                    0.01
+                )
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def _retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    return retry_after_seconds(response.headers)
+
+
+def _describe_error(error):
+    # (재시도 여부, 실패 사유)
+    if isinstance(error, openai.RateLimitError):
+        return True, "rate limited (HTTP 429)"
+    if isinstance(error, openai.APITimeoutError):
+        return True, "request timed out"
+    if isinstance(error, openai.APIConnectionError):
+        return True, f"connection error: {error}"
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        return status >= 500 or status in (408, 409), f"HTTP {status}: {error.message}"
+    return False, f"{type(error).__name__}: {error}"
+
+
+def _error_counter(error):
+    # metrics 카운터 이름: HTTP 상태가 있으면 상태 코드, 없으면 오류 종류
+    if isinstance(error, openai.APIStatusError):
+        return f"openai.http.{error.status_code}"
+    if isinstance(error, openai.APITimeoutError):
+        return "openai.error.timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "openai.error.connection"
+    return "openai.error.other"
+
+
+def request_completion(
+    client,
+    messages,
+    limiter,
+    model=DEFAULT_MODEL,
+    max_retries=DEFAULT_MAX_RETRIES,
+    metrics=None,            # RunMetrics (요청 시간, 상태 코드, 재시도, 토큰 사용량)
+    response_format=None,    # 예: {"type": "json_object"}
+    validate=None,           # 응답 텍스트 -> 형식 오류 사유 (정상이면 None)
+    max_format_retries=DEFAULT_FORMAT_RETRIES,
+    cancelled=None           # () -> True 면 더 보내지 않고 CANCELLED_ERROR 로 끝낸다
+):
+    """재시도(Retry-After 우선, 없으면 지수 백오프) 포함 단일 completion 요청.
+
+    validate 를 주면 형식이 맞지 않는 응답은 max_format_retries 번까지 바로 다시 요청하고,
+    끝까지 맞지 않으면 마지막 응답 텍스트와 함께 오류로 돌려준다.
+    cancelled 는 시도마다 rate limit 대기 전후로 확인한다.
+    """
+    estimated = estimate_tokens(messages) + COMPLETION_TOKEN_ALLOWANCE
+    request_kwargs = {"response_format": response_format} if response_format else {}
+    error_reason = None
+    last_text = None
+    format_retries = 0
+    for attempt in range(max_retries + 1):
+        if cancelled is not None and cancelled():
+            return CompletionResult(error=CANCELLED_ERROR, attempts=attempt)
+        if attempt and metrics is not None:
+            metrics.incr("openai.retries")
+        with maybe_timer(metrics, "openai_wait"):
+            limiter.acquire(estimated)
+        if cancelled is not None and cancelled():
+            return CompletionResult(error=CANCELLED_ERROR, attempts=attempt)
+        try:
+            with maybe_timer(metrics, "openai_request"):
+                response = client.chat.completions.create(model=model, messages=messages, **request_kwargs)
+        except Exception as e:
+            if metrics is not None:
+                metrics.incr(_error_counter(e))
+            retryable, error_reason = _describe_error(e)
+            if not retryable or attempt == max_retries:
+                return CompletionResult(error=error_reason, attempts=attempt + 1)
+
+            delay = _retry_after_seconds(e)
+            if delay is None:
+                delay = backoff_seconds(attempt, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS)
+            if isinstance(e, openai.RateLimitError):
+                limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            continue
+
+        text = response.choices[0].message.content if response.choices else None
+        usage = getattr(response, "usage", None)
+        result = CompletionResult(
+            text=text,
+            error=None if text else "empty response",
+            attempts=attempt + 1,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+        )
+        if metrics is not None:
+            metrics.incr("openai.http.200")
+            metrics.incr("openai.tokens.prompt", result.prompt_tokens)
+            metrics.incr("openai.tokens.completion", result.completion_tokens)
+        problem = validate(text) if validate is not None and text else None
+        if problem:
+            if metrics is not None:
+                metrics.incr("openai.malformed")
+            error_reason = f"malformed response: {problem}"
+            last_text = text
+            if format_retries < max_format_retries and attempt < max_retries:
+                format_retries += 1
+                continue
+            result.error = error_reason
+        return result
+    return CompletionResult(text=last_text, error=error_reason, attempts=max_retries + 1)
+
+
+async def classify_all_async(
+    message_list,            # [messages 또는 None, ...]
+    client,
+    cache=None,
+    model=DEFAULT_MODEL,
+    workers=DEFAULT_WORKERS,
+    requests_per_minute=DEFAULT_RPM,
+    tokens_per_minute=DEFAULT_TPM,
+    max_retries=DEFAULT_MAX_RETRIES,
+    progress_callback=None,  # (완료 수, 전체 수) -> None
+    metrics=None,
+    response_format=None,
+    validate=None,           # 형식 검사 (request_completion). 캐시된 응답에도 적용
+    limiter=None,            # 실행 전체가 함께 쓰는 RateLimiter (없으면 이 호출 안에서만)
+    cancelled=None           # () -> True 면 남은 요청을 보내지 않는다 (request_completion)
+):
+    """message_list 순서대로 CompletionResult(또는 None) 리스트를 반환.
+
+    같은 프롬프트는 한 번만 요청해 결과를 나눠 주고, 같은 캐시를 쓰는 다른 작업이
+    요청 중인 프롬프트는 그 응답이 캐시에 들어올 때까지 기다린다.
+    cancelled 로 중단되면 보내지 못한 프롬프트는 CANCELLED_ERROR 결과가 된다.
+    """
+    total = len(message_list)
+    results = [None] * total
+    pending = []
+    for i, messages in enumerate(message_list):
+        if messages is None:
+            continue
+        cached_text = cache.get_completion(model, messages) if cache is not None else None
+        if cached_text is not None and (validate is None or validate(cached_text) is None):
+            results[i] = CompletionResult(text=cached_text, cached=True)
+        else:
+            pending.append(i)
+
+    if metrics is not None and cache is not None:
+        metrics.incr("cache.completion.hit", sum(1 for r in results if r is not None))
+        metrics.incr("cache.completion.miss", len(pending))
+
+    # {프롬프트 키: [행 번호, ...]}
+    groups = {
+        key: [pending[j] for j in positions]
+        for key, positions in group_positions([completion_key(model, message_list[i]) for i in pending]).items()
+    }
+    if metrics is not None:
+        metrics.incr("coalesce.completion.duplicate", len(pending) - len(groups))
+
+    done = total - len(pending)
+    if progress_callback and done:
+        progress_callback(done, total)
+
+    # SDK 내부 재시도는 끄고 여기서 관리
+    client = client.with_options(max_retries=0)
+    if limiter is None:
+        limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    def on_key_done(key):
+        nonlocal done
+        done += len(groups[key])
+        if progress_callback:
+            progress_callback(done, total)
+
+    async def request_keys(keys):
+        if not keys:
+            return
+        completed = await run_bounded(
+            request_completion,
+            [
+                (
+                    client, message_list[groups[key][0]], limiter, model, max_retries, metrics,
+                    response_format, validate, DEFAULT_FORMAT_RETRIES, cancelled
+                )
+                for key in keys
+            ],
+            max(1, int(workers)),
+            lambda j: on_key_done(keys[j])
+        )
+        for key, result in zip(keys, completed):
+            for i in groups[key]:
+                results[i] = result
+            # 형식 오류로 끝난 응답은 캐시하지 않는다 (다음 실행에서 다시 요청)
+            if cache is not None and result.text and not result.error:
+                cache.set_completion(model, message_list[groups[key][0]], result.text)
+
+    if cache is None:
+        await request_keys(list(groups))
+        return results
+
+    async with hold_claims(cache, COMPLETION_NAMESPACE, groups) as claimed:
+        await request_keys([key for key in groups if key in claimed])
+    shared = [key for key in groups if key not in claimed]
+    if shared and cancelled is not None and cancelled():
+        for key in shared:
+            for i in groups[key]:
+                results[i] = CompletionResult(error=CANCELLED_ERROR)
+        return results
+    if shared:
+        landed = await wait_for_results(cache, COMPLETION_NAMESPACE, shared)
+        landed = {
+            key: text for key, text in landed.items() if validate is None or validate(text) is None
+        }
+        for key, text in landed.items():
+            for i in groups[key]:
+                results[i] = CompletionResult(text=text, cached=True)
+            on_key_done(key)
+        if metrics is not None:
+            metrics.incr("coalesce.completion.shared", len(landed))
+        # 다른 작업이 실패한 프롬프트는 직접 요청
+        await request_keys([key for key in shared if key not in landed])
+    return results
+
+
+def classify_all(message_list, client, **kwargs):
+    return asyncio.run(classify_all_async(message_list, client, **kwargs))
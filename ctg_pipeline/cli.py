@@ -0,0 +1,136 @@
+"""Streamlit 없이 CSV 한 개를 처리하는 명령행 진입점.
+
+    python -m ctg_pipeline studies.csv -o out/ [--concurrency 8] [--cache-dir .cache] [--format excel zip csv]
+
+API 키는 --api-key 또는 OPENAI_API_KEY 환경변수. 같은 입력과 옵션으로 같은 출력
+폴더에 다시 실행하면 체크포인트에서 이어서 처리한다.
+"""
+import argparse
+import os
+import sys
+import time
+
+from openai import OpenAI
+
+from .batch import DEFAULT_FORMATS, OUTPUT_FORMATS, process_frame, write_report
+from .cache import DEFAULT_CACHE_DIR, ResultCache
+from .classify import DEFAULT_MODEL, DEFAULT_RPM, DEFAULT_TPM, DEFAULT_WORKERS
+from .fetch import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY
+from .incremental import baseline_columns, baseline_from_frame, index_baseline
+from .ingest import NCT_COLUMN, iter_chunks, read_columns, read_header
+from .metrics import RunMetrics
+from .pipeline import DEFAULT_CHUNK_SIZE, PipelineOptions
+from .prompt import DEFAULT_TOKEN_BUDGET
+from .records import read_records
+
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m ctg_pipeline", description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="'NCT Number' 컬럼이 있는 CSV (또는 XLSX)")
+    parser.add_argument("-o", "--output-dir", default="ctg_output")
+    parser.add_argument("--format", nargs="+", choices=OUTPUT_FORMATS, default=list(DEFAULT_FORMATS),
+                        help="results.parquet 와 run_report.json 외에 쓸 출력")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--api-key", default=os.getenv("OPENAI_API_KEY"))
+    parser.add_argument("--baseline", help="증분 처리 기준: 이전 results.parquet 또는 'Download Updated Data' Excel")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="ClinicalTrials.gov 동시 요청 수")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--gpt-workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM)
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM)
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--full-prompt", action="store_true", help="간결한 프롬프트 대신 study JSON 전체 전송")
+    parser.add_argument("--fuzzy-highlight", action="store_true")
+    parser.add_argument("--rules", action="store_true", help="규칙 기반 사전 분류 켜기 (제목에 치료 단계가 분명하면 GPT 생략)")
+    parser.add_argument("--text-output", action="store_true", help="JSON 대신 번호 형식 응답 사용")
+    return parser
+
+
+def options_from_args(args):
+    return PipelineOptions(
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        model=args.model,
+        gpt_workers=args.gpt_workers,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        compact_prompt=not args.full_prompt,
+        token_budget=args.token_budget,
+        chunk_size=args.chunk_size,
+        fuzzy_highlight=args.fuzzy_highlight,
+        rule_classifier=args.rules,
+        structured_output=not args.text_output
+    )
+
+
+def load_baseline(path):
+    if os.path.splitext(path)[-1].lower() == ".parquet":
+        return index_baseline(read_records(path))
+    columns = baseline_columns(read_header(path, path))
+    return index_baseline(baseline_from_frame(read_columns(path, path, columns)))
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.api_key:
+        print("OpenAI API 키가 없습니다 (--api-key 또는 OPENAI_API_KEY).", file=sys.stderr)
+        return 2
+
+    if NCT_COLUMN not in read_header(args.input, args.input):
+        print(f"{args.input}: '{NCT_COLUMN}' 컬럼이 없습니다.", file=sys.stderr)
+        return 2
+    # 처리에는 NCT Number 만 읽고, 나머지 입력 컬럼은 내보낼 때 chunk 단위로
+    df = read_columns(args.input, args.input, [NCT_COLUMN])
+    options = options_from_args(args)
+    baseline = load_baseline(args.baseline) if args.baseline else None
+
+    total = len(df)
+    last_print = 0.0
+
+    def on_progress(done):
+        nonlocal last_print
+        now = time.monotonic()
+        if now - last_print >= PROGRESS_INTERVAL_SECONDS or done == total:
+            last_print = now
+            print(f"{done}/{total}", file=sys.stderr)
+
+    metrics = RunMetrics()
+    cache = ResultCache(cache_dir=args.cache_dir)
+    try:
+        stats = process_frame(
+            df,
+            args.output_dir,
+            OpenAI(api_key=args.api_key),
+            cache,
+            options,
+            formats=args.format,
+            baseline=baseline,
+            metrics=metrics,
+            on_progress=on_progress,
+            input_chunks=lambda: iter_chunks(args.input, args.input)
+        )
+    except Exception:
+        write_report(args.output_dir, metrics)
+        raise
+    finally:
+        cache.close()
+
+    report = stats["metrics"]
+    print(f"done: {total} rows in {report['elapsed']:.1f}s -> {args.output_dir}", file=sys.stderr)
+    if stats.get("duplicate_rows"):
+        print(f"duplicates: {stats['duplicate_rows']} rows reused another row's result", file=sys.stderr)
+    rules = stats.get("rules")
+    if rules and rules["checked"]:
+        print(
+            f"rules: {rules['hits']}/{rules['checked']} skipped GPT (~{rules['seconds_saved']:.0f}s saved)",
+            file=sys.stderr
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import asyncio
+import contextlib
+
+from .cache import DEFAULT_LEASE_SECONDS
+
+# ========== 중복 요청 합치기 ========== #
+# 한 실행 안에서는 같은 키를 한 번만 요청하고 결과를 모든 위치에 나눠 준다.
+# 같은 캐시(SQLite)를 쓰는 다른 작업이 이미 요청 중인 키는 다시 보내지 않고,
+# 그 작업이 캐시에 결과를 쓰고 선점을 풀 때까지 기다린다 (ResultCache.claim).
+POLL_SECONDS = 0.2
+RENEW_FRACTION = 1 / 3   # 선점 유효 시간의 이 비율마다 연장
+
+
+def group_positions(keys):
+    """{키: [위치, ...]} — 키는 처음 나온 순서대로."""
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    return groups
+
+
+@contextlib.asynccontextmanager
+async def hold_claims(cache, namespace, keys, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """keys 를 선점해 선점한 키 집합을 넘겨 주고, 블록이 끝날 때까지 선점을 연장한다.
+
+    rate limit 대기 등으로 작업이 lease_seconds 보다 길어져도 다른 작업이 같은 요청을
+    다시 보내지 않는다. 블록이 끝나면 (예외여도) 선점을 푼다.
+    """
+    claimed = cache.claim(namespace, keys, lease_seconds)
+
+    async def renew():
+        while True:
+            await asyncio.sleep(lease_seconds * RENEW_FRACTION)
+            cache.renew(namespace, claimed, lease_seconds)
+
+    heartbeat = asyncio.create_task(renew()) if claimed else None
+    try:
+        yield claimed
+    finally:
+        if heartbeat is not None:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
+        cache.release(namespace, claimed)
+
+
+async def wait_for_results(cache, namespace, keys, poll=POLL_SECONDS):
+    """다른 작업이 선점한 keys 의 결과를 기다려 {키: 값} 으로.
+
+    선점이 풀렸는데 (실패 등으로) 캐시에 값이 없거나, 선점이 만료된 키는 빠진다.
+    """
+    waiting = set(keys)
+    results = {}
+    while waiting:
+        released = waiting - cache.claimed_by_others(namespace, waiting)
+        for key in released:
+            # 다른 작업이 받아 둔 결과 — 이 실행의 캐시 hit/miss 로 세지 않는다
+            value = cache.get(namespace, key, count=False)
+            if value is not None:
+                results[key] = value
+        waiting -= released
+        if waiting:
+            await asyncio.sleep(poll)
+    return results
@@ -0,0 +1,56 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+
+def retry_after_seconds(headers):
+    """Retry-After(-ms) 헤더를 초 단위로. 없거나 읽을 수 없으면 None."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(attempt, base, cap):
+    """지수 백오프 (jitter 포함)."""
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+
+async def run_bounded(func, args_list, concurrency, on_done=None):
+    """스레드 풀 위에서 func(*args) 를 동시에 최대 concurrency 개만 실행.
+
+    결과는 args_list 순서대로 반환하고, 하나 끝날 때마다 on_done(index) 호출.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    results = [None] * len(args_list)
+
+    async def run(i, args):
+        async with semaphore:
+            results[i] = await loop.run_in_executor(executor, func, *args)
+        return i
+
+    try:
+        for fut in asyncio.as_completed([run(i, args) for i, args in enumerate(args_list)]):
+            i = await fut
+            if on_done:
+                on_done(i)
+    finally:
+        executor.shutdown(wait=False)
+    return results
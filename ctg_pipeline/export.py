@@ -0,0 +1,126 @@
+import io
+import os
+import zipfile
+
+import pandas as pd
+import xlsxwriter
+
+from .records import RESULT_COLUMNS
+
+PART_SUFFIX = ".part"
+
+
+def write_excel(df, target):
+    # target: 파일 경로 또는 file-like
+    with pd.ExcelWriter(target, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name="Sheet1")
+
+def write_html_zip(html_dict, target):
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for fname, html_str in html_dict.items():
+            if html_str is None:
+                continue
+            zf.writestr(fname, html_str)
+
+def read_excel_bytes(df):
+    output = io.BytesIO()
+    write_excel(df, output)
+    return output.getvalue()
+
+def zip_html_files(html_dict):
+    output = io.BytesIO()
+    write_html_zip(html_dict, output)
+    return output.getvalue()
+
+def _cell_value(value):
+    # pandas 가 쓰는 값과 맞춘다: 결측치는 빈 칸, numpy 스칼라는 파이썬 값
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value.item() if hasattr(value, "item") else value
+
+
+class StreamingExcel:
+    """결과 레코드(TrialResult)가 나올 때마다 Excel 행을 디스크에 바로 쓴다.
+
+    constant_memory 모드라 행 번호 순서대로만 쓸 수 있으므로, 앞 행이 아직
+    없으면 그 뒤 레코드는 잠시 보관했다가 순서가 맞을 때 쓴다. 결과는
+    write_excel(apply_records(df, records)) 와 같다.
+    df 대신 같은 컬럼의 DataFrame chunk 들(ingest.iter_chunks)을 주면 입력도
+    행 순서대로 필요한 chunk 만 들고 있는다.
+    완료 전에는 *.part 파일에 쓰고 finish() 에서 최종 이름으로 바꾼다.
+    """
+
+    def __init__(self, df, excel_path, sheet_name="Sheet1"):
+        self.excel_path = excel_path
+        self._chunks = iter([df]) if isinstance(df, pd.DataFrame) else iter(df)
+        first = next(self._chunks, None)
+        if first is None:
+            first = pd.DataFrame()
+
+        input_columns = list(first.columns)
+        self.columns = input_columns + [c for c in RESULT_COLUMNS if c not in input_columns]
+        self._input_columns = [col for col in input_columns if col not in RESULT_COLUMNS]
+        self._chunk_start = 0
+        self._load_chunk(first)
+
+        self._workbook = xlsxwriter.Workbook(excel_path + PART_SUFFIX, {"constant_memory": True})
+        self._sheet = self._workbook.add_worksheet(sheet_name)
+        self._sheet.write_row(0, 0, self.columns)
+
+        self._next_row = 0
+        self._pending = {}    # 앞 행을 기다리는 레코드 (행 번호 -> 레코드)
+
+    def _load_chunk(self, chunk):
+        self._chunk_len = len(chunk)
+        self._input_values = {col: chunk[col].to_numpy(dtype=object) for col in self._input_columns}
+
+    def _has_input_row(self, row):
+        # row 가 들어 있는 chunk 까지 읽는다 (지난 chunk 는 버림). 입력이 끝났으면 False
+        while row >= self._chunk_start + self._chunk_len:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            self._chunk_start += self._chunk_len
+            self._load_chunk(chunk)
+        return True
+
+    def add(self, record):
+        self._pending[record.row] = record
+        while self._next_row in self._pending:
+            self._write_row(self._next_row, self._pending.pop(self._next_row))
+            self._next_row += 1
+
+    def _write_row(self, row, record):
+        self._has_input_row(row)
+        offset = row - self._chunk_start
+        values = []
+        for col in self.columns:
+            if col in RESULT_COLUMNS:
+                values.append(_cell_value(getattr(record, col)) if record else None)
+            else:
+                values.append(_cell_value(self._input_values[col][offset]))
+        for c, value in enumerate(values):
+            # 빈 칸은 쓰지 않는다 (pandas 와 동일)
+            if value is not None and value != "":
+                self._sheet.write(row + 1, c, value)
+
+    def finish(self):
+        # 레코드가 없는 행은 결과 컬럼을 비워 둔 채로 채운다
+        while self._has_input_row(self._next_row):
+            self._write_row(self._next_row, self._pending.pop(self._next_row, None))
+            self._next_row += 1
+        self._workbook.close()
+        os.replace(self.excel_path + PART_SUFFIX, self.excel_path)
+
+    def abort(self):
+        try:
+            self._workbook.close()
+        except Exception:
+            pass
+        if os.path.exists(self.excel_path + PART_SUFFIX):
+            os.remove(self.excel_path + PART_SUFFIX)
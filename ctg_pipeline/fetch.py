@@ -0,0 +1,403 @@
+import asyncio
+import os
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import STUDY_NAMESPACE, study_key
+from .coalesce import hold_claims, wait_for_results
+from .concurrency import backoff_seconds, retry_after_seconds, run_bounded
+from .metrics import maybe_timer
+
+# ========== ClinicalTrials.gov v2 API ========== #
+CTG_API_BASE = os.getenv("CTG_API_BASE", "https://clinicaltrials.gov/api/v2")
+STUDY_FIELDS = (
+    "NCTId,BriefTitle,ConditionsModule,EligibilityModule,OfficialTitle,"
+    "ArmsInterventionsModule,StartDate,PrimaryCompletionDate,CompletionDate,"
+    "LastUpdatePostDate"   # 버전 조회에 실패한 ID 도 받은 study 의 버전으로 캐시하도록
+)
+# 캐시 유효성 확인용 최소 projection
+LAST_UPDATE_FIELDS = "NCTId,LastUpdatePostDate"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 30
+DEFAULT_BATCH_SIZE = 100   # /studies 한 번에 묶을 NCT ID 수 (URL 길이 고려)
+MAX_PAGE_SIZE = 1000       # v2 API pageSize 상한
+DEFAULT_FETCH_RETRIES = 3  # 429 / 5xx / 연결 오류 재시도 횟수
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+NCT_ID_PATTERN = re.compile(r"^NCT\d{8}$")
+
+
+class FetchError(Exception):
+    """재시도 후에도 조회하지 못한 경우. 결과 리스트에는 study 대신 이 객체가 들어간다
+    (None 은 레지스트리에 없는 ID)."""
+
+    def __init__(self, reason):
+        super().__init__(f"fetch failed: {reason}")
+
+
+def study_params(fields=STUDY_FIELDS):
+    return {
+        'format': 'json',
+        'markupFormat': 'markdown',
+        'fields': fields,
+    }
+
+
+def normalize_nct_id(nct_id):
+    return str(nct_id).strip().upper()
+
+
+def study_nct_id(study):
+    return study.get('protocolSection', {}).get('identificationModule', {}).get('nctId')
+
+
+def study_last_update(study):
+    status_module = study.get('protocolSection', {}).get('statusModule', {})
+    return status_module.get('lastUpdatePostDateStruct', {}).get('date')
+
+
+def make_session(pool_size=DEFAULT_CONCURRENCY):
+    # keep-alive 커넥션을 동시 요청 수만큼 재사용
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get(session, url, params, timeout, metrics=None):
+    # 요청 시간과 HTTP 상태 코드를 metrics 에 기록. 연결 오류 등은 그대로 raise
+    try:
+        with maybe_timer(metrics, "ctg_request"):
+            response = session.get(url, params=params, timeout=timeout)
+    except requests.RequestException:
+        if metrics is not None:
+            metrics.incr("ctg.http.error")
+        raise
+    if metrics is not None:
+        metrics.incr(f"ctg.http.{response.status_code}")
+    return response
+
+
+def _get_with_retry(session, url, params, timeout, metrics=None, max_retries=DEFAULT_FETCH_RETRIES):
+    """429 / 5xx / 연결 오류는 Retry-After (없으면 지수 백오프) 만큼 기다렸다가 재시도.
+
+    마지막 응답을 돌려주고, 끝까지 연결 오류면 FetchError.
+    """
+    for attempt in range(max_retries + 1):
+        if attempt and metrics is not None:
+            metrics.incr("ctg.retries")
+        try:
+            response = _get(session, url, params, timeout, metrics)
+        except requests.RequestException as e:
+            if attempt == max_retries:
+                raise FetchError(f"{type(e).__name__}: {e}") from e
+            delay = None
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            delay = retry_after_seconds(response.headers)
+        if delay is None:
+            delay = backoff_seconds(attempt, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS)
+        time.sleep(delay)
+
+
+def fetch_study(session, nct_id, base_url=CTG_API_BASE, timeout=DEFAULT_TIMEOUT, metrics=None, fields=STUDY_FIELDS):
+    """단일 NCT ID 조회. 404 면 None, 재시도 후에도 실패하면 FetchError."""
+    url = f"{base_url}/studies/{nct_id}"
+    try:
+        response = _get_with_retry(session, url, study_params(fields), timeout, metrics)
+    except FetchError as e:
+        return e
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        return FetchError(f"HTTP {response.status_code}")
+    try:
+        return response.json()
+    except ValueError:
+        return FetchError("invalid JSON response")
+
+
+def fetch_study_batch(
+    session,
+    nct_ids,
+    base_url=CTG_API_BASE,
+    timeout=DEFAULT_TIMEOUT,
+    fields=STUDY_FIELDS,
+    metrics=None
+):
+    """여러 NCT ID를 /studies 목록 엔드포인트로 조회 (pageToken 따라감).
+
+    {nct_id: study} 를 반환하며, 응답에 없는 ID는 빠진다. 재시도 후에도 어느
+    페이지든 실패하면 (일부 결과를 돌려주지 않고) FetchError 를 raise.
+    """
+    params = study_params(fields)
+    params['filter.ids'] = ",".join(nct_ids)
+    params['pageSize'] = min(len(nct_ids), MAX_PAGE_SIZE)
+
+    found = {}
+    while True:
+        response = _get_with_retry(session, f"{base_url}/studies", params, timeout, metrics)
+        if response.status_code != 200:
+            raise FetchError(f"HTTP {response.status_code}")
+        try:
+            payload = response.json()
+        except ValueError:
+            raise FetchError("invalid JSON response")
+
+        for study in payload.get('studies', []):
+            found_id = study_nct_id(study)
+            if found_id:
+                found[found_id.upper()] = study
+
+        page_token = payload.get('nextPageToken')
+        if not page_token:
+            break
+        params['pageToken'] = page_token
+    return found
+
+
+def fetch_study_batch_or_each(
+    session,
+    nct_ids,
+    base_url=CTG_API_BASE,
+    timeout=DEFAULT_TIMEOUT,
+    fields=STUDY_FIELDS,
+    metrics=None
+):
+    """fetch_study_batch 가 실패하면 그 배치의 ID 를 하나씩 다시 조회.
+
+    {nct_id: study / None(없음) / FetchError} — 한 번의 오류로 배치 전체를 잃지 않는다.
+    """
+    try:
+        return fetch_study_batch(session, nct_ids, base_url, timeout, fields, metrics)
+    except FetchError:
+        if metrics is not None:
+            metrics.incr("ctg.batch_fallback")
+    return {nct_id: fetch_study(session, nct_id, base_url, timeout, metrics, fields) for nct_id in nct_ids}
+
+
+async def fetch_studies_async(
+    nct_list,
+    concurrency=DEFAULT_CONCURRENCY,
+    base_url=CTG_API_BASE,
+    progress_callback=None,  # (완료 수, 전체 수) -> None
+    timeout=DEFAULT_TIMEOUT,
+    session=None,
+    metrics=None             # RunMetrics (요청 시간, HTTP 상태 코드)
+):
+    """NCT ID 하나당 GET 한 번. nct_list 순서 그대로 study JSON 리스트를 반환.
+
+    레지스트리에 없는 ID 는 None, 재시도 후에도 조회하지 못한 ID 는 FetchError.
+    """
+    total = len(nct_list)
+    if total == 0:
+        return []
+
+    concurrency = max(1, int(concurrency))
+    own_session = session is None
+    if own_session:
+        session = make_session(concurrency)
+
+    done = 0
+
+    def on_done(_):
+        nonlocal done
+        done += 1
+        if progress_callback:
+            progress_callback(done, total)
+
+    try:
+        return await run_bounded(
+            fetch_study,
+            [(session, nct_id, base_url, timeout, metrics) for nct_id in nct_list],
+            concurrency,
+            on_done
+        )
+    finally:
+        if own_session:
+            session.close()
+
+
+async def fetch_studies_batched_async(
+    nct_list,
+    batch_size=DEFAULT_BATCH_SIZE,
+    concurrency=DEFAULT_CONCURRENCY,
+    base_url=CTG_API_BASE,
+    progress_callback=None,  # (완료 수, 전체 수) -> None
+    timeout=DEFAULT_TIMEOUT,
+    session=None,
+    fields=STUDY_FIELDS,
+    metrics=None             # RunMetrics (요청 시간, HTTP 상태 코드)
+):
+    """nct_list 를 batch_size 단위로 묶어 /studies 로 조회.
+
+    반환값은 fetch_studies_async 와 같다. 응답에 없거나 형식이 잘못된 ID는 None.
+    배치 요청이 재시도 후에도 실패하면 그 배치의 ID 만 하나씩 다시 조회한다.
+    """
+    total = len(nct_list)
+    if total == 0:
+        return []
+
+    keys = [normalize_nct_id(nct_id) for nct_id in nct_list]
+    # 잘못된 ID가 섞이면 배치 전체가 400 이 되므로 미리 걸러낸다
+    unique_ids = list(dict.fromkeys(k for k in keys if NCT_ID_PATTERN.match(k)))
+    batch_size = max(1, int(batch_size))
+    batches = [unique_ids[i:i + batch_size] for i in range(0, len(unique_ids), batch_size)]
+
+    concurrency = max(1, int(concurrency))
+    own_session = session is None
+    if own_session:
+        session = make_session(concurrency)
+
+    # 진행률은 입력 행 기준으로 보고
+    rows_per_id = {}
+    for k in keys:
+        rows_per_id[k] = rows_per_id.get(k, 0) + 1
+    done = total - sum(rows_per_id[k] for k in unique_ids)
+    if progress_callback and done:
+        progress_callback(done, total)
+
+    def on_done(i):
+        nonlocal done
+        done += sum(rows_per_id[k] for k in batches[i])
+        if progress_callback:
+            progress_callback(done, total)
+
+    try:
+        batch_results = await run_bounded(
+            fetch_study_batch_or_each,
+            [(session, batch, base_url, timeout, fields, metrics) for batch in batches],
+            concurrency,
+            on_done
+        )
+    finally:
+        if own_session:
+            session.close()
+
+    found = {}
+    for result in batch_results:
+        found.update(result or {})
+    return [found.get(k) for k in keys]
+
+
+async def fetch_last_updates_async(nct_list, **kwargs):
+    """{정규화된 NCT ID: lastUpdatePostDate} — 레지스트리에 없는 ID는 빠지고,
+    조회하지 못한 ID 는 None (fetch_studies_cached 가 캐시 없이 전체 조회를 시도한다)."""
+    kwargs['fields'] = LAST_UPDATE_FIELDS
+    kwargs.pop('progress_callback', None)
+    studies = await fetch_studies_batched_async(nct_list, **kwargs)
+    versions = {}
+    for nct_id, study in zip(nct_list, studies):
+        if isinstance(study, FetchError):
+            versions[normalize_nct_id(nct_id)] = None
+        elif study is not None:
+            versions[normalize_nct_id(nct_id)] = study_last_update(study) or ""
+    return versions
+
+
+async def fetch_studies_cached_async(
+    nct_list,
+    cache,
+    progress_callback=None,
+    versions=None,           # 이미 조회한 {NCT ID: lastUpdatePostDate} (없으면 여기서 조회)
+    **kwargs
+):
+    """lastUpdatePostDate 만 먼저 확인하고, 캐시에 없는 (ID, 버전)만 전체 조회.
+
+    같은 ID 는 한 번만 조회하고, 같은 캐시를 쓰는 다른 작업이 조회 중인 (ID, 버전)은
+    그 결과가 캐시에 들어올 때까지 기다린다.
+    반환값은 fetch_studies_batched_async 와 같다.
+    """
+    total = len(nct_list)
+    if total == 0:
+        return []
+
+    keys = [normalize_nct_id(nct_id) for nct_id in nct_list]
+    if versions is None:
+        versions = await fetch_last_updates_async(nct_list, **kwargs)
+    else:
+        versions = {k: versions[k] for k in keys if k in versions}
+
+    studies = {}
+    to_fetch = []
+    unknown = []   # 버전 조회에 실패한 ID: 캐시를 건너뛰고 전체 조회
+    for nct_id, version in versions.items():
+        if version is None:
+            unknown.append(nct_id)
+            continue
+        cached = cache.get_study(nct_id, version)
+        if cached is not None:
+            studies[nct_id] = cached
+        else:
+            to_fetch.append(nct_id)
+    metrics = kwargs.get('metrics')
+    if metrics is not None:
+        metrics.incr("cache.study.hit", len(studies))
+        metrics.incr("cache.study.miss", len(to_fetch))
+
+    async def fetch_into(ids):
+        if not ids:
+            return
+        offset = total - len(to_fetch)
+        fetched = await fetch_studies_batched_async(
+            ids,
+            progress_callback=(
+                (lambda done, _: progress_callback(offset + done, total)) if progress_callback else None
+            ),
+            **kwargs
+        )
+        for nct_id, study in zip(ids, fetched):
+            if study is None:
+                continue
+            studies[nct_id] = study
+            if isinstance(study, FetchError):
+                continue
+            version = versions[nct_id]
+            if version is None:
+                version = study_last_update(study)
+            # 버전을 알 수 없으면 다시 맞출 수 없는 키가 되므로 캐시하지 않는다
+            if version is not None:
+                cache.set_study(nct_id, version, study)
+
+    if to_fetch:
+        study_keys = {nct_id: study_key(nct_id, versions[nct_id]) for nct_id in to_fetch}
+        async with hold_claims(cache, STUDY_NAMESPACE, study_keys.values()) as claimed:
+            await fetch_into([nct_id for nct_id in to_fetch if study_keys[nct_id] in claimed])
+        shared = [nct_id for nct_id in to_fetch if study_keys[nct_id] not in claimed]
+        if shared:
+            landed = await wait_for_results(cache, STUDY_NAMESPACE, [study_keys[nct_id] for nct_id in shared])
+            for nct_id in shared:
+                if study_keys[nct_id] in landed:
+                    studies[nct_id] = landed[study_keys[nct_id]]
+            if metrics is not None:
+                metrics.incr("coalesce.study.shared", len(landed))
+            # 다른 작업이 실패한 ID 는 직접 조회
+            await fetch_into([nct_id for nct_id in shared if study_keys[nct_id] not in landed])
+    await fetch_into(unknown)
+
+    if progress_callback:
+        progress_callback(total, total)
+    return [studies.get(k) for k in keys]
+
+
+def fetch_studies(nct_list, **kwargs):
+    return asyncio.run(fetch_studies_async(nct_list, **kwargs))
+
+
+def fetch_studies_batched(nct_list, **kwargs):
+    return asyncio.run(fetch_studies_batched_async(nct_list, **kwargs))
+
+
+def fetch_last_updates(nct_list, **kwargs):
+    return asyncio.run(fetch_last_updates_async(nct_list, **kwargs))
+
+
+def fetch_studies_cached(nct_list, cache, **kwargs):
+    return asyncio.run(fetch_studies_cached_async(nct_list, cache, **kwargs))
@@ -0,0 +1,61 @@
+import hashlib
+
+import pandas as pd
+
+from .fetch import normalize_nct_id
+from .records import RESULT_COLUMNS, TrialResult
+
+# 이전 결과와 비교한 행별 처리 방식
+REUSE = "reuse"        # 이전 레코드를 그대로 사용 (조회/분류 모두 생략)
+REBUILD = "rebuild"    # 이전 분류 결과 + 새로 조회한 study 로 레코드 재구성 (분류 생략)
+
+
+def baseline_columns(header):
+    """이전 결과 파일에서 읽을 컬럼 (NCT Number + 결과 컬럼)."""
+    return [col for col in header if col == "NCT Number" or col in RESULT_COLUMNS]
+
+
+def baseline_from_frame(df):
+    """이전 "Download Updated Data" Excel 을 TrialResult 목록으로.
+
+    Excel 에는 HTML 렌더링용 필드가 없으므로 이 레코드들은 REBUILD 대상이 된다.
+    """
+    if "NCT Number" not in df.columns:
+        raise ValueError("이전 결과 파일에 'NCT Number' 컬럼이 없습니다.")
+    columns = [col for col in RESULT_COLUMNS if col in df.columns]
+    values = {col: df[col].to_numpy(dtype=object) for col in columns}
+    records = []
+    for i, nct_id in enumerate(df["NCT Number"].tolist()):
+        fields = {}
+        for col in columns:
+            value = values[col][i]
+            fields[col] = None if pd.isna(value) else str(value)
+        records.append(TrialResult(row=i, nct_id=str(nct_id), **fields))
+    return records
+
+
+def frame_key(df):
+    # 업로드한 이전 결과의 내용 해시 (run key 용)
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def index_baseline(records):
+    """{정규화된 NCT ID: 레코드}. 같은 ID 가 여러 번 나오면 마지막 것."""
+    return {normalize_nct_id(r.nct_id): r for r in records}
+
+
+def match_baseline(baseline, nct_id, versions):
+    """(이전 레코드, 처리 방식). 새로 처리해야 하면 (None, None).
+
+    lastUpdatePostDate 가 이전 처리 때와 같고 GPT 오류가 없던 trial 만 재사용한다.
+    """
+    key = normalize_nct_id(nct_id)
+    previous = baseline.get(key)
+    version = versions.get(key)
+    if previous is None or not version or previous.last_update_posted != version or previous.gpt_error:
+        return None, None
+    if previous.has_study:
+        return previous, REUSE
+    if previous.official_title is not None:
+        return previous, REBUILD
+    return None, None
@@ -0,0 +1,95 @@
+import io
+import os
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# ========== 업로드 읽기 ========== #
+# 헤더만 먼저 읽고 필요한 컬럼만, 작은 dtype 으로, chunk 단위로 읽는다.
+DEFAULT_CHUNK_ROWS = 20_000
+NCT_COLUMN = "NCT Number"
+STRING_DTYPE = "string[pyarrow]"
+
+
+def _is_excel(file_name):
+    return os.path.splitext(file_name)[-1].lower() in (".xlsx", ".xlsm")
+
+
+def _open(source):
+    # source: 파일 경로 또는 업로드 bytes
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def compact_dtypes(df, categorical=()):
+    """문자열 컬럼은 pyarrow string, categorical 에 준 컬럼은 category 로."""
+    for col in df.columns:
+        if col in categorical:
+            df[col] = df[col].astype("category")
+        elif df[col].dtype == object:
+            df[col] = df[col].astype(STRING_DTYPE)
+    return df
+
+
+def read_header(source, file_name):
+    """컬럼 이름 목록 (데이터 행은 읽지 않는다)."""
+    if _is_excel(file_name):
+        workbook = load_workbook(_open(source), read_only=True, data_only=True)
+        try:
+            first = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+        return [str(v) for v in first if v is not None]
+    return pd.read_csv(_open(source), nrows=0, encoding="utf-8").columns.tolist()
+
+
+def _iter_excel_chunks(source, columns, chunk_rows):
+    workbook = load_workbook(_open(source), read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(v) if v is not None else None for v in next(rows, ())]
+        wanted = list(columns) if columns is not None else [c for c in header if c is not None]
+        missing = [c for c in wanted if c not in header]
+        if missing:
+            raise ValueError(f"missing columns: {', '.join(missing)}")
+        indexes = [header.index(c) for c in wanted]
+        buffer = []
+        for values in rows:
+            buffer.append([values[i] if i < len(values) else None for i in indexes])
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=wanted)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=wanted)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(source, file_name, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS, categorical=()):
+    """업로드를 DataFrame chunk 로 차례대로. columns 를 주면 그 컬럼만 (주어진 순서대로).
+
+    CSV 는 usecols + chunksize 로, Excel 은 openpyxl read-only 모드로 한 행씩 읽는다.
+    """
+    if _is_excel(file_name):
+        chunks = _iter_excel_chunks(source, columns, chunk_rows)
+    else:
+        reader = pd.read_csv(
+            _open(source),
+            usecols=list(columns) if columns is not None else None,
+            encoding="utf-8",
+            chunksize=chunk_rows
+        )
+        chunks = (chunk[list(columns)] if columns is not None else chunk for chunk in reader)
+    for chunk in chunks:
+        yield compact_dtypes(chunk, categorical)
+
+
+def read_columns(source, file_name, columns=None, categorical=(), chunk_rows=DEFAULT_CHUNK_ROWS):
+    """iter_chunks 를 하나의 DataFrame 으로 (없으면 빈 DataFrame)."""
+    chunks = list(iter_chunks(source, file_name, columns, chunk_rows, categorical))
+    if not chunks:
+        return pd.DataFrame(columns=list(columns) if columns is not None else read_header(source, file_name))
+    if len(chunks) == 1:
+        return chunks[0]
+    # chunk 마다 category 값이 달라도 합친 뒤 다시 category 로
+    df = pd.concat(chunks, ignore_index=True)
+    return compact_dtypes(df, categorical)
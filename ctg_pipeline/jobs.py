@@ -0,0 +1,338 @@
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+from openai import OpenAI
+
+from .batch import (
+    EXCEL_FILE,
+    RESULTS_PARQUET,
+    ZIP_FILE,
+    checkpoint_name,
+    process_frame,
+    write_report,
+)
+from .cache import DEFAULT_CACHE_DIR, ResultCache
+from .checkpoint import Checkpoint, make_run_id
+from .incremental import baseline_from_frame, frame_key, index_baseline
+from .ingest import NCT_COLUMN, iter_chunks, read_columns
+from .metrics import RunMetrics
+from .pipeline import PipelineOptions
+from .records import TrialResult, read_records, read_results, records_frame, write_records
+
+# ========== 작업 큐 설정 ========== #
+DEFAULT_JOBS_DIR = os.path.join(DEFAULT_CACHE_DIR, "jobs")
+DEFAULT_JOB_WORKERS = int(os.getenv("CTG_JOB_WORKERS", "2"))
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+INPUT_FILE = "input.csv"
+BASELINE_FILE = "baseline.parquet"  # 증분 처리 기준이 되는 이전 결과 (있을 때만)
+
+
+class JobStore:
+    """작업 테이블 (SQLite). 앱과 워커 프로세스가 같은 파일을 함께 쓴다."""
+
+    def __init__(self, root=DEFAULT_JOBS_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "jobs.sqlite3"), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " run_key TEXT NOT NULL,"
+            " file_name TEXT,"
+            " status TEXT NOT NULL,"
+            " total INTEGER NOT NULL DEFAULT 0,"
+            " done INTEGER NOT NULL DEFAULT 0,"
+            " options TEXT NOT NULL,"
+            " stats TEXT,"
+            " error TEXT,"
+            " created REAL NOT NULL,"
+            " started REAL,"
+            " finished REAL)"
+        )
+        self._conn.commit()
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def path(self, job_id, name):
+        return os.path.join(self.job_dir(job_id), name)
+
+    def create(self, run_key, file_name, total, options):
+        job_id = uuid.uuid4().hex[:12]
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, run_key, file_name, status, total, options, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, run_key, file_name, QUEUED, total, json.dumps(options), time.time())
+            )
+            self._conn.commit()
+        return job_id
+
+    def update(self, job_id, **fields):
+        if "stats" in fields and not isinstance(fields["stats"], str):
+            fields["stats"] = json.dumps(fields["stats"])
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def find_active(self, run_key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE run_key = ? AND status IN (?, ?) ORDER BY created DESC",
+                (run_key, *ACTIVE_STATUSES)
+            ).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list(self, limit=50):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def list_active(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created", ACTIVE_STATUSES
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def delete(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._conn.commit()
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def load_records(self, job_id):
+        """TrialResult 목록. 완료된 작업은 Parquet, 처리 중이면 체크포인트에서 읽는다."""
+        parquet_path = self.path(job_id, RESULTS_PARQUET)
+        if os.path.exists(parquet_path):
+            return read_records(parquet_path)
+        job = self.get(job_id)
+        if job is None:
+            return []
+        # 워커가 쓰는 중일 수 있으므로 파일은 수정하지 않는다
+        return [
+            TrialResult.from_dict(d)
+            for d in Checkpoint(checkpoint_name(job["run_key"]), self.job_dir(job_id)).load(repair=False)
+        ]
+
+    def load_record(self, job_id, row):
+        """행 하나의 TrialResult (없으면 None). 완료된 작업은 Parquet 에서 그 행만 읽는다."""
+        parquet_path = self.path(job_id, RESULTS_PARQUET)
+        if os.path.exists(parquet_path):
+            rows = read_results(parquet_path, filters=[("row", "=", row)]).to_pylist()
+            return TrialResult(**rows[-1]) if rows else None
+        matches = [r for r in self.load_records(job_id) if r.row == row]
+        return matches[-1] if matches else None
+
+    def load_results(self, job_id, columns=None):
+        """결과를 DataFrame 으로. 완료된 작업은 필요한 컬럼만 Parquet 에서 읽는다."""
+        parquet_path = self.path(job_id, RESULTS_PARQUET)
+        if os.path.exists(parquet_path):
+            return read_results(parquet_path, columns).to_pandas()
+        results = records_frame(self.load_records(job_id))
+        return results[list(columns)] if columns else results
+
+    def load_input(self, job_id, columns=None):
+        # columns 를 주면 그 컬럼만 읽는다 (예: 처리에는 NCT Number 만 필요)
+        return read_columns(self.path(job_id, INPUT_FILE), INPUT_FILE, columns)
+
+    def iter_input(self, job_id):
+        return iter_chunks(self.path(job_id, INPUT_FILE), INPUT_FILE)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _row_to_job(row):
+    job = dict(row)
+    job["options"] = json.loads(job["options"])
+    job["stats"] = json.loads(job["stats"]) if job["stats"] else {}
+    return job
+
+
+def worker_options(options, job_workers):
+    """동시에 도는 작업들이 합쳐서 계정의 RPM / TPM 예산을 넘지 않도록 워커 수로 나눈다."""
+    job_workers = max(1, int(job_workers))
+    return replace(
+        options,
+        requests_per_minute=max(1, options.requests_per_minute // job_workers),
+        tokens_per_minute=max(1, options.tokens_per_minute // job_workers)
+    )
+
+
+def run_job(job_id, root, api_key, job_workers=1):
+    """워커 프로세스에서 실행. 결과 레코드는 results.jsonl 에 바로 쌓이므로
+    중간에 죽어도 다시 실행하면 이어서 처리한다.
+
+    job_workers: 동시에 실행되는 작업 수 (RPM / TPM 예산을 나눠 쓴다).
+    """
+    store = JobStore(root)
+    job = store.get(job_id)
+    if job is None or job["status"] not in ACTIVE_STATUSES:
+        store.close()
+        return
+
+    store.update(job_id, status=RUNNING, started=time.time(), error=None)
+    metrics = RunMetrics()
+    run_stats = {}
+    cache = None
+    last_update = 0.0
+    last_check = 0.0
+    cancelled = False
+
+    def is_cancelled():
+        # 취소 확인 (PROGRESS_INTERVAL_SECONDS 마다). GPT 요청 스레드에서도 불린다
+        nonlocal last_check, cancelled
+        now = time.monotonic()
+        if not cancelled and now - last_check >= PROGRESS_INTERVAL_SECONDS:
+            last_check = now
+            cancelled = store.get(job_id)["status"] == CANCELLED
+        return cancelled
+
+    def on_progress(done):
+        # 진행률 기록 (PROGRESS_INTERVAL_SECONDS 마다)
+        nonlocal last_update
+        if is_cancelled():
+            return False
+        now = time.monotonic()
+        if now - last_update >= PROGRESS_INTERVAL_SECONDS:
+            last_update = now
+            store.update(job_id, done=done)
+        return True
+
+    try:
+        # 처리에는 NCT Number 만 읽고, 나머지 입력 컬럼은 내보낼 때 chunk 단위로
+        df = store.load_input(job_id, [NCT_COLUMN])
+        options = worker_options(PipelineOptions(**job["options"]), job_workers)
+        cache = ResultCache()
+        client = OpenAI(api_key=api_key)
+        baseline_path = store.path(job_id, BASELINE_FILE)
+        baseline = index_baseline(read_records(baseline_path)) if os.path.exists(baseline_path) else None
+
+        run_stats = process_frame(
+            df,
+            store.job_dir(job_id),
+            client,
+            cache,
+            options,
+            formats=("excel", "zip"),
+            baseline=baseline,
+            metrics=metrics,
+            stats=run_stats,
+            on_progress=on_progress,
+            cancelled=is_cancelled,
+            input_chunks=lambda: store.iter_input(job_id),
+            run_id=job["run_key"]
+        )
+        if run_stats is None:
+            return
+        # 결과는 Parquet 에 모두 있으므로 증분 기준 파일은 지운다
+        if baseline is not None:
+            os.remove(baseline_path)
+        store.update(job_id, status=DONE, done=len(df), stats=run_stats, finished=time.time())
+    except Exception as e:
+        # 실패한 작업도 어디까지 얼마나 걸렸는지 남긴다
+        run_stats["metrics"] = write_report(store.job_dir(job_id), metrics)
+        store.update(
+            job_id, status=FAILED, error=f"{type(e).__name__}: {e}", stats=run_stats, finished=time.time()
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+        store.close()
+
+
+class JobManager:
+    """로컬 워커 프로세스 풀 + 작업 테이블. 앱 서버 프로세스당 하나만 만든다."""
+
+    def __init__(self, api_key, root=DEFAULT_JOBS_DIR, max_workers=DEFAULT_JOB_WORKERS):
+        self.api_key = api_key
+        self.root = root
+        self.max_workers = max(1, int(max_workers))
+        self.store = JobStore(root)
+        # Streamlit 서버 스레드를 fork 하지 않도록 spawn 사용
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        # 서버 재시작 전에 끝나지 못한 작업은 다시 큐에 넣는다 (체크포인트에서 이어서)
+        for job in self.store.list_active():
+            self.store.update(job["id"], status=QUEUED)
+            self._dispatch(job["id"])
+
+    def _dispatch(self, job_id):
+        self._pool.submit(run_job, job_id, self.root, self.api_key, self.max_workers)
+
+    def submit(self, df, file_name, options, baseline_job_id=None, baseline_df=None, input_data=None):
+        """df 를 처리하는 작업을 큐에 넣고 job id 를 반환.
+
+        input_data(업로드한 CSV bytes)를 주면 그대로 작업 입력으로 저장하고, df 에는
+        "NCT Number" 컬럼만 있으면 된다.
+
+        baseline_job_id(완료된 이전 작업) 또는 baseline_df(이전 결과 Excel)를 주면
+        lastUpdatePostDate 가 바뀐/새 trial 만 처리하는 증분 작업이 된다.
+        같은 NCT 목록 + 옵션(+ 기준 결과)으로 이미 대기/실행 중인 작업이 있으면 그 id 를 돌려준다.
+        """
+        nct_list = df["NCT Number"].tolist()
+        options_dict = options.to_dict()
+
+        baseline_records = None
+        run_options = options_dict
+        if baseline_job_id is not None:
+            baseline_records = self.store.load_records(baseline_job_id)
+            run_options = {**options_dict, "baseline": f"job:{baseline_job_id}"}
+        elif baseline_df is not None:
+            baseline_records = baseline_from_frame(baseline_df)
+            run_options = {**options_dict, "baseline": f"excel:{frame_key(baseline_df)}"}
+
+        run_key = make_run_id(nct_list, run_options)
+        existing = self.store.find_active(run_key)
+        if existing is not None:
+            return existing["id"]
+
+        job_id = self.store.create(run_key, file_name, len(nct_list), options_dict)
+        if input_data is not None:
+            with open(self.store.path(job_id, INPUT_FILE), "wb") as f:
+                f.write(input_data)
+        else:
+            df.to_csv(self.store.path(job_id, INPUT_FILE), index=False, encoding="utf-8")
+        if baseline_records is not None:
+            write_records(baseline_records, self.store.path(job_id, BASELINE_FILE))
+        self._dispatch(job_id)
+        return job_id
+
+    def cancel(self, job_id):
+        job = self.store.get(job_id)
+        if job and job["status"] in ACTIVE_STATUSES:
+            self.store.update(job_id, status=CANCELLED, finished=time.time())
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.store.close()
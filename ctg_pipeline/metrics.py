@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# 지연 시간 히스토그램 경계 (초). 마지막 구간은 그 이상 전부
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+REPORT_VERSION = 1
+
+
+def _bucket_label(upper):
+    return f"<={upper:g}s" if upper is not None else f">{LATENCY_BUCKETS[-1]:g}s"
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class RunMetrics:
+    """단계별 소요 시간 분포 + 카운터. 워커 스레드에서 동시에 기록해도 안전."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings = {}    # 단계 -> [초, ...]
+        self._counters = {}   # 이름 -> 누적 값
+        self._started = time.time()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self._timings.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def stage_summary(self, stage):
+        with self._lock:
+            values = sorted(self._timings.get(stage, ()))
+        histogram = {}
+        remaining = iter(values)
+        value = next(remaining, None)
+        for upper in (*LATENCY_BUCKETS, None):
+            count = 0
+            while value is not None and (upper is None or value <= upper):
+                count += 1
+                value = next(remaining, None)
+            histogram[_bucket_label(upper)] = count
+        total = sum(values)
+        return {
+            "count": len(values),
+            "total": total,
+            "mean": total / len(values) if values else 0.0,
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1] if values else 0.0,
+            "histogram": histogram,
+        }
+
+    def summary(self):
+        """JSON 으로 저장할 수 있는 리포트 dict."""
+        with self._lock:
+            stages = list(self._timings)
+            counters = dict(sorted(self._counters.items()))
+        return {
+            "version": REPORT_VERSION,
+            "started": self._started,
+            "elapsed": time.time() - self._started,
+            "stages": {stage: self.stage_summary(stage) for stage in stages},
+            "counters": counters,
+        }
+
+    def to_json(self):
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def maybe_timer(metrics, stage):
+    # metrics 가 None 이면 아무것도 기록하지 않는다
+    if metrics is None:
+        yield
+    else:
+        with metrics.timer(stage):
+            yield
+
+
+def stage_table(report):
+    """리포트의 단계별 요약을 표 형태(list of dict)로. 히스토그램은 제외."""
+    rows = []
+    for stage, s in report.get("stages", {}).items():
+        rows.append({
+            "stage": stage,
+            "count": s["count"],
+            "total (s)": round(s["total"], 3),
+            "mean (ms)": round(s["mean"] * 1000, 1),
+            "p50 (ms)": round(s["p50"] * 1000, 1),
+            "p95 (ms)": round(s["p95"] * 1000, 1),
+            "max (ms)": round(s["max"] * 1000, 1),
+        })
+    return rows
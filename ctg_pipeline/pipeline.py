@@ -0,0 +1,396 @@
+import json
+from collections import Counter
+from dataclasses import asdict, dataclass, replace
+
+import pandas as pd
+
+from .classify import (
+    DEFAULT_MODEL,
+    DEFAULT_RPM,
+    DEFAULT_TPM,
+    DEFAULT_WORKERS,
+    RateLimiter,
+    build_messages,
+    classify_all,
+)
+from .fetch import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    FetchError,
+    fetch_last_updates,
+    fetch_studies_cached,
+    normalize_nct_id,
+    study_last_update,
+)
+from .incremental import REBUILD, REUSE, match_baseline
+from .metrics import maybe_timer
+from .prompt import DEFAULT_TOKEN_BUDGET, build_question, estimate_tokens, prompt_token_savings
+from .records import RESULT_COLUMNS, TrialResult, records_frame
+from .responses import JSON_RESPONSE_FORMAT, parse_responses, validate_json_response
+from .rules import classify_by_rules
+from .text_utils import (
+    extract_last_in_brackets,
+    find_common_substring,
+    find_highlight_spans,
+    find_substring_spans,
+)
+
+DEFAULT_CHUNK_SIZE = 100   # 한 번에 조회/분류하고 체크포인트에 기록하는 행 수
+
+
+@dataclass
+class PipelineOptions:
+    concurrency: int = DEFAULT_CONCURRENCY
+    batch_size: int = DEFAULT_BATCH_SIZE
+    model: str = DEFAULT_MODEL
+    gpt_workers: int = DEFAULT_WORKERS
+    requests_per_minute: int = DEFAULT_RPM
+    tokens_per_minute: int = DEFAULT_TPM
+    compact_prompt: bool = True
+    token_budget: int = DEFAULT_TOKEN_BUDGET
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    fuzzy_highlight: bool = False
+    rule_classifier: bool = False  # 제목에 치료 단계가 분명하면 GPT 생략 (GPT 결과와 비교 검증 전이라 기본 끔)
+    structured_output: bool = True # JSON 응답으로 요청하고 형식이 틀린 행만 재요청
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def empty_record(row, nct_id, error=None):
+    return TrialResult(row=row, nct_id=str(nct_id), gpt_error=error)
+
+
+def apply_records(df, records, start=0):
+    """레코드를 행 번호 기준으로 df 에 RESULT_COLUMNS 로 붙인 복사본. 없는 행은 None.
+
+    records 는 TrialResult 목록 또는 row 컬럼이 있는 결과 DataFrame.
+    df 가 입력의 일부(chunk)면 start 에 첫 행 번호를 준다.
+    """
+    results = records if isinstance(records, pd.DataFrame) else records_frame(records)
+    results = results.drop_duplicates("row", keep="last").set_index("row").reindex(range(start, start + len(df)))
+    df = df.copy()
+    for col in RESULT_COLUMNS:
+        values = results[col].astype(object)
+        df[col] = values.where(values.notna(), None).tolist()
+    return df
+
+
+def summarize_arms(arms_data):
+    exp1, exp2, ctr1, ctr2 = None, None, None, None
+    if arms_data:
+        experimental_labels_drugs = []
+        experimental_descriptions = []
+        control_labels_drugs = []
+        control_descriptions = []
+
+        for arm in arms_data:
+            label = arm.get('label', '')
+            arm_type = arm.get('type', '')
+            description = arm.get('description', '')
+
+            other_keys = []
+            for k, v in arm.items():
+                if k not in ['label', 'type', 'description']:
+                    if isinstance(v, str):
+                        other_keys.append(v)
+                    elif isinstance(v, list):
+                        other_keys.append('/'.join(map(str, v)))
+            drug_info = "\n".join(other_keys) if other_keys else "No drug info"
+
+            if 'EXPERIMENTAL' in arm_type.upper():
+                experimental_labels_drugs.append(f"{label}\n{drug_info}")
+                experimental_descriptions.append(description)
+            else:
+                control_labels_drugs.append(f"{label}\n{drug_info}")
+                control_descriptions.append(description)
+
+        exp1 = "\n\n".join(experimental_labels_drugs)
+        exp2 = "\n\n".join(experimental_descriptions)
+        ctr1 = "\n\n".join(control_labels_drugs)
+        ctr2 = "\n\n".join(control_descriptions)
+    return exp1, exp2, ctr1, ctr2
+
+
+def parse_response(response_text, structured=False):
+    """응답 하나를 (test, reason, explanation, genes, confidence) 로. 여러 행은 parse_responses."""
+    return tuple(parse_responses([response_text], structured).iloc[0])
+
+
+def parse_date_info(d):
+    if not d:
+        return "NA"
+    return str(d)
+
+
+def build_record(
+    row, nct_id, study_data, completion, fuzzy_highlight=False, metrics=None, prior=None, rule=None, parsed=None
+):
+    """한 trial 의 조회 결과 + GPT 응답을 결과 레코드(TrialResult)로 변환.
+
+    parsed 는 parse_responses 로 미리 파싱한 (test, reason, explanation, genes, confidence).
+    없으면 completion.text 를 번호 형식으로 파싱한다.
+
+    prior(이전 TrialResult)를 주면 GPT 응답 대신 그 분류 결과를 쓴다 (증분 처리).
+    rule(rules.RuleMatch)을 주면 규칙 기반 분류 결과를 쓴다.
+    """
+    if study_data is None:
+        return empty_record(row, nct_id, "study not found on ClinicalTrials.gov")
+
+    protocol = study_data.get('protocolSection', {})
+
+    arms_data = protocol.get('armsInterventionsModule', {}).get('armGroups')
+    exp1, exp2, ctr1, ctr2 = summarize_arms(arms_data)
+
+    if prior is not None:
+        response_text = prior.response
+        gpt_error = prior.gpt_error
+        test_val, reason_val, explanation_val = prior.TestLines, prior.Reason, prior.Explanation
+        genes_val, confidence_val = prior.Genes, prior.Confidence_Score
+    elif rule is not None:
+        response_text, gpt_error = None, None
+        test_val, reason_val, explanation_val = rule.test, rule.reason, rule.explanation
+        genes_val, confidence_val = None, rule.confidence
+    else:
+        response_text = completion.text if completion is not None else None
+        gpt_error = completion.error if completion is not None else None
+        if parsed is None:
+            parsed = parse_response(response_text)
+        test_val, reason_val, explanation_val, genes_val, confidence_val = parsed
+
+    # 공식 타이틀, brief title, conditions, eligibility
+    identification_module = protocol.get('identificationModule', {})
+    o_title = identification_module.get('officialTitle', "NA")
+    b_title = identification_module.get('briefTitle', "NA")
+
+    conditions_val = protocol.get('conditionsModule', {}).get('conditions', [])
+    conditions = ", ".join(conditions_val) if conditions_val else "NA"
+
+    eligibility_criteria = protocol.get('eligibilityModule', {}).get('eligibilityCriteria', "")
+
+    status_module = protocol.get('statusModule', {})
+
+    # fuzzy: 공백/글머리표 차이를 무시하고 여러 구간을 하이라이트
+    # HTML 은 여기서 만들지 않고 하이라이트 구간만 남겨 둔다 (report.render_record_html)
+    with maybe_timer(metrics, "highlight"):
+        spans = find_highlight_spans(reason_val, eligibility_criteria) if fuzzy_highlight else []
+        if spans:
+            reason_parts = " ... ".join(eligibility_criteria[start:end] for start, end in spans)
+        else:
+            reason_parts = find_common_substring(reason_val if reason_val else "", eligibility_criteria)
+            spans = find_substring_spans(eligibility_criteria, reason_parts)
+
+    return TrialResult(
+        row=row,
+        nct_id=str(nct_id),
+        official_title=o_title,
+        brief_title=b_title,
+        TestLines=test_val,
+        Reason=reason_val,
+        Explanation=explanation_val,
+        Genes=genes_val,
+        Confidence_Score=confidence_val,
+        experimental_data=exp1,
+        experimental_description=exp2,
+        control_datas=ctr1,
+        control_description=ctr2,
+        study_name=extract_last_in_brackets(o_title) or "NA",
+        start_date=parse_date_info(status_module.get('startDateStruct')),
+        primary_completion_date=parse_date_info(status_module.get('primaryCompletionDateStruct')),
+        completion_date=parse_date_info(status_module.get('completionDateStruct')),
+        gpt_error=gpt_error,
+        response=response_text,
+        arms_json=json.dumps(arms_data, ensure_ascii=False) if arms_data is not None else None,
+        conditions=conditions,
+        eligibility_criteria=eligibility_criteria,
+        reason_parts=reason_parts,
+        highlight_spans=[list(span) for span in spans]
+    )
+
+
+def iter_trial_results(
+    nct_list,
+    client,
+    cache,
+    options=None,
+    done_rows=(),          # 체크포인트에서 이미 끝난 행 번호
+    stats=None,            # 프롬프트 토큰 합계 등을 누적할 dict
+    on_stage=None,         # (단계 이름, 시작 행, 끝 행) -> None
+    metrics=None,          # RunMetrics: 단계별 소요 시간, HTTP/캐시/토큰 카운터
+    baseline=None,         # 증분 처리: {NCT ID: 이전 TrialResult} (incremental.index_baseline)
+    cancelled=None         # () -> True 면 중단 (chunk 사이와 GPT 요청마다 확인)
+):
+    """nct_list 를 chunk 단위로 조회 -> 분류 -> 파싱하며 행마다 결과 레코드를 yield.
+
+    baseline 이 있으면 lastUpdatePostDate 만 먼저 조회해, 바뀌지 않은 trial 은
+    이전 결과를 쓰고 새로 생긴/바뀐 trial 만 전체 조회와 GPT 분류를 한다.
+    options.rule_classifier 가 켜져 있으면 치료 단계가 분명한 trial 은 GPT 없이 분류한다.
+    같은 NCT ID 가 여러 행에 있으면 처음 나온 행만 처리하고, 나머지 행은 그 결과를 복사한다.
+    cancelled 로 중단되면 그 chunk 의 레코드는 내보내지 않고 끝난다 (다시 실행하면 처리).
+    """
+    options = options or PipelineOptions()
+    done_rows = set(done_rows)
+    baseline = baseline or {}
+    if stats is not None:
+        stats.setdefault("prompt_tokens_before", 0)
+        stats.setdefault("prompt_tokens_after", 0)
+        stats.setdefault("incremental", {REUSE: 0, REBUILD: 0, "processed": 0})
+        stats.setdefault("rules", {"checked": 0, "hits": 0, "prompt_tokens_saved": 0})
+        stats.setdefault("duplicate_rows", 0)
+    # RPM / TPM 예산은 chunk 마다가 아니라 실행 전체에 적용
+    limiter = RateLimiter(options.requests_per_minute, options.tokens_per_minute)
+
+    total = len(nct_list)
+    keys = [normalize_nct_id(nct_id) for nct_id in nct_list]
+    # 처리한 결과는 같은 ID 의 행이 뒤에 남아 있는 동안만 보관 ({ID: (레코드, mode)})
+    remaining = Counter(keys[i] for i in range(total) if i not in done_rows)
+    shared = {}
+    chunk_size = max(1, int(options.chunk_size))
+    for start in range(0, total, chunk_size):
+        end = min(total, start + chunk_size)
+        rows = [i for i in range(start, end) if i not in done_rows]
+        if not rows:
+            continue
+        if cancelled is not None and cancelled():
+            return
+        # 조회/분류는 앞에서 처리하지 않은 ID 의 첫 행만
+        first_rows = {}
+        for i in rows:
+            if keys[i] not in shared:
+                first_rows.setdefault(keys[i], i)
+        unique_rows = list(first_rows.values())
+        chunk_ids = [nct_list[i] for i in unique_rows]
+
+        if on_stage:
+            on_stage("fetch", start, end)
+        fetch_kwargs = {"concurrency": options.concurrency, "batch_size": options.batch_size, "metrics": metrics}
+        with maybe_timer(metrics, "fetch"):
+            # 버전(lastUpdatePostDate)만 먼저 조회 -> 캐시/이전 결과 비교
+            versions = fetch_last_updates(chunk_ids, **fetch_kwargs)
+            matches = [match_baseline(baseline, nct_id, versions) for nct_id in chunk_ids]
+            to_fetch = [i for i, (_, mode) in enumerate(matches) if mode != REUSE]
+            studies = [None] * len(unique_rows)
+            fetched = fetch_studies_cached([chunk_ids[i] for i in to_fetch], cache, versions=versions, **fetch_kwargs)
+            for i, study_data in zip(to_fetch, fetched):
+                studies[i] = study_data
+            # 조회 실패 (재시도 후에도 HTTP 오류 등) 는 "없음" 과 구분해 오류로 남긴다
+            fetch_errors = [str(s) if isinstance(s, FetchError) else None for s in studies]
+            studies = [None if error else s for s, error in zip(studies, fetch_errors)]
+            if metrics is not None:
+                metrics.incr("rows.fetch_failed", sum(1 for error in fetch_errors if error))
+
+        if on_stage:
+            on_stage("classify", start, end)
+        # GPT 로 보내야 하는 행: 조회됐고, 이전 결과를 쓰지 않는 행
+        needs_gpt = [study_data is not None and mode is None for study_data, (_, mode) in zip(studies, matches)]
+        rule_matches = [None] * len(unique_rows)
+        if options.rule_classifier:
+            with maybe_timer(metrics, "rules"):
+                for i, study_data in enumerate(studies):
+                    if needs_gpt[i]:
+                        rule_matches[i] = classify_by_rules(study_data)
+                        needs_gpt[i] = rule_matches[i] is None
+        with maybe_timer(metrics, "prompt"):
+            questions = [
+                build_question(
+                    study_data,
+                    compact=options.compact_prompt,
+                    token_budget=options.token_budget,
+                    structured=options.structured_output
+                )
+                if needs_gpt[i] or rule_matches[i] is not None else None
+                for i, study_data in enumerate(studies)
+            ]
+        # 규칙으로 분류한 행의 프롬프트는 절약한 토큰 계산에만 쓰고 보내지 않는다
+        rule_hits = sum(1 for m in rule_matches if m is not None)
+        if options.rule_classifier:
+            checked = rule_hits + sum(needs_gpt)
+            if stats is not None:
+                stats["rules"]["checked"] += checked
+                stats["rules"]["hits"] += rule_hits
+                stats["rules"]["prompt_tokens_saved"] += sum(
+                    estimate_tokens(q) for q, m in zip(questions, rule_matches) if m is not None
+                )
+            if metrics is not None:
+                metrics.incr("rules.hit", rule_hits)
+                metrics.incr("rules.miss", checked - rule_hits)
+        questions = [q if gpt else None for q, gpt in zip(questions, needs_gpt)]
+        if stats is not None:
+            before, after = prompt_token_savings(studies, questions)
+            stats["prompt_tokens_before"] += before
+            stats["prompt_tokens_after"] += after
+        with maybe_timer(metrics, "classify"):
+            completions = classify_all(
+                [build_messages(q) if q is not None else None for q in questions],
+                client,
+                cache=cache,
+                model=options.model,
+                workers=options.gpt_workers,
+                requests_per_minute=options.requests_per_minute,
+                tokens_per_minute=options.tokens_per_minute,
+                metrics=metrics,
+                response_format=JSON_RESPONSE_FORMAT if options.structured_output else None,
+                validate=validate_json_response if options.structured_output else None,
+                limiter=limiter,
+                cancelled=cancelled
+            )
+        # 취소로 보내지 못한 응답을 오류 레코드로 체크포인트에 남기지 않는다
+        if cancelled is not None and cancelled():
+            return
+
+        if on_stage:
+            on_stage("parse", start, end)
+        # 응답은 chunk 단위로 한 번에 파싱 (컬럼 단위 정리)
+        with maybe_timer(metrics, "parse"):
+            parsed_rows = parse_responses(
+                [c.text if c is not None else None for c in completions],
+                structured=options.structured_output
+            ).itertuples(index=False, name=None)
+        built = {}
+        for row, nct_id, study_data, completion, (previous, mode), rule, parsed, fetch_error in zip(
+            unique_rows, chunk_ids, studies, completions, matches, rule_matches, parsed_rows, fetch_errors
+        ):
+            try:
+                with maybe_timer(metrics, "row"):
+                    if fetch_error:
+                        record = empty_record(row, nct_id, fetch_error)
+                    elif mode == REUSE:
+                        record = replace(previous, row=row, nct_id=str(nct_id))
+                    else:
+                        record = build_record(
+                            row, nct_id, study_data, completion, options.fuzzy_highlight, metrics,
+                            prior=previous if mode == REBUILD else None,
+                            rule=rule,
+                            parsed=parsed
+                        )
+                    record.last_update_posted = versions.get(normalize_nct_id(nct_id)) or (
+                        study_last_update(study_data) if study_data is not None else None
+                    )
+            except Exception as e:
+                record = empty_record(row, nct_id, f"processing error: {type(e).__name__}: {e}")
+            built[row] = (record, mode)
+
+        for row in rows:
+            key = keys[row]
+            if row in built:
+                record, mode = built[row]
+            else:
+                record, mode = shared[key]
+                record = replace(record, row=row, nct_id=str(nct_list[row]))
+                if stats is not None:
+                    stats["duplicate_rows"] += 1
+                if metrics is not None:
+                    metrics.incr("rows.duplicate")
+            remaining[key] -= 1
+            if remaining[key] > 0:
+                shared[key] = (record, mode)
+            else:
+                shared.pop(key, None)
+            if stats is not None:
+                stats["incremental"][mode or "processed"] += 1
+            if metrics is not None:
+                metrics.incr("rows")
+                metrics.incr(f"rows.{mode or 'processed'}")
+                if record.gpt_error:
+                    metrics.incr("rows.error")
+            yield record
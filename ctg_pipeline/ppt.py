@@ -0,0 +1,230 @@
+import io
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+from pptx import Presentation
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.util import Emu, Pt
+
+EMU_PER_INCH = 914400
+MARGIN_EMU = int(0.5 * EMU_PER_INCH)
+TABLE_TOP_EMU = int(1.5 * EMU_PER_INCH)
+TABLE_HEIGHT_EMU = int(5 * EMU_PER_INCH)
+TITLE_ONLY_LAYOUT = 5
+MIN_SLIDES_PER_WORKER = 20   # 이보다 작으면 병렬화 오버헤드가 더 큼
+
+_A_P = qn("a:p")
+_A_R = qn("a:r")
+_A_T = qn("a:t")
+_A_BR = qn("a:br")
+_CTRL_CHARS = re.compile(r"([\x00-\x08\x0B-\x1F])")
+
+
+def _escape_ctrl_chars(match):
+    return "_x%04X_" % ord(match.group(1))
+
+
+def _set_cell_text(tc, text):
+    # _Cell.text 와 같은 XML (줄마다 a:p, \v 는 a:br, 제어문자 escape) 을
+    # xmlchemy 의 자식 순서 검사 없이 lxml 로 바로 만든다
+    txBody = tc.txBody
+    for p in txBody.findall(_A_P):
+        txBody.remove(p)
+    for p_text in text.split("\n"):
+        p = etree.SubElement(txBody, _A_P)
+        for idx, r_str in enumerate(p_text.split("\v")):
+            if idx > 0:
+                etree.SubElement(p, _A_BR)
+            if r_str:
+                r = etree.SubElement(p, _A_R)
+                etree.SubElement(r, _A_T).text = _CTRL_CHARS.sub(_escape_ctrl_chars, r_str)
+
+
+def partition_groups(df, grouping_col=None, sort=False, max_groups=None, max_rows=None):
+    """(카테고리 이름, 그 카테고리의 행) 을 차례대로 yield 하는 generator.
+
+    카테고리마다 df 전체를 비교하지 않고, factorize + 안정 정렬 한 번으로 같은
+    카테고리 행을 연속 구간으로 모은 뒤 구간 slice 를 돌려준다 (카테고리 안의
+    행 순서는 원래대로). 카테고리 순서는 처음 나온 순서, sort=True 면 값 순서.
+    값이 비어 있는 행은 어느 카테고리에도 넣지 않는다.
+    max_groups: 최대 카테고리 수, max_rows: 카테고리당 최대 행 수 (None 이면 제한 없음).
+    """
+    if grouping_col is None:
+        yield "Data", df.iloc[:max_rows] if max_rows else df
+        return
+
+    codes, uniques = pd.factorize(df[grouping_col], sort=sort)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    # 코드 -1 (결측) 은 정렬하면 맨 앞에 모이므로 건너뛴다
+    first = np.searchsorted(sorted_codes, 0)
+    bounds = np.searchsorted(sorted_codes, np.arange(len(uniques) + 1))
+    n_groups = len(uniques) if not max_groups else min(max_groups, len(uniques))
+    if n_groups == 0:
+        return
+    ordered = df.iloc[order[first:bounds[n_groups]]]
+    for code in range(n_groups):
+        start, end = bounds[code] - first, bounds[code + 1] - first
+        if max_rows:
+            end = min(end, start + max_rows)
+        yield str(uniques[code]), ordered.iloc[start:end]
+
+
+def to_string_columns(df, selected_columns):
+    # 셀마다 iloc 로 Series 를 만들지 않도록, 컬럼별 문자열 리스트로 한 번에 변환
+    string_columns = []
+    for col_name in selected_columns:
+        values = df[col_name].to_numpy(dtype=object)
+        missing = pd.isna(values)
+        string_columns.append(["" if m else str(v) for v, m in zip(values, missing)])
+    return string_columns
+
+
+def column_widths_emu(selected_columns, col_widths, table_width_emu):
+    cols = len(selected_columns)
+    widths = []
+    for col_name in selected_columns:
+        if col_widths and (col_name in col_widths):
+            col_percent = col_widths[col_name] / 100.0
+        else:
+            col_percent = 1.0 / cols
+        widths.append(int(table_width_emu * col_percent))
+    return widths
+
+
+def plan_slides(df_list_dict, common_title, selected_columns, rows_per_slide):
+    """슬라이드마다 (제목, 컬럼별 문자열 리스트) 를 미리 계산.
+
+    df_list_dict 는 dict 또는 (카테고리, DataFrame) 쌍의 iterable (partition_groups).
+    """
+    slides = []
+    groups = df_list_dict.items() if isinstance(df_list_dict, dict) else df_list_dict
+    for category_name, df_data in groups:
+        if df_data.empty:
+            continue
+
+        string_columns = to_string_columns(df_data, selected_columns)
+        total_rows = len(df_data)
+        num_splits = (total_rows + rows_per_slide - 1) // rows_per_slide
+
+        for idx in range(num_splits):
+            slide_title = f"{common_title} - {category_name}"
+            if num_splits > 1:
+                slide_title += f" (page {idx+1})"
+            start, end = idx * rows_per_slide, (idx + 1) * rows_per_slide
+            slides.append((slide_title, [col[start:end] for col in string_columns]))
+    return slides
+
+
+def _add_table_slide(prs, layout, slide_title, chunk_columns, selected_columns, widths, table_width_emu):
+    slide = prs.slides.add_slide(layout)
+    shapes = slide.shapes
+
+    title_shape = shapes.title
+    if not title_shape:
+        title_shape = shapes.add_textbox(
+            MARGIN_EMU, MARGIN_EMU,
+            prs.slide_width - 2 * MARGIN_EMU,
+            int(0.5 * EMU_PER_INCH)
+        )
+    title_shape.text = slide_title
+
+    n_rows = len(chunk_columns[0]) if chunk_columns else 0
+    graphic_frame = shapes.add_table(
+        n_rows + 1, len(selected_columns), MARGIN_EMU, TABLE_TOP_EMU, table_width_emu, TABLE_HEIGHT_EMU
+    )
+    table = graphic_frame.table
+
+    # table.cell(r, c) 는 호출마다 행 목록을 다시 훑으므로 행 단위로 순회
+    rows = iter(table.rows)
+
+    # 헤더
+    for c, cell in enumerate(next(rows).cells):
+        cell.text = selected_columns[c]
+        run = cell.text_frame.paragraphs[0].runs[0]
+        run.font.bold = True
+        run.font.size = Pt(12)
+
+    # 실제 데이터 (빈 문자열은 새 셀 기본값과 같으므로 건너뜀)
+    for r, tr in enumerate(table._tbl.tr_lst[1:]):
+        for c, tc in enumerate(tr.tc_lst):
+            val_str = chunk_columns[c][r]
+            if val_str:
+                _set_cell_text(tc, val_str)
+
+    # 열 너비: column.width 는 설정할 때마다 전체 폭을 다시 합산하므로 한 번에 설정
+    for grid_col, width in zip(table._tbl.tblGrid.gridCol_lst, widths):
+        grid_col.w = Emu(width)
+    graphic_frame.width = Emu(sum(widths))
+    return slide
+
+
+def _build_deck(slides, selected_columns, widths):
+    prs = Presentation()
+    layout = prs.slide_layouts[TITLE_ONLY_LAYOUT]
+    table_width_emu = prs.slide_width - 2 * MARGIN_EMU
+    for slide_title, chunk_columns in slides:
+        _add_table_slide(prs, layout, slide_title, chunk_columns, selected_columns, widths, table_width_emu)
+    return prs
+
+
+def _build_partial_deck(slides, selected_columns, widths):
+    # 워커 프로세스용: 부분 덱을 만들고 슬라이드별 (제목, 표 XML) 만 돌려준다
+    prs = _build_deck(slides, selected_columns, widths)
+    out = []
+    for slide in prs.slides:
+        table_xml = [etree.tostring(shape._element) for shape in slide.shapes if shape.has_table]
+        out.append((slide.shapes.title.text, table_xml))
+    return out
+
+
+def _merge_decks(partial_decks):
+    # 표에는 관계(이미지 등)가 없으므로 제목 + 표 XML 만 옮기면 된다
+    prs = Presentation()
+    layout = prs.slide_layouts[TITLE_ONLY_LAYOUT]
+    for partial in partial_decks:
+        for slide_title, table_xml in partial:
+            slide = prs.slides.add_slide(layout)
+            slide.shapes.title.text = slide_title
+            for xml in table_xml:
+                slide.shapes._spTree.append(parse_xml(xml))
+    return prs
+
+
+def create_ppt_from_dfs(
+    df_list_dict,       # {"category": DataFrame, ...} 또는 partition_groups(...)
+    common_title,       # 공통 슬라이드 제목
+    selected_columns,   # PPT에 표시할 컬럼 목록
+    rows_per_slide=6,
+    col_widths=None,    # { "컬럼명": 퍼센트(0~100), ... }
+    workers=None        # 2 이상이면 카테고리 묶음별로 프로세스 병렬 생성 후 병합
+):
+    table_width_emu = Presentation().slide_width - 2 * MARGIN_EMU
+    widths = column_widths_emu(selected_columns, col_widths, table_width_emu)
+    slides = plan_slides(df_list_dict, common_title, selected_columns, rows_per_slide)
+
+    workers = min(int(workers or 1), len(slides) // MIN_SLIDES_PER_WORKER)
+    if workers > 1:
+        # 슬라이드 순서를 유지하도록 연속 구간으로 나눈다
+        size = (len(slides) + workers - 1) // workers
+        batches = [slides[i:i + size] for i in range(0, len(slides), size)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            partial_decks = list(pool.map(
+                _build_partial_deck,
+                batches,
+                [selected_columns] * len(batches),
+                [widths] * len(batches)
+            ))
+        prs = _merge_decks(partial_decks)
+    else:
+        prs = _build_deck(slides, selected_columns, widths)
+
+    ppt_io = io.BytesIO()
+    prs.save(ppt_io)
+    ppt_io.seek(0)
+    return ppt_io
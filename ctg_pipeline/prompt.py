@@ -0,0 +1,101 @@
+import re
+
+QUESTION_TEMPLATE = (
+    "Please provide an answer in the following format based on the provided experiment description,\n"
+    "1. test: Determine which of the following categories the cancer treatment experiment belongs to: first line, second line, third line, neoadjuvant, adjuvant or unclear. Only print out the test type without writinig any sentences.\n"
+    "2. reason: write the exact specific part of the eligibilityCriteria in Experiment description below that supports your answer in 1 without changing a single part\n"
+    "3. explanations: explain specifically why you chose your answer in 1\n"
+    "4. genes: mutations, expressions associated in study such as KRAS, EGFR, MET, ALK, CEACAM5, STK11, KEAP1\n"
+    "5. Confidence Score: Based on the probability of incorrectly guessing the type of test, if you are uncertain about your decision, write 'uncertain'. else write 'certain'.\n\n"
+    "Experiment description below:\n{experiment_description}"
+)
+
+# JSON 응답(structured output)용: 같은 질문을 고정된 키의 JSON 객체로 받는다
+JSON_QUESTION_TEMPLATE = (
+    "Based on the provided experiment description, answer with a JSON object with exactly these keys:\n"
+    "\"test\": which of the following categories the cancer treatment experiment belongs to, one of \"first line\", \"second line\", \"third line\", \"neoadjuvant\", \"adjuvant\" or \"unclear\".\n"
+    "\"reason\": the exact specific part of the eligibilityCriteria in Experiment description below that supports your answer in \"test\", copied without changing a single part.\n"
+    "\"explanation\": explain specifically why you chose your answer in \"test\".\n"
+    "\"genes\": mutations, expressions associated in study such as KRAS, EGFR, MET, ALK, CEACAM5, STK11, KEAP1, as a list of strings.\n"
+    "\"confidence\": based on the probability of incorrectly guessing the type of test, \"uncertain\" if you are uncertain about your decision, else \"certain\".\n\n"
+    "Experiment description below:\n{experiment_description}"
+)
+
+DEFAULT_TOKEN_BUDGET = 3000   # experiment description 부분의 최대 토큰 수
+CHARS_PER_TOKEN = 4
+ARMS_BUDGET_SHARE = 0.3       # 예산 중 arm 요약에 쓸 최대 비율 (나머지는 eligibility)
+TRUNCATION_MARK = " ...[truncated]"
+
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def estimate_tokens(text):
+    # tokenizer 없이 대략 4글자 = 1토큰
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def _truncate(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - len(TRUNCATION_MARK))] + TRUNCATION_MARK
+
+
+def _arm_summary(arm):
+    line = f"- [{arm.get('type', '')}] {arm.get('label', '')}"
+    interventions = arm.get('interventionNames')
+    if interventions:
+        line += f" (interventions: {', '.join(map(str, interventions))})"
+    description = (arm.get('description') or "").strip()
+    if description:
+        line += f": {_BLANK_LINES.sub(' ', description)}"
+    return line
+
+
+def compact_description(study_data, token_budget=DEFAULT_TOKEN_BUDGET):
+    """분류에 필요한 모듈만 뽑은 짧은 텍스트 (제목, 질환, arm 요약, eligibility).
+
+    eligibilityCriteria 는 reason 하이라이트를 위해 원문 그대로 두고, 예산을
+    넘으면 arm 요약 -> eligibility 순으로 잘라낸다.
+    """
+    protocol = study_data.get('protocolSection', {})
+    identification = protocol.get('identificationModule', {})
+    conditions = protocol.get('conditionsModule', {}).get('conditions', [])
+    arms = protocol.get('armsInterventionsModule', {}).get('armGroups') or []
+    eligibility = protocol.get('eligibilityModule', {}).get('eligibilityCriteria', "")
+
+    header = "\n".join([
+        f"nctId: {identification.get('nctId', 'NA')}",
+        f"officialTitle: {identification.get('officialTitle', 'NA')}",
+        f"briefTitle: {identification.get('briefTitle', 'NA')}",
+        f"conditions: {', '.join(conditions) if conditions else 'NA'}",
+    ])
+    arms_text = "armGroups:\n" + "\n".join(_arm_summary(arm) for arm in arms) if arms else "armGroups: NA"
+    eligibility_text = f"eligibilityCriteria:\n{eligibility}"
+
+    if token_budget:
+        max_chars = max(0, token_budget * CHARS_PER_TOKEN - len(header) - 2)
+        arms_text = _truncate(arms_text, max(int(max_chars * ARMS_BUDGET_SHARE), max_chars - len(eligibility_text) - 1))
+        eligibility_text = _truncate(eligibility_text, max_chars - len(arms_text) - 1)
+
+    return f"{header}\n{arms_text}\n{eligibility_text}"
+
+
+def build_question(study_data, compact=True, token_budget=DEFAULT_TOKEN_BUDGET, structured=False):
+    if compact:
+        experiment_description = compact_description(study_data, token_budget)
+    else:
+        experiment_description = str(study_data)
+    template = JSON_QUESTION_TEMPLATE if structured else QUESTION_TEMPLATE
+    return template.format(experiment_description=experiment_description)
+
+
+def prompt_token_savings(studies, questions):
+    """전체 repr 프롬프트 대비 실제 프롬프트의 예상 토큰 합계 (before, after)."""
+    before = 0
+    after = 0
+    for study_data, question in zip(studies, questions):
+        if study_data is None or question is None:
+            continue
+        before += estimate_tokens(build_question(study_data, compact=False))
+        after += estimate_tokens(question)
+    return before, after
@@ -0,0 +1,153 @@
+import os
+from dataclasses import dataclass, field, fields
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 처리 결과로 df 에 추가되는 컬럼 (순서 유지)
+RESULT_COLUMNS = [
+    "official_title",
+    "brief_title",
+    "TestLines",
+    "Reason",
+    "Explanation",
+    "Genes",
+    "Confidence_Score",
+    "experimental_data",
+    "experimental_description",
+    "control_datas",
+    "control_description",
+    "study_name",
+    "start_date",
+    "primary_completion_date",
+    "completion_date",
+    "gpt_error",
+    "last_update_posted",   # 처리 시점의 lastUpdatePostDate (증분 처리 기준)
+]
+
+PARQUET_ROW_GROUP = 1000   # ResultWriter 가 한 번에 내려 쓰는 레코드 수
+
+
+@dataclass(slots=True)
+class TrialResult:
+    """trial 한 건의 처리 결과. HTML 은 문자열로 들고 있지 않고
+    아래 렌더링용 필드에서 필요할 때 만든다 (report.render_record_html)."""
+
+    row: int
+    nct_id: str
+    official_title: str = None
+    brief_title: str = None
+    TestLines: str = None
+    Reason: str = None
+    Explanation: str = None
+    Genes: str = None
+    Confidence_Score: str = None
+    experimental_data: str = None
+    experimental_description: str = None
+    control_datas: str = None
+    control_description: str = None
+    study_name: str = None
+    start_date: str = None
+    primary_completion_date: str = None
+    completion_date: str = None
+    gpt_error: str = None
+    last_update_posted: str = None
+    response: str = None
+    # HTML 렌더링용 (study 를 찾지 못한 행은 eligibility_criteria 가 None)
+    arms_json: str = None
+    conditions: str = None
+    eligibility_criteria: str = None
+    reason_parts: str = None
+    highlight_spans: list = field(default_factory=list)   # [[start, end], ...]
+
+    @property
+    def has_study(self):
+        return self.eligibility_criteria is not None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in FIELD_NAMES}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in FIELD_NAMES if name in data})
+
+
+FIELD_NAMES = tuple(f.name for f in fields(TrialResult))
+
+_STRING_FIELDS = [name for name in FIELD_NAMES if name not in ("row", "highlight_spans")]
+RESULT_SCHEMA = pa.schema(
+    [pa.field("row", pa.int64())]
+    + [pa.field(name, pa.string()) for name in _STRING_FIELDS]
+    + [pa.field("highlight_spans", pa.list_(pa.list_(pa.int32())))]
+)
+
+
+def results_table(records):
+    return pa.table({name: [getattr(r, name) for r in records] for name in FIELD_NAMES}, schema=RESULT_SCHEMA)
+
+
+def records_frame(records):
+    """레코드 목록을 row 기준 DataFrame 으로 (RESULT_COLUMNS 등 컬럼 단위 접근용)."""
+    return pd.DataFrame({name: [getattr(r, name) for r in records] for name in FIELD_NAMES})
+
+
+def read_results(path, columns=None, filters=None):
+    """저장된 결과를 pyarrow Table 로. columns 를 주면 그 컬럼만 읽는다.
+
+    이전 버전에서 저장해 없는 컬럼은 null 로 채운다.
+    """
+    available = set(pq.read_schema(path).names)
+    wanted = list(columns) if columns else list(FIELD_NAMES)
+    table = pq.read_table(path, columns=[c for c in wanted if c in available], filters=filters)
+    for name in wanted:
+        if name not in available:
+            table = table.append_column(RESULT_SCHEMA.field(name), pa.nulls(len(table), RESULT_SCHEMA.field(name).type))
+    return table.select(wanted)
+
+
+def read_records(path, filters=None):
+    return [TrialResult(**row) for row in read_results(path, filters=filters).to_pylist()]
+
+
+def write_records(records, path):
+    writer = ResultWriter(path)
+    for record in records:
+        writer.add(record)
+    writer.finish()
+
+
+class ResultWriter:
+    """레코드를 Parquet 파일에 row group 단위로 이어 쓴다.
+
+    완료 전에는 *.part 파일에 쓰고 finish() 에서 최종 이름으로 바꾼다.
+    """
+
+    def __init__(self, path, row_group_size=PARQUET_ROW_GROUP):
+        self.path = path
+        self.row_group_size = row_group_size
+        self._writer = pq.ParquetWriter(path + ".part", RESULT_SCHEMA, compression="zstd")
+        self._buffer = []
+
+    def add(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._writer.write_table(results_table(self._buffer))
+            self._buffer = []
+
+    def finish(self):
+        self._flush()
+        self._writer.close()
+        os.replace(self.path + ".part", self.path)
+
+    def abort(self):
+        try:
+            self._writer.close()
+        except Exception:
+            pass
+        if os.path.exists(self.path + ".part"):
+            os.remove(self.path + ".part")
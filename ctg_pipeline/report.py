@@ -0,0 +1,124 @@
+import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow.parquet as pq
+from jinja2 import Environment
+from markupsafe import Markup, escape
+
+from .records import TrialResult
+
+DEFAULT_RENDER_WORKERS = int(os.getenv("CTG_RENDER_WORKERS", str(os.cpu_count() or 1)))
+MIN_ROWS_PER_WORKER = 20000   # 렌더링은 행당 ~0.1ms 라 이보다 작으면 프로세스 기동 비용이 더 큼
+
+# 모듈 로드 시 한 번만 컴파일. 모든 값은 autoescape 되고, 하이라이트된
+# eligibility 만 render_record_html 에서 직접 escape 한 Markup 으로 넘긴다
+_ENV = Environment(autoescape=True)
+REPORT_TEMPLATE = _ENV.from_string(
+    "<h1>Response</h1>"
+    "<strong>Test:</strong> {{ test }}<br><br>"
+    "<strong>Explanation:</strong> {{ explanation }}<br><br>"
+    "<strong>Genes:</strong> {{ genes }}<br><br>"
+    "<strong>Confidence Score:</strong> {{ confidence }}<br><br>"
+    "<h1>Study Plan</h1>"
+    "<table border='1' style='border-collapse:collapse'>"
+    "<tr><th>label</th><th>type</th><th>description</th><th>others</th></tr>"
+    "{% for arm in arms %}"
+    "<tr><td>{{ arm.label }}</td><td>{{ arm.type }}</td><td>{{ arm.description }}</td>"
+    "<td>{% for other in arm.others %}{% if not loop.first %}<br>{% endif %}{{ other }}{% endfor %}</td></tr>"
+    "{% endfor %}"
+    "</table>"
+    "<h1>Study Data</h1>"
+    "<strong>Official Title:</strong> {{ official_title }}<br><br>"
+    "<strong>Brief Title:</strong> {{ brief_title }}<br><br>"
+    "<strong>Conditions:</strong> {{ conditions }}<br><br>"
+    "<strong>Eligibility Module:</strong><br>{{ criteria }}<br><br>"
+    "<strong>Highlighted Reason from Response:</strong><br>"
+    "{% if reason_parts %}<mark>{{ reason_parts }}</mark>{% else %}N/A{% endif %}"
+)
+
+
+def _arm_rows(arms_data):
+    rows = []
+    for arm in arms_data or []:
+        rows.append({
+            "label": arm.get('label', ''),
+            "type": arm.get('type', ''),
+            "description": arm.get('description', ''),
+            "others": [f"{k}:{v}" for k, v in arm.items() if k not in ['label', 'type', 'description']],
+        })
+    return rows
+
+
+def highlight_markup(text, spans):
+    # 구간 밖/안을 각각 escape 한 뒤 <mark> 로 감싸고 줄바꿈은 <br>
+    parts = []
+    prev = 0
+    for start, end in spans:
+        parts.append(escape(text[prev:start]))
+        parts.append(Markup("<mark>%s</mark>") % text[start:end])
+        prev = end
+    parts.append(escape(text[prev:]))
+    return Markup("").join(parts).replace("\n", Markup("<br>"))
+
+
+def render_record_html(record):
+    """저장된 필드로 결과 HTML 을 만든다. study 를 찾지 못한 행은 None."""
+    if not record.has_study:
+        return None
+    return REPORT_TEMPLATE.render(
+        test=record.TestLines,
+        explanation=record.Explanation,
+        genes=record.Genes,
+        confidence=record.Confidence_Score,
+        arms=_arm_rows(json.loads(record.arms_json) if record.arms_json else None),
+        official_title=record.official_title,
+        brief_title=record.brief_title,
+        conditions=record.conditions,
+        criteria=highlight_markup(record.eligibility_criteria, record.highlight_spans),
+        reason_parts=record.reason_parts,
+    )
+
+
+def _render_row_groups(path, row_groups):
+    # 워커 프로세스용: 결과 Parquet 에서 row group 을 직접 읽어 (파일명, HTML) 목록을 돌려준다
+    parquet = pq.ParquetFile(path)
+    out = []
+    for i in row_groups:
+        for data in parquet.read_row_group(i).to_pylist():
+            record = TrialResult(**data)
+            if record.has_study:
+                out.append((f"{record.nct_id}.html", render_record_html(record)))
+    return out
+
+
+def write_report_zip(results_path, target, workers=DEFAULT_RENDER_WORKERS):
+    """결과 Parquet 의 trial 마다 HTML 을 렌더링해 ZIP 으로. 같은 NCT ID 는 처음 것만.
+
+    행이 많으면 row group 묶음을 여러 프로세스에서 나눠 렌더링한다 (ZIP 순서는 유지).
+    """
+    metadata = pq.ParquetFile(results_path).metadata
+    num_groups = metadata.num_row_groups
+    workers = min(int(workers or 1), metadata.num_rows // MIN_ROWS_PER_WORKER, num_groups)
+
+    if workers > 1:
+        # 연속 구간으로 나눠야 ZIP 순서가 Parquet 순서와 같다
+        size = (num_groups + workers - 1) // workers
+        batches = [list(range(i, min(i + size, num_groups))) for i in range(0, num_groups, size)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            rendered = pool.map(_render_row_groups, [results_path] * len(batches), batches)
+            _write_zip(rendered, target)
+    else:
+        _write_zip((_render_row_groups(results_path, [i]) for i in range(num_groups)), target)
+
+
+def _write_zip(rendered_batches, target):
+    names = set()
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for batch in rendered_batches:
+            for name, html in batch:
+                if name not in names:
+                    names.add(name)
+                    zf.writestr(name, html)
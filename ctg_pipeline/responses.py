@@ -0,0 +1,125 @@
+import json
+import re
+
+import pandas as pd
+
+# ========== GPT 응답 파싱 ========== #
+# JSON 응답 키 -> 결과 컬럼
+RESPONSE_FIELDS = {
+    "test": "TestLines",
+    "reason": "Reason",
+    "explanation": "Explanation",
+    "genes": "Genes",
+    "confidence": "Confidence_Score",
+}
+REQUIRED_KEYS = ("test", "confidence")   # reason 은 "unclear" 일 때 비어 있을 수 있다
+TEST_VALUES = ("first line", "second line", "third line", "neoadjuvant", "adjuvant", "unclear")
+CONFIDENCE_VALUES = ("certain", "uncertain")
+
+# json_object 모드로 요청 (응답이 항상 JSON 객체)
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# 번호 형식 응답: 줄 맨 앞의 "2. reason:" 처럼 번호 + 라벨로 나눈다.
+# reason 이 인용한 eligibility 의 "1. ..." 목록은 항목으로 보지 않는다.
+_LABELS = r"(test|reason|explanations?|genes|confidence score)"
+_LABELED_ITEM = re.compile(r"^\s*([1-5])\.\s*" + _LABELS + r"\s*:\s*", re.MULTILINE | re.IGNORECASE)
+_NUMBERED_ITEM = re.compile(r"^\s*([1-5])\.\s*", re.MULTILINE)
+_ITEM_LABEL = re.compile(r"^" + _LABELS + r"\s*:\s*", re.IGNORECASE)
+_NUMBERED_KEYS = dict(zip("12345", RESPONSE_FIELDS))
+_KEY_ALIASES = {"explanations": "explanation", "confidence score": "confidence", "confidence_score": "confidence"}
+
+
+def _normalize_genes(value):
+    if isinstance(value, list):
+        return ", ".join(map(str, value))
+    return value
+
+
+def load_json_response(text):
+    """JSON 응답을 {키: 값} 으로. 형식이 맞지 않으면 ValueError."""
+    try:
+        data = json.loads(text, strict=False)   # 문자열 안의 줄바꿈 허용
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"invalid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise ValueError("response is not a JSON object")
+    # 키 대소문자나 "explanations" 같은 표기 차이는 허용
+    data = {_KEY_ALIASES.get(k.strip().lower(), k.strip().lower()): v for k, v in data.items()}
+    missing = [key for key in REQUIRED_KEYS if not data.get(key)]
+    if missing:
+        raise ValueError(f"missing keys: {', '.join(missing)}")
+    test = str(data["test"]).strip().lower()
+    if test not in TEST_VALUES:
+        raise ValueError(f"unexpected test value: {data['test']!r}")
+    confidence = str(data["confidence"]).strip().lower()
+    if confidence not in CONFIDENCE_VALUES:
+        raise ValueError(f"unexpected confidence value: {data['confidence']!r}")
+    parsed = {key: data.get(key) for key in RESPONSE_FIELDS}
+    parsed["genes"] = _normalize_genes(parsed["genes"])
+    return parsed
+
+
+def validate_json_response(text):
+    """classify 재시도 판단용: 형식이 맞으면 None, 아니면 사유."""
+    try:
+        load_json_response(text)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _split_numbered(text):
+    """번호 형식 응답을 {키: 내용} 으로.
+
+    라벨이 붙은 번호("1. test:")가 있으면 그 줄에서만 나누고, 라벨이 없는 응답은
+    1 부터 차례대로 나오는 번호만 항목의 시작으로 본다 (각 번호는 한 번만).
+    """
+    labeled = list(_LABELED_ITEM.finditer(text))
+    starts = []   # (키, 줄 시작, 내용 시작)
+    last = 0
+    for m in labeled or _NUMBERED_ITEM.finditer(text):
+        number = int(m.group(1))
+        if labeled and number > last:
+            label = m.group(2).lower()
+            starts.append((_KEY_ALIASES.get(label, label), m.start(), m.end()))
+        elif not labeled and number == last + 1:
+            starts.append((_NUMBERED_KEYS[m.group(1)], m.start(), m.end()))
+        else:
+            continue
+        last = number
+    items = {}
+    for i, (key, _, begin) in enumerate(starts):
+        end = starts[i + 1][1] if i + 1 < len(starts) else len(text)
+        items.setdefault(key, _ITEM_LABEL.sub("", text[begin:end].strip(), count=1))
+    return items
+
+
+def parse_responses(texts, structured=True):
+    """응답 목록을 RESPONSE_FIELDS 컬럼의 DataFrame 으로 (행 순서 유지).
+
+    structured=True 면 JSON, 아니면 번호 형식. 빈 응답이나 형식이 맞지 않는
+    응답의 행은 모두 None. 값 정리는 컬럼 단위로 한 번에 한다.
+    """
+    texts = pd.Series(list(texts), dtype=object)
+    if structured:
+        def load(text):
+            try:
+                return load_json_response(text)
+            except ValueError:
+                return {}
+    else:
+        def load(text):
+            return _split_numbered(text)
+    present = texts.notna() & (texts.astype(str) != "")
+    items = texts[present].map(load)
+    frame = pd.DataFrame.from_records(items.tolist(), index=items.index, columns=list(RESPONSE_FIELDS))
+    frame = frame.reindex(texts.index)
+
+    strings = frame.astype(object).where(frame.notna(), None)
+    for key in RESPONSE_FIELDS:
+        values = strings[key].dropna().astype(str).str.strip()
+        strings[key] = values.where(values != "").reindex(strings.index)
+    for key in ("test", "confidence"):
+        strings[key] = strings[key].str.lower()
+    strings = strings.astype(object).where(strings.notna(), None)
+    return strings.rename(columns=RESPONSE_FIELDS)
@@ -0,0 +1,135 @@
+import re
+from dataclasses import dataclass
+
+# ========== 규칙 기반 사전 분류 ========== #
+# 제목에 치료 단계가 그대로 적힌 trial 은 GPT 없이 분류한다.
+# 분류는 제목에서만 정하고 (eligibility 에는 이전/제외 치료도 적혀 있으므로),
+# eligibility 는 애매한 표현이나 다른 분류가 있는지 확인하는 데만 쓴다.
+
+# 그룹 이름 -> TestLines 값 (GPT 응답과 같은 표현)
+CATEGORY_LABELS = {
+    "neoadjuvant": "neoadjuvant",
+    "adjuvant": "adjuvant",
+    "first_line": "first line",
+    "second_line": "second line",
+    "third_line": "third line",
+}
+# 어디서든 나오면 GPT 로 보내는 표현
+AMBIGUOUS_GROUPS = ("pretreated", "perioperative", "other_setting")
+# 제목에 있으면 (neo)adjuvant 분류와 맞지 않는 표현 (전이/진행성 질환)
+ADVANCED_GROUP = "advanced"
+PERI_SURGICAL = ("neoadjuvant", "adjuvant")
+
+_SETTING = r"(?:neo-?\s?adjuvant|adjuvant)"
+_PATTERNS = [
+    # "no prior therapy" 는 이전 치료를 뜻하지 않으므로 먼저 소비하고 무시한다
+    ("negated_prior", r"no prior (?:systemic |anti-?cancer )?(?:therapy|treatment|chemotherapy)"),
+    # 이전에 받은 / 대상이 아닌 (neo)adjuvant 치료: "prior adjuvant therapy allowed",
+    # "received adjuvant chemotherapy", "not a candidate for neoadjuvant therapy"
+    (
+        "other_setting",
+        r"(?:prior|previous(?:ly)?|received|receiving|completed|completing|completion of|history of"
+        r"|after|following|candidate for|eligible for|ineligible for)"
+        r"\s+(?:[\w-]+\s+){0,3}?" + _SETTING,
+    ),
+    ("neoadjuvant", r"neo-?\s?adjuvant"),
+    ("perioperative", r"peri-?operative"),
+    ("adjuvant", r"adjuvant"),
+    ("first_line", r"(?:first|1st|front)[- ]?line|previously[- ]untreated|(?:treatment|chemotherapy)[- ]na[iï]ve"),
+    ("second_line", r"(?:second|2nd)[- ]?line"),
+    ("third_line", r"(?:third|3rd)[- ]?line"),
+    (
+        "pretreated",
+        r"previously[- ]treated|pre-?treated|refractory|relapsed|recurrent"
+        r"|progress(?:ed|ion) (?:on|after|following|during)|after failure|failed"
+        r"|prior (?:systemic |anti-?cancer )?(?:therapy|treatment|chemotherapy|lines?)",
+    ),
+    ("advanced", r"metastatic|advanced|unresectable|stage (?:iv|4)"),
+]
+RULE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in _PATTERNS) + r")\b",
+    re.IGNORECASE
+)
+EXCLUSION_HEADER = re.compile(r"exclusion criteria", re.IGNORECASE)
+RULE_CONFIDENCE = "certain"
+
+
+@dataclass
+class RuleMatch:
+    test: str          # TestLines
+    reason: str        # 근거가 된 eligibility 줄 (없으면 제목)
+    explanation: str
+    confidence: str = RULE_CONFIDENCE
+
+
+def _line_at(text, pos):
+    start = text.rfind("\n", 0, pos) + 1
+    end = text.find("\n", pos)
+    return text[start:end if end != -1 else len(text)].strip()
+
+
+def classify_by_rules(study_data):
+    """분명한 경우에만 RuleMatch, 아니면 None (GPT 로 보낸다).
+
+    제목에서 찾은 분류가 하나뿐이고, 제목과 eligibility 어디에도 애매한 표현
+    (이전 치료, 재발/불응, perioperative, 이전에 받은/대상이 아닌 (neo)adjuvant)이 없고,
+    eligibility 에 다른 분류나 제외 기준 안의 언급이 없을 때만 결정한다.
+    """
+    protocol = study_data.get('protocolSection', {})
+    identification = protocol.get('identificationModule', {})
+    titles = [
+        ("officialTitle", identification.get('officialTitle') or ""),
+        ("briefTitle", identification.get('briefTitle') or ""),
+    ]
+    eligibility = protocol.get('eligibilityModule', {}).get('eligibilityCriteria') or ""
+
+    found = {}   # 분류 그룹 -> [(필드 이름, 제목, 매칭 문자열), ...]
+    advanced_title = False
+    for field_name, text in titles:
+        for m in RULE_PATTERN.finditer(text):
+            group = m.lastgroup
+            if group in AMBIGUOUS_GROUPS:
+                return None
+            if group == ADVANCED_GROUP:
+                advanced_title = True
+            elif group in CATEGORY_LABELS:
+                found.setdefault(group, []).append((field_name, text, m.group()))
+    if len(found) != 1:
+        return None
+    group, matches = next(iter(found.items()))
+    if advanced_title and group in PERI_SURGICAL:
+        return None
+
+    exclusion = EXCLUSION_HEADER.search(eligibility)
+    exclusion_start = exclusion.start() if exclusion else len(eligibility)
+    reason_pos = None
+    for m in RULE_PATTERN.finditer(eligibility):
+        other = m.lastgroup
+        if other in AMBIGUOUS_GROUPS:
+            return None
+        if other in CATEGORY_LABELS:
+            # 다른 분류가 있거나 제외 기준에서 언급되면 결정하지 않는다
+            if other != group or m.start() >= exclusion_start:
+                return None
+            if reason_pos is None:
+                reason_pos = m.start()
+
+    field_name, title, matched = matches[0]
+    # reason 은 하이라이트되도록 eligibility 의 해당 줄을 우선 쓴다
+    reason = _line_at(eligibility, reason_pos) if reason_pos is not None else title
+    return RuleMatch(
+        test=CATEGORY_LABELS[group],
+        reason=reason,
+        explanation=f"Rule-based: '{matched}' in {field_name}, no conflicting line-of-therapy terms."
+    )
+
+
+def estimate_time_saved(hits, report, workers):
+    """규칙으로 건너뛴 GPT 요청에 걸렸을 예상 시간 (초).
+
+    이번 실행의 평균 GPT 요청 시간 x 건수 / 동시 요청 수. 요청이 없었으면 0.
+    """
+    request = report.get("stages", {}).get("openai_request")
+    if not hits or not request or not request["count"]:
+        return 0.0
+    return hits * request["mean"] / max(1, int(workers))
@@ -0,0 +1,186 @@
+import re
+
+DEFAULT_MIN_SPAN = 20   # fuzzy 하이라이트에서 인정할 최소 일치 길이 (정규화된 글자 수)
+DEFAULT_MAX_SPANS = 5
+
+# 정규화 시 공백으로 취급할 글머리표 문자
+_BULLET_CHARS = set("*-•·●▪◦–—")
+
+
+class SuffixAutomaton:
+    """text 의 suffix automaton. 구축 O(len(text)), 패턴 스캔 O(len(pattern))."""
+
+    __slots__ = ("link", "length", "next", "first_end")
+
+    def __init__(self, text):
+        link = [-1]
+        length = [0]
+        nxt = [{}]
+        first_end = [-1]   # 해당 상태 문자열이 text 에서 처음 끝나는 위치
+        last = 0
+        for pos, ch in enumerate(text):
+            cur = len(length)
+            length.append(length[last] + 1)
+            link.append(-1)
+            nxt.append({})
+            first_end.append(pos)
+            p = last
+            while p != -1 and ch not in nxt[p]:
+                nxt[p][ch] = cur
+                p = link[p]
+            if p == -1:
+                link[cur] = 0
+            else:
+                q = nxt[p][ch]
+                if length[p] + 1 == length[q]:
+                    link[cur] = q
+                else:
+                    clone = len(length)
+                    length.append(length[p] + 1)
+                    link.append(link[q])
+                    nxt.append(nxt[q].copy())
+                    first_end.append(first_end[q])
+                    while p != -1 and nxt[p].get(ch) == q:
+                        nxt[p][ch] = clone
+                        p = link[p]
+                    link[q] = clone
+                    link[cur] = clone
+            last = cur
+        self.link = link
+        self.length = length
+        self.next = nxt
+        self.first_end = first_end
+
+    def longest_match(self, pattern):
+        """pattern 과 text 의 최장 공통 부분 문자열.
+
+        (길이, pattern 내 끝 위치, text 내 끝 위치) 를 반환하며, 같은 길이가 여럿이면
+        pattern 에서 가장 앞에 있는 것을 고른다. 일치가 없으면 None.
+        """
+        link, length, nxt, first_end = self.link, self.length, self.next, self.first_end
+        state = 0
+        cur_len = 0
+        best = None
+        for i, ch in enumerate(pattern):
+            while state and ch not in nxt[state]:
+                state = link[state]
+                cur_len = length[state]
+            if ch in nxt[state]:
+                state = nxt[state][ch]
+                cur_len += 1
+            else:
+                state = 0
+                cur_len = 0
+            if cur_len and (best is None or cur_len > best[0]):
+                best = (cur_len, i, first_end[state])
+        return best
+
+
+def find_common_substring(s1, s2):
+    # s1 의 부분 문자열 중 s2 에도 있는 가장 긴 것 (동률이면 s1 에서 가장 앞)
+    if not s1 or not s2:
+        return ""
+    match = SuffixAutomaton(s2).longest_match(s1)
+    if match is None:
+        return ""
+    match_len, end, _ = match
+    return s1[end - match_len + 1:end + 1]
+
+def _is_separator(ch):
+    return ch.isspace() or ch in _BULLET_CHARS
+
+def _normalize(text):
+    # 소문자화 + 공백/글머리표 연속을 공백 하나로. 원문 위치 매핑도 함께 반환
+    # ('İ'.lower() 처럼 두 글자가 되는 문자도 있어, 나온 글자 수만큼 같은 위치를 넣는다)
+    chars = []
+    positions = []
+    for pos, ch in enumerate(text):
+        if _is_separator(ch):
+            if chars and chars[-1] == " ":
+                continue
+            ch = " "
+        lowered = ch.lower()
+        chars.append(lowered)
+        positions.extend([pos] * len(lowered))
+    return "".join(chars), positions
+
+def find_highlight_spans(quote, text, min_length=DEFAULT_MIN_SPAN, max_spans=DEFAULT_MAX_SPANS):
+    """GPT 가 인용한 quote 를 text 에 맞춰 여러 구간으로 정렬한 (start, end) 목록.
+
+    공백/줄바꿈/글머리표 차이는 무시하고, 가장 긴 일치부터 차례로 떼어 낸다.
+    """
+    if not quote or not text:
+        return []
+    norm_text, text_positions = _normalize(text)
+    norm_quote, _ = _normalize(quote)
+    automaton = SuffixAutomaton(norm_text)
+
+    spans = []
+    pending = [(0, len(norm_quote))]   # 아직 맞추지 못한 quote 구간
+    while pending and len(spans) < max_spans:
+        best = None
+        for seg_start, seg_end in pending:
+            match = automaton.longest_match(norm_quote[seg_start:seg_end])
+            if match and (best is None or match[0] > best[0][0]):
+                best = (match, (seg_start, seg_end))
+        if best is None or best[0][0] < min_length:
+            break
+
+        (match_len, quote_end, text_end), (seg_start, seg_end) = best
+        quote_start = seg_start + quote_end - match_len + 1
+        pending.remove((seg_start, seg_end))
+        for part in ((seg_start, quote_start), (quote_start + match_len, seg_end)):
+            if part[1] - part[0] >= min_length:
+                pending.append(part)
+
+        start = text_positions[text_end - match_len + 1]
+        end = text_positions[text_end] + 1
+        while start < end and _is_separator(text[start]):
+            start += 1
+        while end > start and _is_separator(text[end - 1]):
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+
+    # 겹치는 구간 병합
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def extract_last_in_brackets(text):
+    matches = re.findall(r"\(([^)]+)\)", text)
+    if matches:
+        return matches[-1]
+    return None
+
+def find_substring_spans(text, substring):
+    # text.replace(substring, ...) 가 바꾸는 위치 (왼쪽부터, 겹치지 않게)
+    if not substring:
+        return []
+    spans = []
+    start = text.find(substring)
+    while start != -1:
+        spans.append((start, start + len(substring)))
+        start = text.find(substring, start + len(substring))
+    return spans
+
+def highlight_substring(text, substring):
+    if not substring:
+        return text
+    return text.replace(substring, f"<mark>{substring}</mark>")
+
+def highlight_spans(text, spans):
+    if not spans:
+        return text
+    parts = []
+    prev = 0
+    for start, end in spans:
+        parts.append(text[prev:start])
+        parts.append(f"<mark>{text[start:end]}</mark>")
+        prev = end
+    parts.append(text[prev:])
+    return "".join(parts)
@@ -1,163 +1,279 @@
 import streamlit as st
 import pandas as pd
-import requests
-import openai
 import os
-import io
-import zipfile
-import base64
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.shapes import MSO_AUTO_SHAPE_TYPE
-from pptx.dml.color import RGBColor
-from openai import OpenAI
-
-# ========== 환경설정 ========== #
-# [주의] 실제 사용 시에는 아래처럼 직접 키를 하드코딩하지 말고,
-#       환경변수(os.getenv)나 st.secrets 등을 사용하세요.
-openai.api_key = st.secrets["openai"]["api_key"]
-client = OpenAI(api_key=openai.api_key)
-
-# --------------------- 세션 스테이트 초기화 --------------------- #
-if "processed_df" not in st.session_state:
-    st.session_state["processed_df"] = None
-if "html_contents" not in st.session_state:
-    st.session_state["html_contents"] = {}
-if "gemini_responses" not in st.session_state:
-    st.session_state["gemini_responses"] = {}
+import json
+import hashlib
+
+from ctg_pipeline.classify import DEFAULT_RPM, DEFAULT_TPM, DEFAULT_WORKERS
+from ctg_pipeline.fetch import DEFAULT_CONCURRENCY
+from ctg_pipeline.incremental import baseline_columns
+from ctg_pipeline.ingest import NCT_COLUMN, read_columns, read_header
+from ctg_pipeline.jobs import (
+    ACTIVE_STATUSES,
+    CANCELLED,
+    DONE,
+    EXCEL_FILE,
+    FAILED,
+    ZIP_FILE,
+    JobManager,
+)
+from ctg_pipeline.metrics import stage_table
+from ctg_pipeline.pipeline import PipelineOptions, apply_records
+from ctg_pipeline.records import RESULT_COLUMNS
+from ctg_pipeline.report import render_record_html
+from ctg_pipeline.ppt import create_ppt_from_dfs, partition_groups
+from ctg_pipeline.prompt import DEFAULT_TOKEN_BUDGET
+
+# 리런 사이에 재사용하는 파생 데이터 (업로드 내용 해시 / 작업 id 기준 캐시)
+VIEW_CACHE_ENTRIES = 16
+VIEW_CACHE_TTL = 60 * 60
+PREVIEW_CATEGORIES = 20  # PPT 탭 미리보기에 보여줄 최대 카테고리 수
 
 # ---------------------------------------------------------------------------- #
 #                             헬퍼 함수 (Utilities)                            #
 # ---------------------------------------------------------------------------- #
 
-def find_common_substring(s1, s2):
-    if not s1 or not s2:
-        return ""
-    max_len = min(len(s1), len(s2))
-    longest_common_substr = ""
-    for length in range(max_len, 0, -1):
-        for start1 in range(len(s1) - length + 1):
-            substr1 = s1[start1:start1 + length]
-            for start2 in range(len(s2) - length + 1):
-                substr2 = s2[start2:start2 + length]
-                if substr1 == substr2:
-                    return substr1
-    return ""
-
-def extract_last_in_brackets(text):
-    import re
-    matches = re.findall(r"\(([^)]+)\)", text)
-    if matches:
-        return matches[-1]
-    return None
-
-def highlight_substring(text, substring):
-    if not substring:
-        return text
-    return text.replace(substring, f"<mark>{substring}</mark>")
-
 def truncate_text(x, max_len=20):
     if isinstance(x, str) and len(x) > max_len:
         return x[:max_len] + "..."
     return x
 
-def read_excel_bytes(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name="Sheet1")
-    return output.getvalue()
-
-def zip_html_files(html_dict):
-    output = io.BytesIO()
-    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for fname, html_str in html_dict.items():
-            if html_str is None:
-                continue
-            zf.writestr(fname, html_str)
-    return output.getvalue()
-
-def create_ppt_from_dfs(
-    df_list_dict,       # {"category": DataFrame, ...}
-    common_title,       # 공통 슬라이드 제목
-    selected_columns,   # PPT에 표시할 컬럼 목록
-    rows_per_slide=6,
-    col_widths=None     # { "컬럼명": 퍼센트(0~100), ... }
-):
-    prs = Presentation()
-    slide_width_in_EMU = prs.slide_width  # 기본 10인치 = 9,144,000 EMU
-
-    title_slide_layout = prs.slide_layouts[5]  # "Title and Content"
-
-    margin_in_inches = 0.5
-    margin_in_EMU = int(margin_in_inches * 914400)
-    table_width_in_EMU = slide_width_in_EMU - (2 * margin_in_EMU)
-
-    for category_name, df_data in df_list_dict.items():
-        if df_data.empty:
+def truncate_frame(df, max_len=20):
+    # truncate_text 와 같은 결과를 컬럼 단위 벡터 연산으로 (문자열 셀만 자름)
+    df_display = df.copy()
+    for c in df_display.columns:
+        col = df_display[c]
+        try:
+            lengths = col.str.len()
+        except AttributeError:
             continue
+        long_mask = (lengths > max_len).fillna(False).astype(bool)
+        if col.dtype == object:
+            long_mask &= col.map(lambda x: isinstance(x, str))
+        if long_mask.any():
+            df_display.loc[long_mask, c] = col[long_mask].str.slice(0, max_len) + "..."
+    return df_display
+
+def content_hash(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, ttl=VIEW_CACHE_TTL, show_spinner=False)
+def upload_header(upload_hash, file_name, _data):
+    # 컬럼 선택용: 데이터 행은 읽지 않고 헤더만
+    return read_header(_data, file_name)
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, ttl=VIEW_CACHE_TTL, show_spinner=False)
+def read_upload(upload_hash, file_name, columns, categorical, _data):
+    # 내용 해시 + 컬럼이 같으면 다시 파싱하지 않음 (_data 는 캐시 키에서 제외)
+    # 필요한 컬럼만 chunk 단위로, 문자열은 pyarrow string / 그룹 컬럼은 category 로 읽는다
+    return read_columns(_data, file_name, list(columns), categorical=categorical)
+
+def load_upload(uploaded_file, columns, categorical=()):
+    return read_upload(
+        content_hash(uploaded_file), uploaded_file.name, tuple(columns), tuple(categorical), uploaded_file.getvalue()
+    )
+
+def load_upload_header(uploaded_file):
+    return upload_header(content_hash(uploaded_file), uploaded_file.name, uploaded_file.getvalue())
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, ttl=VIEW_CACHE_TTL, show_spinner=False)
+def job_view(job_id, finished):
+    # 완료된 작업의 표시용 데이터. finished(완료 시각)가 키에 들어가므로
+    # 같은 작업이 다시 실행되면 자동으로 새로 계산된다
+    store = get_job_manager().store
+    # HTML 렌더링용 필드는 읽지 않는다 (표시에 필요한 컬럼만)
+    results = store.load_results(job_id, ["row", "nct_id", "response", *RESULT_COLUMNS])
+    processed_df = apply_records(store.load_input(job_id), results)
+    responses = results["response"].dropna()
+    trials = dict(zip(results["row"].tolist(), results["nct_id"].tolist()))
+    return truncate_frame(processed_df), responses[responses != ""].tolist(), trials
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES * 8, ttl=VIEW_CACHE_TTL, show_spinner=False)
+def trial_report_html(job_id, finished, row):
+    # 선택한 trial 의 리포트만 그때 렌더링
+    record = get_job_manager().store.load_record(job_id, row)
+    return render_record_html(record) if record is not None else None
+
+def ppt_groups(df_ppt, grouping_col, sort_groups, max_groups, max_rows):
+    # 카테고리별 DataFrame 을 한 번의 정렬로 차례대로 (0 = 제한 없음)
+    return partition_groups(
+        df_ppt,
+        grouping_col if grouping_col != "None" else None,
+        sort=sort_groups,
+        max_groups=max_groups or None,
+        max_rows=max_rows or None
+    )
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, ttl=VIEW_CACHE_TTL, show_spinner=False)
+def build_ppt(
+    upload_hash, grouping_col, common_title, selected_columns, rows_per_slide, col_widths, workers,
+    sort_groups, max_groups, max_rows, _df_ppt
+):
+    # 같은 업로드 + 같은 설정이면 PPT 를 다시 만들지 않음
+    ppt_io = create_ppt_from_dfs(
+        df_list_dict=ppt_groups(_df_ppt, grouping_col, sort_groups, max_groups, max_rows),
+        common_title=common_title,
+        selected_columns=selected_columns,
+        rows_per_slide=rows_per_slide,
+        col_widths=col_widths,
+        workers=workers
+    )
+    return ppt_io.getvalue()
+
+def file_reader(path):
+    # download_button 에 넘기는 지연 로더: 리런마다 파일 전체를 읽지 않도록
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+def get_api_key():
+    # ========== 환경설정 ========== #
+    # [주의] 키를 코드에 하드코딩하지 말고 st.secrets 나 OPENAI_API_KEY 환경변수를 사용하세요.
+    # import 시점이 아니라 작업 관리자를 만들 때 읽는다
+    try:
+        return st.secrets["openai"]["api_key"]
+    except (KeyError, FileNotFoundError):
+        return os.getenv("OPENAI_API_KEY")
+
+@st.cache_resource
+def get_job_manager():
+    # 서버 프로세스당 하나의 워커 풀을 모든 세션이 공유
+    return JobManager(api_key=get_api_key())
+
+@st.fragment(run_every=2)
+def job_progress_panel(job_manager, job_id):
+    job = job_manager.store.get(job_id)
+    if job["status"] not in ACTIVE_STATUSES:
+        # 끝났으면 전체 화면을 다시 그려 결과/다운로드를 표시
+        st.rerun()
+
+    st.progress(
+        job["done"] / max(job["total"], 1),
+        text=f"Job {job_id}: {job['status']} ({job['done']}/{job['total']})"
+    )
+    records = job_manager.store.load_records(job_id)
+    if records:
+        df = job_manager.store.load_input(job_id)
+        done_rows = sorted(r.row for r in records)
+        st.dataframe(truncate_frame(apply_records(df, records).iloc[done_rows]))
+    if st.button("작업 취소", key=f"cancel_{job_id}"):
+        job_manager.cancel(job_id)
+        st.rerun()
+
+def run_report_panel(job_id, report):
+    # 단계별 소요 시간 / HTTP 상태 / 재시도 / 토큰 / 캐시 카운터 요약
+    with st.expander("실행 리포트 (성능)"):
+        counters = report.get("counters", {})
+        col1, col2, col3 = st.columns(3)
+        col1.metric("전체 소요 시간", f"{report.get('elapsed', 0):.1f}s")
+        col2.metric("처리 행", counters.get("rows", 0))
+        col3.metric("GPT 재시도", counters.get("openai.retries", 0))
+
+        stages = stage_table(report)
+        if stages:
+            st.dataframe(pd.DataFrame(stages), hide_index=True)
+            stage = st.selectbox("지연 시간 분포", [row["stage"] for row in stages], key=f"hist_{job_id}")
+            histogram = report["stages"][stage]["histogram"]
+            st.bar_chart(pd.Series(histogram, name="count"))
+        if counters:
+            st.dataframe(
+                pd.DataFrame({"counter": list(counters), "value": list(counters.values())}),
+                hide_index=True
+            )
 
-        df_data = df_data[selected_columns]
-        total_rows = len(df_data)
-        num_splits = (total_rows + rows_per_slide - 1) // rows_per_slide
-
-        for idx in range(num_splits):
-            slide = prs.slides.add_slide(title_slide_layout)
-            shapes = slide.shapes
-
-            title_shape = shapes.title
-            if not title_shape:
-                title_shape = shapes.add_textbox(
-                    margin_in_EMU, margin_in_EMU,
-                    slide_width_in_EMU - 2*margin_in_EMU,
-                    int(0.5 * 914400)
-                )
+        st.download_button(
+            label="Download Run Report (JSON)",
+            data=json.dumps(report, ensure_ascii=False, indent=2),
+            file_name=f"run_report_{job_id}.json",
+            mime="application/json"
+        )
+
+def show_job_results(job_manager, job):
+    display_df, responses, trials = job_view(job["id"], job["finished"])
+    stats = job["stats"]
+    st.dataframe(display_df)
+
+    cache_stats = stats.get("cache")
+    if cache_stats:
+        st.caption(
+            f"Cache — study: {cache_stats['study']['hits']} hit / {cache_stats['study']['misses']} miss, "
+            f"GPT: {cache_stats['completion']['hits']} hit / {cache_stats['completion']['misses']} miss"
+        )
+
+    incremental = stats.get("incremental")
+    if incremental and (incremental.get("reuse") or incremental.get("rebuild")):
+        st.caption(
+            f"증분 처리 — 재사용: {incremental['reuse']:,}, 분류 결과 재사용(재조회): {incremental['rebuild']:,}, "
+            f"새로 처리: {incremental['processed']:,}"
+        )
+
+    rules = stats.get("rules")
+    if rules and rules.get("checked"):
+        st.caption(
+            f"규칙 기반 분류 — {rules['hits']:,}/{rules['checked']:,} "
+            f"({rules['hits'] / rules['checked'] * 100:.0f}%) GPT 생략, "
+            f"절약: 약 {rules.get('seconds_saved', 0):.0f}s, 프롬프트 {rules['prompt_tokens_saved']:,} 토큰 (est.)"
+        )
+
+    before_tokens = stats.get("prompt_tokens_before", 0)
+    after_tokens = stats.get("prompt_tokens_after", 0)
+    if before_tokens:
+        st.caption(
+            f"Prompt tokens (est.) — before: {before_tokens:,}, after: {after_tokens:,} "
+            f"({(1 - after_tokens / before_tokens) * 100:.0f}% saved)"
+        )
+
+    # Excel 다운로드 (작업이 처리 중에 써 둔 파일, 버튼을 누를 때만 읽음)
+    st.download_button(
+        label="Download Updated Data (Excel)",
+        data=file_reader(job_manager.store.path(job["id"], EXCEL_FILE)),
+        file_name="updated_ctg_studies.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    # HTML(zip) 다운로드
+    st.download_button(
+        label="Download HTML Files",
+        data=file_reader(job_manager.store.path(job["id"], ZIP_FILE)),
+        file_name="html_files.zip",
+        mime="application/zip"
+    )
+
+    if stats.get("metrics"):
+        run_report_panel(job["id"], stats["metrics"])
+
+    # Trial 별 HTML 리포트 (ZIP 을 받지 않아도 선택한 trial 만 바로 확인)
+    st.subheader("Trial Report")
+    if trials:
+        row = st.selectbox(
+            "Trial 선택",
+            sorted(trials),
+            format_func=lambda r: f"{r + 1}: {trials[r]}",
+            key=f"trial_{job['id']}"
+        )
+        html = trial_report_html(job["id"], job["finished"], row)
+        if html:
+            # 리포트에는 GPT 응답이 들어가므로 iframe 대신 sanitize 되는 st.html 사용
+            with st.container(height=600):
+                st.html(html)
+        else:
+            st.info("ClinicalTrials.gov 에서 찾지 못한 trial 이라 리포트가 없습니다.")
 
-            slide_title = f"{common_title} - {category_name}"
-            if num_splits > 1:
-                slide_title += f" (page {idx+1})"
-            title_shape.text = slide_title
-
-            left = margin_in_EMU
-            top = int(1.5 * 914400)
-            table_height_in_EMU = int(5 * 914400)
-
-            df_chunk = df_data.iloc[idx*rows_per_slide : (idx+1)*rows_per_slide]
-            rows = len(df_chunk) + 1
-            cols = len(selected_columns)
-
-            table = shapes.add_table(rows, cols, left, top, table_width_in_EMU, table_height_in_EMU).table
-
-            # 헤더
-            for c, col_name in enumerate(selected_columns):
-                cell = table.cell(0, c)
-                cell.text = col_name
-                paragraph = cell.text_frame.paragraphs[0]
-                run = paragraph.runs[0]
-                run.font.bold = True
-                run.font.size = Pt(12)
-
-            # 실제 데이터
-            for r in range(len(df_chunk)):
-                for c, col_name in enumerate(selected_columns):
-                    val = df_chunk.iloc[r][col_name]
-                    val_str = "" if pd.isnull(val) else str(val)
-                    table.cell(r+1, c).text = val_str
-
-            # 열 너비 (%)
-            for c, col_name in enumerate(selected_columns):
-                if col_widths and (col_name in col_widths):
-                    col_percent = col_widths[col_name] / 100.0
-                else:
-                    col_percent = 1.0 / cols
-                col_emu_width = int(table_width_in_EMU * col_percent)
-                table.columns[c].width = col_emu_width
-
-    ppt_io = io.BytesIO()
-    prs.save(ppt_io)
-    ppt_io.seek(0)
-    return ppt_io
+    # GPT Raw Response
+    st.subheader("GPT Response")
+    if not responses:
+        st.write("No responses available.")
+    else:
+        st.write("\n\n".join(responses))
 
 def main():
+    # --------------------- 세션 스테이트 초기화 --------------------- #
+    if "job_id" not in st.session_state:
+        st.session_state["job_id"] = None
+    if "ppt_args" not in st.session_state:
+        st.session_state["ppt_args"] = None
+
     st.title("Clinical Trial Data Processor")
 
     tab1, tab2 = st.tabs(["Upload and Process", "Select Rows and Generate PPT"])
@@ -166,321 +282,127 @@ def main():
         st.header("1) CSV 업로드 후 처리하기")
 
         uploaded_file = st.file_uploader("CSV 파일 업로드", type=["csv"])
+        job_manager = get_job_manager()
+        with st.expander("처리 옵션"):
+            concurrency = st.number_input(
+                "ClinicalTrials.gov 동시 요청 수",
+                min_value=1,
+                max_value=32,
+                value=DEFAULT_CONCURRENCY,
+                step=1
+            )
+            gpt_workers = st.number_input("GPT 동시 요청 수", min_value=1, max_value=32, value=DEFAULT_WORKERS, step=1)
+            # 계정 전체 예산: 동시에 도는 작업들이 나눠 쓴다 (jobs.worker_options)
+            gpt_rpm = st.number_input(
+                "GPT 분당 요청 수 (RPM, 동시 작업이 나눠 씀)", min_value=1, value=DEFAULT_RPM, step=50
+            )
+            gpt_tpm = st.number_input(
+                "GPT 분당 토큰 수 (TPM, 동시 작업이 나눠 씀)", min_value=1000, value=DEFAULT_TPM, step=10000
+            )
+            compact_prompt = st.checkbox("간결한 프롬프트 사용 (필요한 모듈만 전송)", value=True)
+            token_budget = st.number_input(
+                "프롬프트 토큰 예산 (study 설명 부분)",
+                min_value=200,
+                value=DEFAULT_TOKEN_BUDGET,
+                step=100,
+                disabled=not compact_prompt
+            )
+            fuzzy_highlight = st.checkbox("Reason 하이라이트에 공백/글머리표 차이 무시 (여러 구간)", value=False)
+            rule_classifier = st.checkbox(
+                "규칙 기반 사전 분류 (제목에 neoadjuvant, adjuvant, first-line 등이 분명하면 GPT 생략, 실험적)",
+                value=False
+            )
+            structured_output = st.checkbox("JSON 형식 응답 사용 (형식이 틀린 응답만 다시 요청)", value=True)
+
+        with st.expander("증분 처리 (이전 결과 재사용)"):
+            st.caption(
+                "이전 결과와 비교해 lastUpdatePostDate 가 바뀌었거나 새로 추가된 trial 만 "
+                "다시 조회/분류합니다. 이전 작업 또는 'Download Updated Data' 로 받은 Excel 중 하나를 선택하세요."
+            )
+            done_jobs = {job["id"]: job for job in job_manager.store.list() if job["status"] == DONE}
+            baseline_job_id = st.selectbox(
+                "이전 작업",
+                [None] + list(done_jobs),
+                format_func=lambda j: "사용 안 함" if j is None else f"{j} · {done_jobs[j]['file_name']}"
+            )
+            baseline_file = st.file_uploader(
+                "또는 이전 결과 Excel",
+                type=["xlsx"],
+                key="baseline_file",
+                disabled=baseline_job_id is not None
+            )
         process_button = st.button("Process Data")
 
         if process_button and uploaded_file:
-            df = pd.read_csv(uploaded_file, encoding="utf-8")
-            if "NCT Number" not in df.columns:
+            if NCT_COLUMN not in load_upload_header(uploaded_file):
                 st.error("업로드된 CSV 파일에 'NCT Number' 컬럼이 없습니다.")
                 return
-
-            nct_list = df["NCT Number"].tolist()
-
-            tests = []
-            reasons = []
-            explanations = []
-            genes_list = []
-            confidence_scores = []
-            experimental_1s = []
-            experimental_2s = []
-            control_1s = []
-            control_2s = []
-            study_names = []
-            start_dates = []
-            primary_completion_dates = []
-            completion_dates = []
-
-            # 추가: Official/Brief Title을 저장할 리스트
-            official_titles = []
-            brief_titles = []
-
-            html_contents = {}
-            gemini_responses = {}
-
-            progress_bar = st.progress(0)
-            total_ncts = len(nct_list)
-
-            for i, nct_id in enumerate(nct_list):
-                try:
-                    url = f"https://clinicaltrials.gov/api/v2/studies/{nct_id}"
-                    params = {
-                        'format': 'json',
-                        'markupFormat': 'markdown',
-                        'fields': 'NCTId,BriefTitle,ConditionsModule,EligibilityModule,OfficialTitle,ArmsInterventionsModule,StartDate,PrimaryCompletionDate,CompletionDate'
-                    }
-                    response = requests.get(url, params=params)
-
-                    if response.status_code != 200:
-                        tests.append(None)
-                        reasons.append(None)
-                        explanations.append(None)
-                        genes_list.append(None)
-                        confidence_scores.append(None)
-                        experimental_1s.append(None)
-                        experimental_2s.append(None)
-                        control_1s.append(None)
-                        control_2s.append(None)
-                        study_names.append(None)
-                        start_dates.append(None)
-                        primary_completion_dates.append(None)
-                        completion_dates.append(None)
-
-                        # Official/Brief Title도 None
-                        official_titles.append(None)
-                        brief_titles.append(None)
-
-                        html_contents[f"{nct_id}.html"] = None
-                        gemini_responses[nct_id] = None
-                        continue
-
-                    study_data = response.json()
-                    arms_data = study_data.get('protocolSection', {}).get('armsInterventionsModule', {}).get('armGroups')
-
-                    exp1, exp2, ctr1, ctr2 = None, None, None, None
-                    if arms_data:
-                        experimental_labels_drugs = []
-                        experimental_descriptions = []
-                        control_labels_drugs = []
-                        control_descriptions = []
-
-                        for arm in arms_data:
-                            label = arm.get('label', '')
-                            arm_type = arm.get('type', '')
-                            description = arm.get('description', '')
-
-                            other_keys = []
-                            for k, v in arm.items():
-                                if k not in ['label', 'type', 'description']:
-                                    if isinstance(v, str):
-                                        other_keys.append(v)
-                                    elif isinstance(v, list):
-                                        other_keys.append('/'.join(map(str, v)))
-                            drug_info = "\n".join(other_keys) if other_keys else "No drug info"
-
-                            if 'EXPERIMENTAL' in arm_type.upper():
-                                experimental_labels_drugs.append(f"{label}\n{drug_info}")
-                                experimental_descriptions.append(description)
-                            else:
-                                control_labels_drugs.append(f"{label}\n{drug_info}")
-                                control_descriptions.append(description)
-
-                        exp1 = "\n\n".join(experimental_labels_drugs)
-                        exp2 = "\n\n".join(experimental_descriptions)
-                        ctr1 = "\n\n".join(control_labels_drugs)
-                        ctr2 = "\n\n".join(control_descriptions)
-
-                    experimental_1s.append(exp1)
-                    experimental_2s.append(exp2)
-                    control_1s.append(ctr1)
-                    control_2s.append(ctr2)
-
-                    # GPT
-                    experiment_description = str(study_data)
-                    question = (
-                        "Please provide an answer in the following format based on the provided experiment description,\n"
-                        "1. test: Determine which of the following categories the cancer treatment experiment belongs to: first line, second line, third line, neoadjuvant, adjuvant or unclear. Only print out the test type without writinig any sentences.\n"
-                        "2. reason: write the exact specific part of the eligibilityCriteria in Experiment description below that supports your answer in 1 without changing a single part\n"
-                        "3. explanations: explain specifically why you chose your answer in 1\n"
-                        "4. genes: mutations, expressions associated in study such as KRAS, EGFR, MET, ALK, CEACAM5, STK11, KEAP1\n"
-                        "5. Confidence Score: Based on the probability of incorrectly guessing the type of test, if you are uncertain about your decision, write 'uncertain'. else write 'certain'.\n\n"
-                        f"Experiment description below:\n{experiment_description}"
-                    )
-
-                    try:
-                        response = client.chat.completions.create(
-                            model="gpt-3.5-turbo",
-                            messages=[
-                                {
-                                    "role": "system",
-                                    "content": "You are a helpful assistant that analyzes clinical trial descriptions."
-                                },
-                                {
-                                    "role": "user",
-                                    "content": question
-                                }
-                            ]
-                        )
-                        response_text = response.choices[0].message.content
-                    except Exception:
-                        response_text = None
-
-                    test_val, reason_val, explanation_val = None, None, None
-                    genes_val, confidence_val = None, None
-
-                    if response_text:
-                        gemini_responses[nct_id] = response_text
-                        lines = response_text.split("\n")
-                        for line in lines:
-                            line_stripped = line.strip().lower()
-                            if line_stripped.startswith("1."):
-                                chunk = line.strip().split("1.", 1)[-1]
-                                test_val = chunk.replace("test:", "").strip().lower()
-                            elif line_stripped.startswith("2."):
-                                reason_val = line.strip().split("2.", 1)[-1].strip()
-                            elif line_stripped.startswith("3."):
-                                explanation_val = line.strip().split("3.", 1)[-1].strip()
-                            elif line_stripped.startswith("4."):
-                                genes_val = line.strip().split("4.", 1)[-1].strip()
-                            elif line_stripped.startswith("5."):
-                                confidence_val = line.strip().split("5.", 1)[-1].strip()
-                    else:
-                        gemini_responses[nct_id] = None
-
-                    tests.append(test_val)
-                    reasons.append(reason_val)
-                    explanations.append(explanation_val)
-                    genes_list.append(genes_val)
-                    confidence_scores.append(confidence_val)
-
-                    # 공식 타이틀, brief title, conditions, eligibility
-                    identification_module = study_data.get('protocolSection', {}).get('identificationModule', {})
-                    o_title = identification_module.get('officialTitle', "NA")
-                    b_title = identification_module.get('briefTitle', "NA")
-
-                    # 리스트에 저장
-                    official_titles.append(o_title)
-                    brief_titles.append(b_title)
-
-                    conditions_module = study_data.get('protocolSection', {}).get('conditionsModule', {})
-                    conditions_val = conditions_module.get('conditions', [])
-                    conditions = ", ".join(conditions_val) if conditions_val else "NA"
-
-                    eligibility_module = study_data.get('protocolSection', {}).get('eligibilityModule', {})
-                    eligibility_criteria = eligibility_module.get('eligibilityCriteria', "")
-
-                    found_name_in_brackets = extract_last_in_brackets(o_title) or "NA"
-                    study_names.append(found_name_in_brackets)
-
-                    status_module = study_data.get('protocolSection', {}).get('statusModule', {})
-                    start_date_info = status_module.get('startDateStruct')
-                    primary_completion_info = status_module.get('primaryCompletionDateStruct')
-                    completion_info = status_module.get('completionDateStruct')
-
-                    def parse_date_info(d):
-                        if not d:
-                            return "NA"
-                        return str(d)
-
-                    start_dates.append(parse_date_info(start_date_info))
-                    primary_completion_dates.append(parse_date_info(primary_completion_info))
-                    completion_dates.append(parse_date_info(completion_info))
-
-                    reason_parts = find_common_substring(reason_val if reason_val else "", eligibility_criteria)
-                    highlighted_criteria = highlight_substring(eligibility_criteria, reason_parts)
-                    highlighted_criteria = highlighted_criteria.replace("\n", "<br>")
-
-                    arms_html = (
-                        "<table border='1' style='border-collapse:collapse'>"
-                        "<tr><th>label</th><th>type</th><th>description</th><th>others</th></tr>"
-                    )
-                    if arms_data:
-                        for arm in arms_data:
-                            label = arm.get('label', '')
-                            arm_type = arm.get('type', '')
-                            desc = arm.get('description', '')
-                            others = []
-                            for k, v in arm.items():
-                                if k not in ['label', 'type', 'description']:
-                                    others.append(f"{k}:{v}")
-                            arms_html += f"<tr><td>{label}</td><td>{arm_type}</td><td>{desc}</td><td>{'<br>'.join(others)}</td></tr>"
-                    arms_html += "</table>"
-
-                    markdown_content = (
-                        f"<h1>Response</h1>"
-                        f"<strong>Test:</strong> {test_val}<br><br>"
-                        f"<strong>Explanation:</strong> {explanation_val}<br><br>"
-                        f"<strong>Genes:</strong> {genes_val}<br><br>"
-                        f"<strong>Confidence Score:</strong> {confidence_val}<br><br>"
-                        f"<h1>Study Plan</h1>"
-                        f"{arms_html}"
-                        f"<h1>Study Data</h1>"
-                        f"<strong>Official Title:</strong> {o_title}<br><br>"
-                        f"<strong>Brief Title:</strong> {b_title}<br><br>"
-                        f"<strong>Conditions:</strong> {conditions}<br><br>"
-                        f"<strong>Eligibility Module:</strong><br>{highlighted_criteria}<br><br>"
-                        f"<strong>Highlighted Reason from Response:</strong><br>"
-                        f"{('<mark>' + reason_parts + '</mark>') if reason_parts else 'N/A'}"
-                    )
-                    html_contents[f"{nct_id}.html"] = markdown_content
-
-                except Exception:
-                    tests.append(None)
-                    reasons.append(None)
-                    explanations.append(None)
-                    genes_list.append(None)
-                    confidence_scores.append(None)
-                    experimental_1s.append(None)
-                    experimental_2s.append(None)
-                    control_1s.append(None)
-                    control_2s.append(None)
-                    study_names.append(None)
-                    start_dates.append(None)
-                    primary_completion_dates.append(None)
-                    completion_dates.append(None)
-                    official_titles.append(None)
-                    brief_titles.append(None)
-                    html_contents[f"{nct_id}.html"] = None
-                    gemini_responses[nct_id] = None
-
-                progress_bar.progress((i+1)/total_ncts)
-
-            # df에 새로운 컬럼들 추가
-            df["official_title"] = official_titles
-            df["brief_title"] = brief_titles
-            df["TestLines"] = tests
-            df["Reason"] = reasons
-            df["Explanation"] = explanations
-            df["Genes"] = genes_list
-            df["Confidence_Score"] = confidence_scores
-            df["experimental_data"] = experimental_1s
-            df["experimental_description"] = experimental_2s
-            df["control_datas"] = control_1s
-            df["control_description"] = control_2s
-            df["study_name"] = study_names
-            df["start_date"] = start_dates
-            df["primary_completion_date"] = primary_completion_dates
-            df["completion_date"] = completion_dates
-
-            st.session_state["processed_df"] = df
-            st.session_state["html_contents"] = html_contents
-            st.session_state["gemini_responses"] = gemini_responses
-
-            st.success("Data processing complete.")
-
-        # 처리된 데이터 표시
-        if st.session_state["processed_df"] is not None:
-            df_display = st.session_state["processed_df"].copy()
-            for c in df_display.columns:
-                df_display[c] = df_display[c].apply(lambda x: truncate_text(x, 20))
-            st.dataframe(df_display)
-
-            # Excel 다운로드
-            excel_bytes = read_excel_bytes(st.session_state["processed_df"])
-            st.download_button(
-                label="Download Updated Data (Excel)",
-                data=excel_bytes,
-                file_name="updated_ctg_studies.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            # 앱에서는 NCT Number 만 읽는다 (원본 CSV 는 그대로 작업 입력으로 저장)
+            df = load_upload(uploaded_file, [NCT_COLUMN])
+
+            options = PipelineOptions(
+                concurrency=concurrency,
+                gpt_workers=gpt_workers,
+                requests_per_minute=gpt_rpm,
+                tokens_per_minute=gpt_tpm,
+                compact_prompt=compact_prompt,
+                token_budget=token_budget,
+                fuzzy_highlight=fuzzy_highlight,
+                rule_classifier=rule_classifier,
+                structured_output=structured_output
             )
-
-            # HTML(zip) 다운로드
-            zip_bytes = zip_html_files(st.session_state["html_contents"])
-            st.download_button(
-                label="Download HTML Files",
-                data=zip_bytes,
-                file_name="html_files.zip",
-                mime="application/zip"
+            baseline_df = None
+            if baseline_job_id is None and baseline_file is not None:
+                baseline_header = load_upload_header(baseline_file)
+                if NCT_COLUMN not in baseline_header:
+                    st.error("이전 결과 Excel 에 'NCT Number' 컬럼이 없습니다.")
+                    return
+                baseline_df = load_upload(baseline_file, baseline_columns(baseline_header))
+                if "last_update_posted" not in baseline_df.columns:
+                    st.warning("이전 결과 Excel 에 last_update_posted 컬럼이 없어 모든 trial 을 다시 처리합니다.")
+
+            # 처리는 백그라운드 워커 프로세스에서 진행 (위젯을 바꿔도 중단되지 않음)
+            job_id = job_manager.submit(
+                df,
+                uploaded_file.name,
+                options,
+                baseline_job_id=baseline_job_id,
+                baseline_df=baseline_df,
+                input_data=uploaded_file.getvalue()
             )
+            st.session_state["job_id"] = job_id
+            st.success(f"작업이 등록되었습니다. Job ID: {job_id}")
 
-            # GPT Raw Response
-            st.subheader("GPT Response")
-            valid_responses = [v for v in st.session_state["gemini_responses"].values() if v]
-            if not valid_responses:
-                st.write("No responses available.")
-            else:
-                st.write("\n\n".join(valid_responses))
-        else:
+        # 작업 목록 (다른 사용자의 작업 포함)
+        jobs = job_manager.store.list()
+        if not jobs:
             st.info("CSV 파일을 업로드한 뒤, 'Process Data' 버튼을 눌러주세요.")
+        else:
+            job_labels = {
+                job["id"]: f"{job['id']} · {job['file_name']} · {job['status']} ({job['done']}/{job['total']})"
+                for job in jobs
+            }
+            job_ids = list(job_labels)
+            current = st.session_state["job_id"]
+            selected_job_id = st.selectbox(
+                "작업 선택",
+                job_ids,
+                index=job_ids.index(current) if current in job_ids else 0,
+                format_func=job_labels.get
+            )
+            st.session_state["job_id"] = selected_job_id
+            job = job_manager.store.get(selected_job_id)
+
+            if job["status"] in ACTIVE_STATUSES:
+                job_progress_panel(job_manager, selected_job_id)
+            elif job["status"] == FAILED:
+                st.error(f"작업이 실패했습니다: {job['error']}")
+                if job["stats"].get("metrics"):
+                    run_report_panel(job["id"], job["stats"]["metrics"])
+            elif job["status"] == CANCELLED:
+                st.warning("취소된 작업입니다.")
+            else:
+                show_job_results(job_manager, job)
 
     # ========================================================================== 
     # TAB 2: PPT 생성 (CSV/XLSX 업로드, % 단위 열 너비 설정)
@@ -492,17 +414,17 @@ def main():
         common_title = st.text_input("공통 슬라이드 제목", value="", placeholder="슬라이드에 공통으로 들어갈 제목 입력")
 
         if ppt_file is not None:
-            import os
-            ext = os.path.splitext(ppt_file.name)[-1].lower()
-
-            if ext == ".csv":
-                df_ppt = pd.read_csv(ppt_file, encoding="utf-8")
-            else:
-                df_ppt = pd.read_excel(ppt_file)
-
-            all_cols = df_ppt.columns.tolist()
+            ppt_hash = content_hash(ppt_file)
+            all_cols = load_upload_header(ppt_file)
             grouping_col = st.selectbox("그룹화할 컬럼 선택 (선택 사항)", ["None"] + all_cols)
             rows_per_slide = st.slider("슬라이드 당 행 개수", 1, 20, 6)
+            if grouping_col != "None":
+                sort_groups = st.checkbox("카테고리 이름순 정렬", value=False, help="끄면 파일에 처음 나온 순서")
+                cap_cols = st.columns(2)
+                max_groups = cap_cols[0].number_input("최대 카테고리 수 (0 = 전체)", min_value=0, value=0, step=1)
+                max_rows = cap_cols[1].number_input("카테고리당 최대 행 수 (0 = 전체)", min_value=0, value=0, step=1)
+            else:
+                sort_groups, max_groups, max_rows = False, 0, 0
 
             selected_columns = st.multiselect(
                 "PPT에 포함할 컬럼 선택",
@@ -521,42 +443,45 @@ def main():
                         step=1
                     )
 
+            parallel_ppt = st.checkbox(
+                "병렬 생성 (CPU 코어 수만큼 프로세스 사용)",
+                value=False,
+                help="슬라이드가 많을 때만 효과가 있습니다."
+            )
+
             generate_ppt = st.button("Generate PPT")
+            ppt_args = (
+                ppt_hash, grouping_col, common_title, selected_columns, rows_per_slide, col_widths,
+                os.cpu_count() if parallel_ppt else None, sort_groups, int(max_groups), int(max_rows)
+            )
             if generate_ppt and selected_columns:
-                if grouping_col != "None":
-                    categories = df_ppt[grouping_col].unique()
-                    df_list_dict = {}
-                    for cat in categories:
-                        cat_df = df_ppt[df_ppt[grouping_col] == cat]
-                        df_list_dict[str(cat)] = cat_df
-                else:
-                    df_list_dict = {"Data": df_ppt}
+                st.session_state["ppt_args"] = ppt_args
 
+            # 그룹 컬럼과 선택한 컬럼만 읽는다 (그룹 컬럼은 category)
+            needed_cols = list(dict.fromkeys(selected_columns + ([grouping_col] if grouping_col != "None" else [])))
+            df_ppt = load_upload(
+                ppt_file, needed_cols, categorical=[grouping_col] if grouping_col != "None" else []
+            ) if selected_columns else None
+
+            # 설정이 그대로면 리런 후에도 (캐시된) PPT 다운로드를 계속 보여준다
+            if selected_columns and st.session_state["ppt_args"] == ppt_args:
                 with st.spinner("Generating PPT..."):
-                    ppt_io = create_ppt_from_dfs(
-                        df_list_dict=df_list_dict,
-                        common_title=common_title,
-                        selected_columns=selected_columns,
-                        rows_per_slide=rows_per_slide,
-                        col_widths=col_widths
-                    )
+                    ppt_bytes = build_ppt(*ppt_args, df_ppt)
                 st.success("PPT generation complete.")
 
                 st.download_button(
                     label="Download PPT",
-                    data=ppt_io,
+                    data=ppt_bytes,
                     file_name="selected_trials.pptx",
                     mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
                 )
 
                 st.subheader("Preview of Dataframes per Category")
-                for cat_name, dataf in df_list_dict.items():
-                    if not dataf.empty:
-                        preview_df = dataf[selected_columns].head(rows_per_slide)
-                        st.write(f"**Category: {cat_name}**")
-                        st.dataframe(preview_df)
-                    else:
-                        st.write(f"**Category: {cat_name}** (Empty)")
+                # 미리보기는 앞쪽 카테고리 몇 개의 첫 슬라이드 분량만
+                preview_groups = min(max_groups or PREVIEW_CATEGORIES, PREVIEW_CATEGORIES)
+                for cat_name, dataf in ppt_groups(df_ppt, grouping_col, sort_groups, preview_groups, rows_per_slide):
+                    st.write(f"**Category: {cat_name}**")
+                    st.dataframe(dataf[selected_columns])
 
         else:
             st.info("CSV/XLSX 파일을 업로드하세요.")
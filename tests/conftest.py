@@ -0,0 +1,59 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.mock_servers import MockConfig, mock_servers
+from benchmarks.synthetic import make_nct_ids, make_studies
+from ctg_pipeline import fetch
+
+REGISTERED = make_nct_ids(30)
+STUDIES = make_studies(REGISTERED, seed=0)
+
+
+VALID_RESPONSE = json.dumps(
+    {"test": "first line", "reason": "", "explanations": "", "genes": "EGFR", "confidence": "certain"}
+)
+
+
+class FakeClient:
+    """chat.completions.create 호출 수만 세고 text 를 돌려주는 OpenAI 대역."""
+
+    def __init__(self, text=VALID_RESPONSE):
+        self.text = text
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **kwargs):
+        return self
+
+    def create(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.text))], usage=None
+        )
+
+
+@pytest.fixture
+def ctg_server():
+    """(설정) -> (CTG base URL, 요청 카운터) 로 로컬 ClinicalTrials.gov 대역 서버를 띄운다."""
+    stack = []
+
+    def start(config=None):
+        context = mock_servers(STUDIES, ctg_config=config or MockConfig(latency=0.01), seed=0)
+        ctg_url, _, counters = context.__enter__()
+        stack.append(context)
+        return ctg_url, counters["ctg"]
+
+    yield start
+    for context in reversed(stack):
+        context.__exit__(None, None, None)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    # 재시도 대기 시간 없이
+    monkeypatch.setattr(fetch, "BACKOFF_BASE_SECONDS", 0.0)
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from ctg_pipeline import batch
+from ctg_pipeline.records import TrialResult, read_records
+
+
+def fake_results(nct_list, client, cache, options, done_rows=(), **kwargs):
+    # 조회/분류 없이 행마다 레코드 하나
+    for row, nct_id in enumerate(nct_list):
+        if row not in done_rows:
+            yield TrialResult(row=row, nct_id=str(nct_id), official_title=f"title {nct_id}")
+
+
+def run(tmp_path, nct_list, stop_after=None):
+    def on_progress(done):
+        return stop_after is None or done < stop_after
+
+    return batch.process_frame(
+        pd.DataFrame({"NCT Number": nct_list}), str(tmp_path), None, None, formats=(), on_progress=on_progress
+    )
+
+
+def test_resume_skips_done_rows(tmp_path, monkeypatch):
+    seen = []
+
+    def recording(nct_list, *args, done_rows=(), **kwargs):
+        seen.append(set(done_rows))
+        yield from fake_results(nct_list, *args, done_rows=done_rows, **kwargs)
+
+    monkeypatch.setattr(batch, "iter_trial_results", recording)
+    ids = [f"NCT{i:08d}" for i in range(20)]
+    assert run(tmp_path, ids, stop_after=10) is None
+    assert run(tmp_path, ids) is not None
+    assert seen[1] == set(range(10))
+    assert [r.nct_id for r in read_records(tmp_path / batch.RESULTS_PARQUET)] == ids
+
+
+def test_different_input_does_not_resume_other_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "iter_trial_results", fake_results)
+    first = [f"NCT{i:08d}" for i in range(20)]
+    second = [f"NCT{i:08d}" for i in range(100, 120)]
+    run(tmp_path, first, stop_after=10)
+    run(tmp_path, second)
+    assert [r.nct_id for r in read_records(tmp_path / batch.RESULTS_PARQUET)] == second
+
+
+def test_resumed_record_with_other_nct_id_is_discarded(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "iter_trial_results", fake_results)
+    ids = [f"NCT{i:08d}" for i in range(5)]
+    run_id = "fixed"
+    checkpoint = batch.Checkpoint(batch.checkpoint_name(run_id), str(tmp_path))
+    checkpoint.append(TrialResult(row=0, nct_id="NCT99999999").to_dict())
+    checkpoint.close()
+    batch.process_frame(pd.DataFrame({"NCT Number": ids}), str(tmp_path), None, None, formats=(), run_id=run_id)
+    assert [r.nct_id for r in read_records(tmp_path / batch.RESULTS_PARQUET)] == ids
+
+
+def test_cancel_keeps_checkpoint_and_skips_outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "iter_trial_results", fake_results)
+    ids = [f"NCT{i:08d}" for i in range(5)]
+    result = batch.process_frame(
+        pd.DataFrame({"NCT Number": ids}), str(tmp_path), None, None, formats=(), cancelled=lambda: True
+    )
+    assert result is None
+    assert not (tmp_path / batch.RESULTS_PARQUET).exists()
+    # 이미 끝낸 행은 체크포인트에 남아 다시 실행하면 이어서 처리
+    run_id = batch.make_run_id(ids, batch.PipelineOptions().to_dict())
+    assert len(batch.Checkpoint(batch.checkpoint_name(run_id), str(tmp_path)).load()) == len(ids)
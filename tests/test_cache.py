@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+from ctg_pipeline.cache import ResultCache
+from ctg_pipeline.coalesce import hold_claims, wait_for_results
+
+NS = "study"
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResultCache(str(tmp_path), **kwargs)
+
+
+def test_hold_claims_renews_lease_until_done(tmp_path):
+    # 작업이 선점 유효 시간보다 길어도 다른 작업에게 선점이 넘어가지 않는다
+    mine, other = make_cache(tmp_path), make_cache(tmp_path)
+
+    async def work():
+        async with hold_claims(mine, NS, ["a"], lease_seconds=0.3) as claimed:
+            assert claimed == {"a"}
+            for _ in range(4):
+                await asyncio.sleep(0.2)
+                assert other.claimed_by_others(NS, ["a"]) == {"a"}
+                assert other.claim(NS, ["a"]) == set()
+
+    asyncio.run(work())
+    assert other.claimed_by_others(NS, ["a"]) == set()
+    assert other.claim(NS, ["a"]) == {"a"}
+
+
+def test_wait_for_results_does_not_count_hits(tmp_path):
+    mine, other = make_cache(tmp_path), make_cache(tmp_path)
+    assert other.claim(NS, ["a", "b"]) == {"a", "b"}
+
+    async def finish_later():
+        await asyncio.sleep(0.1)
+        other.set(NS, "a", {"value": 1})
+        other.release(NS, ["a", "b"])
+
+    async def run():
+        landed, _ = await asyncio.gather(wait_for_results(mine, NS, ["a", "b"], poll=0.02), finish_later())
+        return landed
+
+    assert asyncio.run(run()) == {"a": {"value": 1}}
+    assert mine.stats()[NS] == {"hits": 0, "misses": 0}
+
+
+def real_total(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+
+def test_set_tracks_total_without_rescanning(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, max_bytes=10_000)
+    scans = []
+    scan = cache._scan_total
+    monkeypatch.setattr(cache, "_scan_total", lambda: (scans.append(1), scan()))
+    for i in range(50):
+        cache.set(NS, f"k{i % 20}", "x" * (i + 1))   # 덮어쓰기 포함
+    assert scans == []
+    assert cache._total_bytes == real_total(cache)
+
+
+def test_evicts_least_recently_used_when_over_limit(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=100)
+    for key in ("a", "b", "c"):
+        cache.set(NS, key, "x" * 28)   # JSON 으로 30 바이트
+    cache.get(NS, "a")                 # a 가 가장 최근에 쓰임
+    cache.set(NS, "d", "x" * 28)
+    assert cache.get(NS, "b") is None
+    assert all(cache.get(NS, key) is not None for key in ("a", "c", "d"))
+    assert cache._total_bytes == real_total(cache) == 90
+
+
+def test_expired_entry_is_a_miss_and_leaves_total(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.set(NS, "a", "value")
+    cache.set(NS, "b", "other")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get(NS, "a") is None
+    assert cache.stats()[NS] == {"hits": 0, "misses": 1}
+    assert cache._total_bytes == real_total(cache)
+    cache.purge_expired()
+    assert real_total(cache) == cache._total_bytes == 0
+
+
+def test_claim_is_exclusive_between_caches(tmp_path):
+    mine, other = make_cache(tmp_path), make_cache(tmp_path)
+    assert mine.claim(NS, ["a", "b", "a"]) == {"a", "b"}
+    assert other.claim(NS, ["a", "c"]) == {"c"}
+    assert mine.claim(NS, ["a"]) == {"a"}   # 내 선점은 다시 잡을 수 있다
+    assert other.claimed_by_others(NS, ["a", "b", "c"]) == {"a", "b"}
+    assert mine.claimed_by_others(NS, ["a", "b", "c"]) == {"c"}
+    other.release(NS, ["a"])                # 남의 선점은 풀리지 않는다
+    assert other.claimed_by_others(NS, ["a"]) == {"a"}
+    mine.release(NS, ["a", "b"])
+    assert other.claimed_by_others(NS, ["a", "b"]) == set()
+    assert other.claim(NS, ["a"]) == {"a"}
+
+
+def test_expired_claim_can_be_taken_over(tmp_path):
+    mine, other = make_cache(tmp_path), make_cache(tmp_path)
+    assert mine.claim(NS, ["a"], lease_seconds=0.05) == {"a"}
+    time.sleep(0.1)
+    assert other.claimed_by_others(NS, ["a"]) == set()
+    assert other.claim(NS, ["a"]) == {"a"}
+    assert mine.claimed_by_others(NS, ["a"]) == {"a"}
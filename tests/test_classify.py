@@ -0,0 +1,20 @@
+from ctg_pipeline.classify import CANCELLED_ERROR, build_messages, classify_all
+
+from .conftest import VALID_RESPONSE, FakeClient
+
+
+def test_cancel_stops_remaining_requests():
+    client = FakeClient()
+    messages = [build_messages(f"question {i}") for i in range(10)]
+    results = classify_all(messages, client, workers=1, cancelled=lambda: client.calls >= 3)
+    assert client.calls == 3
+    assert sum(1 for r in results if r.text == VALID_RESPONSE) == 3
+    assert sum(1 for r in results if r.error == CANCELLED_ERROR and r.text is None) == 7
+
+
+def test_without_cancel_sends_every_unique_prompt():
+    client = FakeClient()
+    messages = [build_messages(f"question {i % 4}") for i in range(10)]
+    results = classify_all(messages, client, workers=2)
+    assert client.calls == 4
+    assert all(r.text == VALID_RESPONSE for r in results)
@@ -0,0 +1,49 @@
+import random
+
+import pandas as pd
+
+from ctg_pipeline.export import PART_SUFFIX, StreamingExcel, write_excel
+from ctg_pipeline.pipeline import apply_records
+from ctg_pipeline.records import TrialResult
+
+
+def make_input(n):
+    return pd.DataFrame({
+        "NCT Number": [f"NCT{i:08d}" for i in range(n)],
+        "Phase": [None if i % 4 == 0 else f"PHASE{i % 3 + 1}" for i in range(n)],
+        "Enrollment": [i * 10 for i in range(n)],
+    })
+
+
+def make_records(n, skip=()):
+    return [
+        TrialResult(row=i, nct_id=f"NCT{i:08d}", official_title=f"title {i}", TestLines="first line", Genes="EGFR")
+        for i in range(n) if i not in skip
+    ]
+
+
+def test_streaming_excel_matches_write_excel(tmp_path):
+    # 순서가 섞인 레코드, 레코드 없는 행, chunk 로 나눈 입력
+    df = make_input(23)
+    records = make_records(23, skip={0, 7, 22})
+    random.Random(0).shuffle(records)
+
+    expected = tmp_path / "expected.xlsx"
+    write_excel(apply_records(df, records), expected)
+
+    streamed = tmp_path / "streamed.xlsx"
+    export = StreamingExcel((df.iloc[i:i + 5] for i in range(0, len(df), 5)), str(streamed))
+    for record in records:
+        export.add(record)
+    export.finish()
+
+    assert not (tmp_path / ("streamed.xlsx" + PART_SUFFIX)).exists()
+    pd.testing.assert_frame_equal(pd.read_excel(streamed), pd.read_excel(expected))
+
+
+def test_streaming_excel_abort_leaves_no_file(tmp_path):
+    target = tmp_path / "out.xlsx"
+    export = StreamingExcel(make_input(3), str(target))
+    export.add(make_records(1)[0])
+    export.abort()
+    assert list(tmp_path.iterdir()) == []
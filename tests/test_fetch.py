@@ -0,0 +1,128 @@
+import asyncio
+import random
+
+from benchmarks.mock_servers import MockConfig
+from ctg_pipeline import fetch
+from ctg_pipeline.cache import STUDY_NAMESPACE, ResultCache
+from ctg_pipeline.fetch import (
+    FetchError,
+    fetch_studies_async,
+    fetch_studies_batched_async,
+    fetch_studies_cached_async,
+    study_last_update,
+    study_nct_id,
+)
+
+from .conftest import REGISTERED
+
+MISSING = ["NCT99999901", "NCT99999902"]
+
+
+def shuffled_ids(seed=0):
+    ids = REGISTERED[:20] + MISSING
+    random.Random(seed).shuffle(ids)
+    return ids
+
+
+def found_ids(results):
+    return [study_nct_id(study) if isinstance(study, dict) else study for study in results]
+
+
+def test_fetch_studies_keeps_input_order(ctg_server):
+    base_url, _ = ctg_server()
+    ids = shuffled_ids()
+    results = asyncio.run(fetch_studies_async(ids, concurrency=4, base_url=base_url))
+    assert found_ids(results) == [None if i in MISSING else i for i in ids]
+
+
+def test_fetch_studies_respects_concurrency(ctg_server):
+    base_url, counters = ctg_server(MockConfig(latency=0.05, jitter=0.0))
+    asyncio.run(fetch_studies_async(REGISTERED[:24], concurrency=3, base_url=base_url))
+    assert counters["200"] == 24
+    assert 1 < counters["max_in_flight"] <= 3
+
+
+def test_fetch_studies_reports_progress(ctg_server):
+    base_url, _ = ctg_server()
+    seen = []
+    asyncio.run(fetch_studies_async(
+        REGISTERED[:5], base_url=base_url, progress_callback=lambda done, total: seen.append((done, total))
+    ))
+    assert seen == [(i, 5) for i in range(1, 6)]
+
+
+def test_fetch_studies_not_found_is_none(ctg_server):
+    base_url, counters = ctg_server()
+    assert asyncio.run(fetch_studies_async(MISSING, base_url=base_url)) == [None, None]
+    assert "500" not in counters
+
+
+def test_fetch_studies_server_error_is_fetch_error(ctg_server):
+    base_url, counters = ctg_server(MockConfig(latency=0.0, error_rate=1.0))
+    results = asyncio.run(fetch_studies_async(REGISTERED[:2], base_url=base_url))
+    assert all(isinstance(r, FetchError) for r in results)
+    assert str(results[0]) == "fetch failed: HTTP 500"
+    assert counters["500"] == 2 * 4   # 요청 1번 + 재시도 3번
+
+
+def test_fetch_studies_retries_rate_limit(ctg_server):
+    # 한 번에 하나씩 보내야 대역 서버의 오류 순서가 seed 로 정해진다
+    base_url, counters = ctg_server(MockConfig(latency=0.0, rate_limit_rate=0.3, retry_after_ms=1))
+    results = asyncio.run(fetch_studies_async(REGISTERED[:10], concurrency=1, base_url=base_url))
+    assert found_ids(results) == REGISTERED[:10]
+    assert counters.get("429", 0) > 0
+
+
+def test_batched_keeps_order_with_duplicates_and_invalid_ids(ctg_server):
+    base_url, counters = ctg_server()
+    ids = shuffled_ids() + [REGISTERED[0].lower(), " " + REGISTERED[1], "not-an-id"]
+    results = asyncio.run(fetch_studies_batched_async(ids, batch_size=4, concurrency=2, base_url=base_url))
+    expected = [None if i in MISSING else i for i in shuffled_ids()] + [REGISTERED[0], REGISTERED[1], None]
+    assert found_ids(results) == expected
+    # 중복/잘못된 ID 는 요청하지 않는다: 고유한 유효 ID 22개 / 4개씩 = 6 배치
+    assert counters["200"] == 6
+
+
+def test_batched_respects_concurrency(ctg_server):
+    base_url, counters = ctg_server(MockConfig(latency=0.05, jitter=0.0))
+    asyncio.run(fetch_studies_batched_async(REGISTERED, batch_size=2, concurrency=3, base_url=base_url))
+    assert counters["200"] == 15
+    assert 1 < counters["max_in_flight"] <= 3
+
+
+def test_batched_follows_pagination(ctg_server, monkeypatch):
+    monkeypatch.setattr(fetch, "MAX_PAGE_SIZE", 2)
+    base_url, counters = ctg_server()
+    ids = REGISTERED[:5]
+    results = asyncio.run(fetch_studies_batched_async(ids, batch_size=5, base_url=base_url))
+    assert found_ids(results) == ids
+    assert counters["200"] == 3
+
+
+def test_batched_failure_falls_back_to_single_ids(ctg_server):
+    base_url, _ = ctg_server(MockConfig(latency=0.0, error_rate=1.0))
+    ids = REGISTERED[:3] + ["not-an-id"]
+    results = asyncio.run(fetch_studies_batched_async(ids, batch_size=10, base_url=base_url))
+    assert [type(r) for r in results[:3]] == [FetchError] * 3
+    assert results[3] is None
+
+
+def test_batched_recovers_from_transient_errors(ctg_server):
+    base_url, _ = ctg_server(MockConfig(latency=0.0, error_rate=0.3))
+    results = asyncio.run(fetch_studies_batched_async(REGISTERED, batch_size=5, concurrency=1, base_url=base_url))
+    assert found_ids(results) == REGISTERED
+
+
+def test_cached_unknown_version_uses_fetched_version(ctg_server, tmp_path):
+    # 버전 조회에 실패한 ID 는 받은 study 의 lastUpdatePostDate 로 캐시 ("NCT...@" 가 아니라)
+    base_url, _ = ctg_server()
+    cache = ResultCache(str(tmp_path))
+    ids = REGISTERED[:3]
+    results = asyncio.run(
+        fetch_studies_cached_async(ids, cache, versions={nct_id: None for nct_id in ids}, base_url=base_url)
+    )
+    assert found_ids(results) == ids
+    keys = {row[0] for row in cache._conn.execute("SELECT key FROM entries WHERE namespace = ?", (STUDY_NAMESPACE,))}
+    assert keys == {f"{study_nct_id(study)}@{study_last_update(study)}" for study in results}
+    assert all(not key.endswith("@") for key in keys)
+    cache.close()
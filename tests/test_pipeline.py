@@ -0,0 +1,57 @@
+from dataclasses import replace
+from functools import partial
+
+import pytest
+
+from ctg_pipeline import fetch, pipeline
+from ctg_pipeline.cache import ResultCache
+from ctg_pipeline.pipeline import PipelineOptions, iter_trial_results
+
+from .conftest import REGISTERED, FakeClient
+
+
+@pytest.fixture
+def run(ctg_server, monkeypatch, tmp_path):
+    """(NCT 목록, done_rows, 옵션) -> (레코드 목록, FakeClient, stats). 조회는 로컬 대역 서버로."""
+    base_url, _ = ctg_server()
+    monkeypatch.setattr(pipeline, "fetch_last_updates", partial(fetch.fetch_last_updates, base_url=base_url))
+    monkeypatch.setattr(pipeline, "fetch_studies_cached", partial(fetch.fetch_studies_cached, base_url=base_url))
+
+    def start(nct_list, done_rows=(), **option_kwargs):
+        client = FakeClient()
+        stats = {}
+        records = list(iter_trial_results(
+            nct_list,
+            client,
+            ResultCache(str(tmp_path)),
+            PipelineOptions(**option_kwargs),
+            done_rows=done_rows,
+            stats=stats
+        ))
+        return records, client, stats
+
+    return start
+
+
+def test_duplicate_ids_are_processed_once(run):
+    a, b, c = REGISTERED[:3]
+    # 중복이 chunk 경계를 넘고, 대소문자/공백이 달라도 같은 ID
+    nct_list = [a, b, a, c, f" {b.lower()} ", a]
+    records, client, stats = run(nct_list, chunk_size=2)
+    assert client.calls == 3
+    assert stats["duplicate_rows"] == 3
+    assert [r.row for r in records] == list(range(len(nct_list)))
+    assert [r.nct_id for r in records] == [str(x) for x in nct_list]
+    assert replace(records[2], row=0) == records[0]
+    assert replace(records[5], row=0) == records[0]
+    assert replace(records[4], row=1, nct_id=b) == records[1]
+
+
+def test_duplicate_of_done_row_is_processed(run):
+    # 첫 행이 체크포인트에 있으면 같은 ID 의 남은 행은 직접 처리한다
+    a, b = REGISTERED[:2]
+    records, client, stats = run([a, b, a], done_rows={0})
+    assert [r.row for r in records] == [1, 2]
+    assert records[1].nct_id == a and records[1].official_title
+    assert client.calls == 2
+    assert stats["duplicate_rows"] == 0
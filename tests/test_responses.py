@@ -0,0 +1,57 @@
+import json
+
+from ctg_pipeline.responses import parse_responses, validate_json_response
+
+NUMBERED = (
+    "1. test: first line\n"
+    "2. reason: Inclusion Criteria:\n"
+    "1. Histologically confirmed NSCLC\n"
+    "2. No prior systemic therapy for metastatic disease\n"
+    "3. explanations: Patients have not received treatment for advanced disease.\n"
+    "4. genes: EGFR, ALK\n"
+    "5. Confidence Score: certain"
+)
+
+
+def parse_one(text, structured):
+    return parse_responses([text], structured=structured).iloc[0].to_dict()
+
+
+def test_json_empty_reason_is_valid():
+    text = json.dumps({"test": "unclear", "reason": "", "confidence": "uncertain"})
+    assert validate_json_response(text) is None
+    row = parse_one(text, structured=True)
+    assert row["TestLines"] == "unclear"
+    assert row["Confidence_Score"] == "uncertain"
+    assert row["Reason"] is None
+
+
+def test_json_requires_test_and_confidence():
+    assert validate_json_response(json.dumps({"test": "first line", "reason": "x"})) == "missing keys: confidence"
+    assert validate_json_response(json.dumps({"test": "fourth line", "confidence": "certain"})).startswith(
+        "unexpected test value"
+    )
+
+
+def test_numbered_reason_keeps_quoted_list():
+    row = parse_one(NUMBERED, structured=False)
+    assert row["TestLines"] == "first line"
+    assert row["Reason"] == (
+        "Inclusion Criteria:\n1. Histologically confirmed NSCLC\n2. No prior systemic therapy for metastatic disease"
+    )
+    assert row["Explanation"] == "Patients have not received treatment for advanced disease."
+    assert row["Genes"] == "EGFR, ALK"
+    assert row["Confidence_Score"] == "certain"
+
+
+def test_numbered_without_labels_takes_each_number_once_in_order():
+    text = "1. adjuvant\n2. Completely resected\n1. stage II\n3. resected disease\n4. none\n5. certain"
+    row = parse_one(text, structured=False)
+    assert row["TestLines"] == "adjuvant"
+    assert row["Reason"] == "Completely resected\n1. stage II"
+    assert row["Confidence_Score"] == "certain"
+
+
+def test_empty_and_malformed_rows_are_none():
+    frame = parse_responses([None, "", "not json"], structured=True)
+    assert frame.isna().all().all()
@@ -0,0 +1,90 @@
+import random
+
+from ctg_pipeline.text_utils import (
+    SuffixAutomaton,
+    find_common_substring,
+    find_highlight_spans,
+    find_substring_spans,
+    highlight_spans,
+    highlight_substring,
+)
+
+QUOTE = "patients must have received prior platinum chemotherapy"
+
+
+def test_highlight_after_two_char_lowercase():
+    # 'İ'.lower() 는 두 글자 — 뒤쪽 위치가 밀리거나 IndexError 가 나면 안 된다
+    text = "İİİ Inclusion: Patients must have received prior platinum chemotherapy."
+    spans = find_highlight_spans(QUOTE, text)
+    assert [text[start:end] for start, end in spans] == [
+        "Patients must have received prior platinum chemotherapy"
+    ]
+
+
+def test_highlight_match_ending_at_text_end():
+    text = "İ " + "Patients must have received prior platinum chemotherapy"
+    assert find_highlight_spans(QUOTE, text) == [(2, len(text))]
+
+
+def brute_common_substring(s1, s2):
+    # 길이가 긴 것부터, 같은 길이면 s1 에서 앞에 있는 것
+    for length in range(len(s1), 0, -1):
+        for start in range(len(s1) - length + 1):
+            if s1[start:start + length] in s2:
+                return s1[start:start + length]
+    return ""
+
+
+def test_common_substring_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(300):
+        s1 = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+        s2 = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+        assert find_common_substring(s1, s2) == brute_common_substring(s1, s2)
+
+
+def test_longest_match_positions_point_at_the_match():
+    text = "the patient received prior platinum and prior taxane"
+    pattern = "no prior taxane therapy"
+    length, pattern_end, text_end = SuffixAutomaton(text).longest_match(pattern)
+    match = pattern[pattern_end - length + 1:pattern_end + 1]
+    assert match == " prior taxane"
+    assert text[text_end - length + 1:text_end + 1] == match
+    assert SuffixAutomaton(text).longest_match("QZ") is None
+
+
+def test_highlight_ignores_whitespace_and_bullets():
+    text = "Inclusion Criteria:\n\n* Patients must have received\n  prior platinum chemotherapy\n* Age >= 18"
+    spans = find_highlight_spans(QUOTE, text)
+    assert len(spans) == 1
+    start, end = spans[0]
+    assert text[start:end] == "Patients must have received\n  prior platinum chemotherapy"
+
+
+def test_highlight_splits_paraphrased_quote():
+    text = (
+        "Patients must have received prior platinum chemotherapy. "
+        "Other text in between. "
+        "No more than two prior lines of therapy for metastatic disease."
+    )
+    quote = (
+        "Patients must have received prior platinum chemotherapy and "
+        "no more than two prior lines of therapy for metastatic disease"
+    )
+    parts = [text[start:end] for start, end in find_highlight_spans(quote, text)]
+    assert parts == [
+        "Patients must have received prior platinum chemotherapy",
+        "No more than two prior lines of therapy for metastatic disease",
+    ]
+
+
+def test_highlight_drops_short_matches():
+    assert find_highlight_spans("prior platinum", "received prior platinum") == []
+    assert find_highlight_spans("prior platinum", "received prior platinum", min_length=5) == [(9, 23)]
+    assert find_highlight_spans("", "text") == []
+
+
+def test_substring_spans_agree_with_replace():
+    text = "aaa EGFR bbb EGFR EGFREGFR"
+    assert highlight_spans(text, find_substring_spans(text, "EGFR")) == highlight_substring(text, "EGFR")
+    assert highlight_spans(text, find_substring_spans(text, "")) == text